@@ -0,0 +1,160 @@
+"""
+Async views for the endpoints that wait on upstream providers: asset details
+and history, the market summary and news.
+
+They must be served through core.asgi (see start.sh). A slow upstream then
+only parks a coroutine instead of holding a worker: adapters call providers
+with the async HTTP client where they have a plain HTTP API and fall back to
+the adapter thread pool otherwise (MarketAdapter.aget_*).
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.renderers import JSONRenderer
+from assets import cache as adapter_cache
+from assets.generation import PRICES, MARKET_SUMMARY, NEWS
+from assets.models import Asset
+from .conditional import STALE_HEADER, aconditional
+from .renderers import ColumnarJSONRenderer, PackedHistoryRenderer
+from .serializers import NewsSerializer
+from .utils import get_top_headlines, get_market_summary_snapshot, get_country_news
+
+# Upper bound for ?points= (LTTB downsampling target)
+MAX_HISTORY_POINTS = 5000
+
+
+def json_response(data, status=200):
+    # Same encoder as the DRF views, so payloads are byte-for-byte identical
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def mark_stale(response):
+    """Flag a last-known-good fallback served while the provider is unavailable."""
+    response[STALE_HEADER] = 'true'
+    return response
+
+
+def history_renderer(request):
+    """
+    Renderer for a history request: ?format=columnar, ?format=bin or
+    Accept: application/vnd.ledgersync.history, else plain JSON.
+    """
+    fmt = request.GET.get('format')
+    if fmt == ColumnarJSONRenderer.format:
+        return ColumnarJSONRenderer()
+    if fmt == PackedHistoryRenderer.format or PackedHistoryRenderer.media_type in request.META.get('HTTP_ACCEPT', ''):
+        return PackedHistoryRenderer()
+    return JSONRenderer()
+
+
+def history_format(renderer):
+    """'columnar' when the renderer wants arrays, else 'points'."""
+    return 'columnar' if renderer.format in ('columnar', 'bin') else 'points'
+
+
+def history_points(request):
+    """Parsed ?points=N, or None when absent/invalid."""
+    try:
+        points = int(request.GET.get('points', ''))
+    except ValueError:
+        return None
+    return min(points, MAX_HISTORY_POINTS) if points >= 3 else None
+
+
+async def history_response(request, asset, period):
+    renderer = history_renderer(request)
+    try:
+        data, stale = await adapter_cache.aget_history(
+            asset, period, history_format(renderer), points=history_points(request)
+        )
+    except Exception as e:
+        # Errors are JSON whichever format was asked for
+        return json_response({'error': str(e)}, status=500)
+    response = HttpResponse(renderer.render(data), content_type=renderer.media_type)
+    return mark_stale(response) if stale else response
+
+
+async def get_asset(pk):
+    return await Asset.objects.filter(pk=pk).afirst()
+
+
+@require_GET
+async def asset_details(request, pk):
+    """
+    Fetch extra details (Market Cap, Volume) via Adapter,
+    or the last known details (X-Data-Stale) while the provider is down.
+    """
+    asset = await get_asset(pk)
+    if asset is None:
+        return json_response({'detail': 'No Asset matches the given query.'}, status=404)
+
+    details, stale = await adapter_cache.aget_details(asset)
+    response = json_response(details)
+    return mark_stale(response) if stale else response
+
+
+@require_GET
+@aconditional(PRICES, max_age=15, stale_while_revalidate=45)
+async def asset_history(request, pk):
+    """
+    Fetch price history for an asset through the shared history cache.
+    Supports ?format=columnar and binary (?format=bin) responses, and
+    ?points=N to downsample (LTTB) to at most N points.
+    """
+    asset = await get_asset(pk)
+    if asset is None:
+        return json_response({'detail': 'No Asset matches the given query.'}, status=404)
+
+    period = request.GET.get('period', '1d')
+    # Map frontend '24h' / '7d' to adapter periods
+    if period == '24h': period = '1d'
+    if period == '7d': period = '5d' # approximate
+
+    return await history_response(request, asset, period)
+
+
+@require_GET
+@aconditional(PRICES, max_age=15, stale_while_revalidate=45)
+async def price_history(request, symbol):
+    """
+    Historical price data for a symbol (?period=1d, 5d, 1mo, 1y, 5y, ytd).
+    Same formats and ?points= as asset_history.
+    """
+    asset = await Asset.objects.filter(symbol=symbol).afirst()
+    if not asset:
+        return json_response({'error': 'Asset not found'}, status=404)
+
+    return await history_response(request, asset, request.GET.get('period', '1d'))
+
+
+@require_GET
+@aconditional(MARKET_SUMMARY, max_age=15, stale_while_revalidate=45)
+async def market_summary(request):
+    """
+    Market summary (Ticker indices + Top Gainers), served from the snapshot
+    precomputed by the update_market_summary task.
+    """
+    # Not thread-sensitive: a cold cache waits on the fallback build
+    data = await sync_to_async(get_market_summary_snapshot, thread_sensitive=False)()
+    return json_response(data)
+
+
+@require_GET
+@aconditional(NEWS, max_age=60, stale_while_revalidate=240)
+async def news(request):
+    """
+    Financial news by ?country=, from the news store filled by the update_news task.
+    """
+    country = request.GET.get('country', 'us').lower()
+    news_data = await sync_to_async(get_country_news)(country)
+    return json_response(NewsSerializer(news_data, many=True).data)
+
+
+@require_GET
+@aconditional(NEWS, max_age=60, stale_while_revalidate=240)
+async def top_headlines(request):
+    """
+    Top 10 merged headlines from Yahoo and BBC, from the news store.
+    """
+    headlines = await sync_to_async(get_top_headlines)(limit=10)
+    return json_response(NewsSerializer(headlines, many=True).data)
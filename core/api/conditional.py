@@ -0,0 +1,109 @@
+"""
+HTTP conditional responses keyed on data generations (assets.generation).
+
+@conditional('prices', max_age=15) on a DRF view method adds ETag,
+Last-Modified and Cache-Control headers and answers matching
+If-None-Match / If-Modified-Since requests with 304 before the view runs.
+aconditional does the same for async function views.
+"""
+import hashlib
+import time
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from assets import metrics
+from assets.generation import get_generation
+
+# Set on responses that carry last-known-good data while a provider is down.
+# They are not tied to a generation, so they get no validators.
+STALE_HEADER = 'X-Data-Stale'
+
+
+def make_etag(resource, generation, request) -> str:
+    # DRF requests carry the negotiated media type; plain ones only the Accept header
+    renderer = getattr(request, 'accepted_media_type', None) or request.META.get('HTTP_ACCEPT', '')
+    digest = hashlib.sha1(
+        f'{resource}:{generation}:{request.get_full_path()}:{renderer}'.encode('utf-8')
+    ).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def is_not_modified(request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Weak comparison, as for GET
+        etags = parse_etags(if_none_match)
+        return '*' in etags or any(e.removeprefix('W/') == etag for e in etags)
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and int(last_modified) <= if_modified_since
+
+
+def http_last_modified(last_modified: float, now: float = None) -> int:
+    """
+    The whole second to send as Last-Modified. HTTP dates have one-second
+    resolution, so a change made in the current second is advertised as the
+    second before: If-Modified-Since then cannot match another change later
+    in that same second, and only costs one full response once it is over.
+    """
+    now = time.time() if now is None else now
+    seconds = int(last_modified)
+    return seconds - 1 if seconds >= int(now) else seconds
+
+
+def set_cache_headers(response, etag: str, last_modified: float, max_age: int, stale_while_revalidate: int):
+    cache_control = f'public, max-age={max_age}'
+    if stale_while_revalidate:
+        cache_control += f', stale-while-revalidate={stale_while_revalidate}'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(http_last_modified(last_modified))
+    response['Cache-Control'] = cache_control
+    patch_vary_headers(response, ['Accept'])
+
+
+def conditional(resource: str, max_age: int = 0, stale_while_revalidate: int = 0):
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            generation, last_modified = get_generation(resource)
+            etag = make_etag(resource, generation, request)
+
+            if is_not_modified(request, etag, last_modified):
+                metrics.CONDITIONAL_RESPONSES.labels(resource=resource, result='not_modified').inc()
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                metrics.CONDITIONAL_RESPONSES.labels(resource=resource, result='full').inc()
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK or response.has_header(STALE_HEADER):
+                    return response
+
+            set_cache_headers(response, etag, last_modified, max_age, stale_while_revalidate)
+            return response
+        return wrapper
+    return decorator
+
+
+def aconditional(resource: str, max_age: int = 0, stale_while_revalidate: int = 0):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            generation, last_modified = await sync_to_async(get_generation)(resource)
+            etag = make_etag(resource, generation, request)
+
+            if is_not_modified(request, etag, last_modified):
+                metrics.CONDITIONAL_RESPONSES.labels(resource=resource, result='not_modified').inc()
+                response = HttpResponseNotModified()
+            else:
+                metrics.CONDITIONAL_RESPONSES.labels(resource=resource, result='full').inc()
+                response = await view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK or response.has_header(STALE_HEADER):
+                    return response
+
+            set_cache_headers(response, etag, last_modified, max_age, stale_while_revalidate)
+            return response
+        return wrapper
+    return decorator
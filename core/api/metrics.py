@@ -0,0 +1,162 @@
+"""
+Request metrics and the Prometheus /metrics endpoint.
+
+MetricsMiddleware times every request per view (the URL name, never the raw
+path, so label cardinality stays bounded) and counts the SQL it ran: an
+execute wrapper installed on every database connection (see ApiConfig.ready)
+adds to the current request's QueryStats, which travels in a contextvar so
+queries run through sync_to_async are counted too.
+
+metrics_view renders assets.metrics, merged across processes when
+PROMETHEUS_MULTIPROC_DIR is set, plus price lag per asset type. Price lag is
+computed at scrape time from AssetQuote, so it keeps growing even when the
+Celery worker has stopped reporting. The endpoint is closed by default:
+scrapers must send "Authorization: Bearer <METRICS_TOKEN>" when a token is
+set, and otherwise must connect from one of METRICS_ALLOWED_IPS.
+"""
+import contextvars
+import hmac
+import os
+import time
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.models import Count, Min, Q
+from django.http import HttpResponse
+from django.utils import timezone
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+from assets import metrics
+from assets.models import Asset
+
+# Lag bounds (seconds) for ledgersync_price_lag_assets
+LAG_BUCKETS = (60, 120, 300, 900, 3600, 6 * 3600, 24 * 3600)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def record(self, sql, params, many: bool, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+
+
+query_stats = contextvars.ContextVar('query_stats', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    stats = query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, params, many, time.perf_counter() - started)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """connection_created receiver: count queries on every connection."""
+    if count_queries not in connection.execute_wrappers:
+        # First, so a temporary execute_wrapper() context popping its own wrapper leaves this one
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started, token = time.perf_counter(), query_stats.set(QueryStats())
+        response = self.get_response(request)
+        self.record(request, response, started, token)
+        return response
+
+    async def __acall__(self, request):
+        started, token = time.perf_counter(), query_stats.set(QueryStats())
+        response = await self.get_response(request)
+        self.record(request, response, started, token)
+        return response
+
+    @staticmethod
+    def record(request, response, started, token):
+        seconds = time.perf_counter() - started
+        stats = query_stats.get()
+        query_stats.reset(token)
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else 'unmatched'
+        metrics.HTTP_SECONDS.labels(view=view, method=request.method,
+                                    status=f'{response.status_code // 100}xx').observe(seconds)
+        metrics.HTTP_QUERIES.labels(view=view).observe(stats.count)
+        metrics.HTTP_DB_SECONDS.labels(view=view).observe(stats.seconds)
+
+
+class PriceLagCollector:
+    """The age of each asset type's latest prices, read from AssetQuote at scrape time."""
+
+    def __init__(self, now=None):
+        self.now = now
+
+    def collect(self):
+        now = self.now or timezone.now()
+        buckets = {
+            f'le_{bound}': Count('pk', filter=Q(quote__updated_at__gte=now - timedelta(seconds=bound)))
+            for bound in LAG_BUCKETS
+        }
+        rows = Asset.objects.values('asset_type').annotate(total=Count('pk'), oldest=Min('quote__updated_at'), **buckets)
+
+        assets = GaugeMetricFamily('ledgersync_assets', 'Tracked assets', labels=['asset_type'])
+        within = GaugeMetricFamily(
+            'ledgersync_price_lag_assets', 'Assets whose latest price is at most le seconds old',
+            labels=['asset_type', 'le'],
+        )
+        oldest = GaugeMetricFamily(
+            'ledgersync_price_lag_max_seconds', 'Age of the oldest latest price (closed markets included)',
+            labels=['asset_type'],
+        )
+        for row in rows:
+            asset_type = row['asset_type']
+            assets.add_metric([asset_type], row['total'])
+            for bound in LAG_BUCKETS:
+                within.add_metric([asset_type, str(bound)], row[f'le_{bound}'])
+            if row['oldest'] is not None:
+                oldest.add_metric([asset_type], (now - row['oldest']).total_seconds())
+        return [assets, within, oldest]
+
+
+def registries() -> list:
+    """The instruments (merged across processes when multiprocess mode is on), then price lag."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        instruments = CollectorRegistry()
+        multiprocess.MultiProcessCollector(instruments)
+    else:
+        instruments = REGISTRY
+    lag = CollectorRegistry()
+    lag.register(PriceLagCollector())
+    return [instruments, lag]
+
+
+def is_allowed(request) -> bool:
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        return hmac.compare_digest(supplied.encode(), token.encode())
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+
+
+def metrics_view(request):
+    if not is_allowed(request):
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    body = b''.join(generate_latest(registry) for registry in registries())
+    return HttpResponse(body, content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsFeedState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=255)),
+                ('checked_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NewsItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=20)),
+                ('headline', models.CharField(max_length=500)),
+                ('source', models.CharField(max_length=255)),
+                ('link', models.URLField(max_length=1000)),
+                ('image', models.URLField(blank=True, max_length=1000, null=True)),
+                ('origin', models.CharField(max_length=50)),
+                ('published_at', models.DateTimeField()),
+                ('url_hash', models.CharField(max_length=40)),
+                ('title_hash', models.CharField(max_length=40)),
+                ('fetched_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-published_at'],
+                'indexes': [models.Index(fields=['feed', '-published_at'], name='api_news_feed_published_idx')],
+                'unique_together': {('feed', 'url_hash')},
+            },
+        ),
+    ]
@@ -1,3 +1,39 @@
 from django.db import models
 
-# Create your models here.
+class NewsItem(models.Model):
+    """
+    A normalized news headline stored by the news ingestion task.
+    feed is the list it belongs to: 'headlines' or a country key ('us', 'uk', ...).
+    """
+    feed = models.CharField(max_length=20)
+    headline = models.CharField(max_length=500)
+    source = models.CharField(max_length=255)
+    link = models.URLField(max_length=1000)
+    image = models.URLField(max_length=1000, blank=True, null=True)
+    origin = models.CharField(max_length=50)
+    published_at = models.DateTimeField()
+    url_hash = models.CharField(max_length=40)
+    title_hash = models.CharField(max_length=40)
+    fetched_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('feed', 'url_hash')
+        indexes = [
+            models.Index(fields=['feed', '-published_at'], name='api_news_feed_published_idx'),
+        ]
+        ordering = ['-published_at']
+
+    def __str__(self):
+        return f"[{self.feed}] {self.headline}"
+
+class NewsFeedState(models.Model):
+    """
+    Conditional GET validators (ETag / Last-Modified) per upstream feed URL.
+    """
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=255, blank=True)
+    checked_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.url
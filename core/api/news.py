@@ -0,0 +1,150 @@
+"""
+News ingestion: fetches every upstream feed in parallel on a schedule and
+stores normalized, deduplicated items in NewsItem, so the news endpoints
+only ever read from the database.
+"""
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Q
+from django.utils import timezone
+from assets.generation import NEWS, bump_generation
+from .models import NewsFeedState, NewsItem
+from .utils import (
+    BBC_BUSINESS_FEED_URL,
+    COUNTRY_NEWS_QUERIES,
+    fetch_feed,
+    fetch_yahoo_news,
+    google_news_url,
+    parse_bbc_entries,
+    parse_google_entries,
+)
+
+logger = logging.getLogger(__name__)
+
+NEWS_RETENTION_DAYS = 7
+
+
+def news_sources():
+    """
+    [(feed, url, parser)] for every upstream. parser is None for sources that
+    are not RSS (Yahoo via yfinance), which are fetched unconditionally.
+    """
+    sources = [
+        ('headlines', 'yfinance:^GSPC', None),
+        ('headlines', BBC_BUSINESS_FEED_URL, parse_bbc_entries),
+    ]
+    for country, query in COUNTRY_NEWS_QUERIES.items():
+        sources.append((country, google_news_url(query), parse_google_entries))
+    return sources
+
+
+def url_hash(link: str) -> str:
+    return hashlib.sha1(link.strip().encode('utf-8')).hexdigest()
+
+
+def title_hash(title: str) -> str:
+    normalized = re.sub(r'\W+', ' ', title.lower()).strip()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def _fetch_source(url, parser, state):
+    """
+    Returns (items, etag, modified); items is None when the feed answered 304.
+    Runs in a worker thread, so it must not touch the database.
+    """
+    if parser is None:
+        return fetch_yahoo_news(), '', ''
+
+    feed = fetch_feed(url, etag=state.etag if state else None, modified=state.last_modified if state else None)
+    if getattr(feed, 'status', None) == 304:
+        return None, state.etag, state.last_modified
+    return parser(feed), feed.get('etag', ''), feed.get('modified', '')
+
+
+def store_items(feed: str, items: list) -> int:
+    """
+    Normalizes and stores items for a feed, skipping any whose URL or
+    title is already stored for that feed. Returns the number inserted.
+    """
+    candidates = {}
+    for item in items:
+        link = item.get('link')
+        title = item.get('headline')
+        if not title or not link or link == '#':
+            continue
+        candidates.setdefault(url_hash(link), (title_hash(title), item))
+
+    if not candidates:
+        return 0
+
+    titles = {t for t, _ in candidates.values()}
+    existing = NewsItem.objects.filter(feed=feed).filter(
+        Q(url_hash__in=list(candidates)) | Q(title_hash__in=list(titles))
+    ).values_list('url_hash', 'title_hash')
+    seen_urls = {u for u, _ in existing}
+    seen_titles = {t for _, t in existing}
+
+    new_items = []
+    for u_hash, (t_hash, item) in candidates.items():
+        if u_hash in seen_urls or t_hash in seen_titles:
+            continue
+        seen_titles.add(t_hash)
+        new_items.append(NewsItem(
+            feed=feed,
+            headline=item['headline'][:500],
+            source=(item.get('source') or item.get('origin') or '')[:255],
+            link=item['link'][:1000],
+            image=item.get('image'),
+            origin=item.get('origin', ''),
+            published_at=datetime.fromtimestamp(item.get('timestamp') or 0, tz=dt_timezone.utc),
+            url_hash=u_hash,
+            title_hash=t_hash,
+        ))
+
+    NewsItem.objects.bulk_create(new_items, ignore_conflicts=True)
+    return len(new_items)
+
+
+def ingest_news() -> dict:
+    """
+    Fetches all sources in parallel and stores new items.
+    Returns {'fetched': n, 'not_modified': n, 'failed': n, 'inserted': n}.
+    """
+    sources = news_sources()
+    states = {s.url: s for s in NewsFeedState.objects.filter(url__in=[url for _, url, _ in sources])}
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        futures = [
+            (feed, url, pool.submit(_fetch_source, url, parser, states.get(url)))
+            for feed, url, parser in sources
+        ]
+
+    stats = {'fetched': 0, 'not_modified': 0, 'failed': 0, 'inserted': 0}
+    now = timezone.now()
+    for feed, url, future in futures:
+        try:
+            items, etag, modified = future.result()
+        except Exception as e:
+            logger.error(f"Error fetching news from {url}: {e}")
+            stats['failed'] += 1
+            continue
+
+        if not url.startswith('yfinance:'):
+            NewsFeedState.objects.update_or_create(
+                url=url, defaults={'etag': etag or '', 'last_modified': modified or '', 'checked_at': now}
+            )
+
+        if items is None:
+            stats['not_modified'] += 1
+            continue
+
+        stats['fetched'] += 1
+        stats['inserted'] += store_items(feed, items)
+
+    expired, _ = NewsItem.objects.filter(published_at__lt=now - timedelta(days=NEWS_RETENTION_DAYS)).delete()
+    if stats['inserted'] or expired:
+        bump_generation(NEWS)
+    return stats
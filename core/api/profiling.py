@@ -0,0 +1,309 @@
+"""
+Opt-in profiling of single requests, for staff.
+
+Send "X-Profile: 1" (or add ?_profile=1) as a staff user, authenticated by
+session or JWT, and the request runs under a sampling profiler. The report is
+stored in the cache for PROFILE_TTL and its id returned in X-Profile-Id; read
+it back from /api/profiles/<id>/. "X-Profile: inline" (or ?_profile=inline)
+returns the report instead of the response body. Flags from anyone else are
+ignored.
+
+The report has:
+- hotspots: a sampling profile of the threads doing this request's work.
+  These are the thread the request started on, plus every thread that ran one
+  of its SQL queries or adapter calls (sync_to_async and the adapter pool).
+  Requests running concurrently on the same event loop thread can show up.
+- sql: every statement with its duration, and duplicate statements (same
+  SQL, with the count of identical parameters).
+- adapters: calls and inclusive time per MarketAdapter method.
+
+Requests without the flag pay one header and query-string check.
+Profiling is off unless PROFILING_ENABLED is set: otherwise the middleware is
+removed and MarketAdapter methods are left unwrapped (see assets.adapters).
+"""
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from assets.adapters import adapter_calls
+from .metrics import QueryStats, query_stats
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_FLAG = '_profile'
+PROFILE_TTL = 60 * 60
+SAMPLE_INTERVAL = 0.002
+TOP_FUNCTIONS = 30
+MAX_STATEMENTS = 1000
+
+# Leaf frames in these modules are threads parked on a lock, queue or selector
+IDLE_MODULES = ('threading.py', 'queue.py', 'selectors.py')
+
+
+def profile_key(profile_id: str) -> str:
+    return f'profile:{profile_id}'
+
+
+@lru_cache(maxsize=4096)
+def _short_path(path: str) -> str:
+    if 'site-packages/' in path:
+        return path.split('site-packages/', 1)[1]
+    if path.startswith(str(settings.BASE_DIR)):
+        return os.path.relpath(path, settings.BASE_DIR)
+    return re.sub(r'^.*/lib/python\d+\.\d+/', '', path)
+
+
+class ProfiledQueries(QueryStats):
+    """QueryStats that also keeps every statement, and still counts for the enclosing request."""
+
+    def __init__(self, profile, parent=None):
+        super().__init__()
+        self.profile = profile
+        self.parent = parent
+        self.statements = []
+        self.lock = threading.Lock()
+
+    def record(self, sql, params, many: bool, seconds: float):
+        super().record(sql, params, many, seconds)
+        if self.parent is not None:
+            self.parent.record(sql, params, many, seconds)
+        self.profile.join_thread()
+        with self.lock:
+            self.statements.append((sql, None if many else repr(params)[:200], many, seconds))
+
+
+class AdapterCalls:
+    def __init__(self, profile):
+        self.profile = profile
+        self.calls = defaultdict(lambda: [0, 0.0])
+        self.lock = threading.Lock()
+
+    def enter(self):
+        # Sample the thread running the adapter call (e.g. the adapter pool) from now on
+        self.profile.join_thread()
+
+    def record(self, method: str, seconds: float):
+        with self.lock:
+            self.calls[method][0] += 1
+            self.calls[method][1] += seconds
+
+
+class Profile:
+    """Samples the stacks of the request's threads until stop()."""
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or getattr(settings, 'PROFILING_SAMPLE_INTERVAL', SAMPLE_INTERVAL)
+        self.threads = {threading.get_ident()}
+        self.own = Counter()
+        self.total = Counter()
+        self.rounds = 0
+        self.samples = 0
+        self.idle = 0
+        self.queries = ProfiledQueries(self, parent=query_stats.get())
+        self.adapters = AdapterCalls(self)
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, name='request-profiler', daemon=True)
+
+    def join_thread(self):
+        self.threads.add(threading.get_ident())
+
+    def start(self):
+        self.tokens = (query_stats.set(self.queries), adapter_calls.set(self.adapters))
+        self.started_at = timezone.now()
+        self.started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        self.stopped.set()
+        self.sampler.join()
+        query_stats.reset(self.tokens[0])
+        adapter_calls.reset(self.tokens[1])
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            self.rounds += 1
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._add(frame)
+
+    def _add(self, frame):
+        self.samples += 1
+        if os.path.basename(frame.f_code.co_filename) in IDLE_MODULES:
+            self.idle += 1
+            return
+        seen = set()
+        leaf = True
+        while frame is not None:
+            code = frame.f_code
+            function = f"{_short_path(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+            if leaf:
+                self.own[function] += 1
+                leaf = False
+            if function not in seen:
+                seen.add(function)
+                self.total[function] += 1
+            frame = frame.f_back
+
+    def report(self, request, response) -> dict:
+        # Wall time per sampling round; rounds run slower than interval under load
+        ms = self.duration * 1000 / max(1, self.rounds)
+        hotspots = [
+            {'function': function, 'self_ms': round(count * ms, 1), 'total_ms': round(self.total[function] * ms, 1)}
+            for function, count in self.own.most_common(TOP_FUNCTIONS)
+        ]
+        cumulative = [
+            {'function': function, 'total_ms': round(count * ms, 1)}
+            for function, count in self.total.most_common(TOP_FUNCTIONS)
+        ]
+
+        statements = self.queries.statements
+        by_sql = defaultdict(list)
+        for sql, params, _, seconds in statements:
+            by_sql[sql].append((params, seconds))
+        duplicates = sorted(
+            (
+                {
+                    'sql': sql,
+                    'count': len(runs),
+                    'identical': len(runs) - len({params for params, _ in runs}),
+                    'total_ms': round(sum(seconds for _, seconds in runs) * 1000, 2),
+                }
+                for sql, runs in by_sql.items() if len(runs) > 1
+            ),
+            key=lambda d: -d['total_ms'],
+        )
+
+        adapters = sorted(
+            ({'method': method, 'calls': calls, 'total_ms': round(seconds * 1000, 2)}
+             for method, (calls, seconds) in self.adapters.calls.items()),
+            key=lambda d: -d['total_ms'],
+        )
+
+        return {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round(self.duration * 1000, 2),
+            'sampling': {'interval_ms': round(ms, 3), 'samples': self.samples, 'idle_samples': self.idle,
+                         'threads': len(self.threads)},
+            'hotspots': hotspots,
+            'cumulative': cumulative,
+            'sql': {
+                'count': self.queries.count,
+                'total_ms': round(self.queries.seconds * 1000, 2),
+                'statements': [
+                    {'sql': sql, 'params': params, 'many': many, 'ms': round(seconds * 1000, 3)}
+                    for sql, params, many, seconds in statements[:MAX_STATEMENTS]
+                ],
+                'duplicates': duplicates,
+            },
+            'adapters': adapters,
+        }
+
+
+def is_staff(request) -> bool:
+    """Staff by session (admin login) or by JWT bearer token."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return False
+    return bool(authenticated and authenticated[0].is_staff)
+
+
+def requested_mode(request):
+    """'store', 'inline' or None from the profiling flag (not checking staff)."""
+    value = request.META.get(HEADER)
+    if value is None:
+        if QUERY_FLAG not in request.META.get('QUERY_STRING', ''):
+            return None
+        value = request.GET.get(QUERY_FLAG)
+        if value is None:
+            return None
+    return 'inline' if value == 'inline' else 'store'
+
+
+def finish(profile, mode: str, request, response):
+    report = profile.report(request, response)
+    logger.info(
+        f"Profiled {report['method']} {report['path']}: {report['duration_ms']}ms, "
+        f"{report['sql']['count']} queries, {len(report['sql']['duplicates'])} duplicated"
+    )
+    if mode == 'inline':
+        return HttpResponse(json.dumps(report, indent=2), content_type='application/json')
+    profile_id = uuid.uuid4().hex
+    cache.set(profile_key(profile_id), report, PROFILE_TTL)
+    response['X-Profile-Id'] = profile_id
+    return response
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = requested_mode(request)
+        if mode is None or not is_staff(request):
+            return self.get_response(request)
+        profile = Profile()
+        profile.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+        return finish(profile, mode, request, response)
+
+    async def __acall__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not await sync_to_async(is_staff)(request):
+            return await self.get_response(request)
+        profile = Profile()
+        profile.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.stop()
+        return await sync_to_async(finish)(profile, mode, request, response)
+
+
+def profile_report(request, profile_id):
+    """GET /api/profiles/<id>/: a stored profiling report (staff only)."""
+    if not is_staff(request):
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    report = cache.get(profile_key(profile_id))
+    if report is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    return JsonResponse(report)
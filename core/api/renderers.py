@@ -0,0 +1,48 @@
+import json
+import struct
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON renderer selected with ?format=columnar.
+    History views answer it with {'t': [epoch seconds...], 'v': [prices...]}.
+    """
+    format = 'columnar'
+
+
+class PackedHistoryRenderer(BaseRenderer):
+    """
+    Compact binary history, selected with ?format=bin or
+    Accept: application/vnd.ledgersync.history.
+
+    Layout (little-endian):
+        4 bytes   magic b'LSH1'
+        uint32    n, number of points
+        int64[n]  epoch seconds (UTC)
+        float64[n] prices
+    Non-history payloads (errors) are rendered as JSON, and a DRF response
+    carrying one is relabelled application/json.
+    """
+    media_type = 'application/vnd.ledgersync.history'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+
+    MAGIC = b'LSH1'
+
+    @staticmethod
+    def is_history(data) -> bool:
+        return isinstance(data, dict) and set(data) == {'t', 'v'}
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not self.is_history(data):
+            response = (renderer_context or {}).get('response')
+            if response is not None:
+                response['Content-Type'] = 'application/json'
+            return json.dumps(data, default=str).encode('utf-8')
+
+        times = np.asarray(data['t'], dtype='<i8')
+        values = np.asarray(data['v'], dtype='<f8')
+        return self.MAGIC + struct.pack('<I', len(times)) + times.tobytes() + values.tobytes()
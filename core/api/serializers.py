@@ -1,8 +1,6 @@
-from datetime import timedelta, datetime
-from django.utils import timezone
+from datetime import datetime
 from rest_framework import serializers
 from assets.models import Asset, PricePoint, Watchlist
-from decimal import Decimal
 
 class PricePointSerializer(serializers.ModelSerializer):
     class Meta:
@@ -17,29 +15,15 @@ class AssetSerializer(serializers.ModelSerializer):
         model = Asset
         fields = ['id', 'symbol', 'name', 'asset_type', 'api_identifier', 'latest_price', 'change_24h']
 
+    # Both fields read the AssetQuote snapshot; querysets should
+    # select_related('quote') so listing assets costs no extra queries.
     def get_latest_price(self, obj):
-        latest_point = obj.price_points.first()
-        return str(latest_point.price) if latest_point else None
+        quote = getattr(obj, 'quote', None)
+        return str(quote.latest_price) if quote else None
 
     def get_change_24h(self, obj):
-        latest_point = obj.price_points.first()
-        if not latest_point:
-            return 0.0
-            
-        yesterday = timezone.now() - timedelta(hours=24)
-        past_point = obj.price_points.filter(timestamp__lte=yesterday).first()
-        
-        if not past_point:
-            return 0.0
-            
-        current_price = latest_point.price
-        past_price = past_point.price
-        
-        if past_price == 0:
-            return 0.0
-            
-        change = ((current_price - past_price) / past_price) * 100
-        return round(float(change), 2)
+        quote = getattr(obj, 'quote', None)
+        return quote.change_24h if quote else 0.0
 
 class WatchlistSerializer(serializers.ModelSerializer):
     asset_details = AssetSerializer(source='asset', read_only=True)
@@ -49,6 +33,20 @@ class WatchlistSerializer(serializers.ModelSerializer):
         fields = ['id', 'asset', 'asset_details', 'added_at']
         read_only_fields = ['added_at']
 
+class WatchlistBulkSerializer(serializers.Serializer):
+    """Asset ids to add to and remove from the watchlist in one request."""
+    add = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=500)
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=500)
+
+    def validate(self, data):
+        if set(data['add']) & set(data['remove']):
+            raise serializers.ValidationError('An asset cannot be both added and removed.')
+        # One query for every id, rather than a PrimaryKeyRelatedField lookup each
+        unknown = set(data['add']) - set(Asset.objects.filter(pk__in=data['add']).values_list('pk', flat=True))
+        if unknown:
+            raise serializers.ValidationError({'add': [f'Unknown asset ids: {sorted(unknown)}']})
+        return data
+
 class NewsSerializer(serializers.Serializer):
     title = serializers.CharField(source='headline')
     source = serializers.CharField()
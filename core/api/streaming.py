@@ -0,0 +1,200 @@
+"""
+Server-Sent Events stream of quote updates.
+
+Clients open GET /api/stream/prices/?symbols=BTC-USD,AAPL and receive a
+snapshot followed by 'quotes' events carrying only the symbols whose quote
+changed. EventSource cannot send an Authorization header, and a JWT in the
+query string would end up in access and proxy logs, so a watchlist stream
+first POSTs to /api/stream/tickets/ (with the usual JWT header) for a
+ticket and opens ?watchlist=1&ticket=<ticket>. A ticket names its user in
+the shared cache, opens one stream and expires after STREAM_TICKET_SECONDS,
+so a logged URL is worthless by the time anyone reads it. The ingestion
+task publishes to a Redis pub/sub channel once per tick; each process (event
+loop) holds a single subscription to it, opened with the first stream and
+closed with the last, and fans every message out to the streams' queues.
+
+This is an async view: it must be served through core.asgi (see start.sh);
+under WSGI a worker would be held for the whole connection.
+"""
+import asyncio
+import json
+import logging
+import secrets
+import weakref
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from assets.models import AssetQuote, Watchlist
+from assets.realtime import QUOTES_CHANNEL, quote_payload
+
+logger = logging.getLogger(__name__)
+
+MAX_SYMBOLS = 200
+KEEPALIVE_SECONDS = 15
+# Ticks buffered per stream; a client this far behind loses the oldest
+QUEUE_SIZE = 32
+RECONNECT_SECONDS = 5
+# Lifetime of an unused stream ticket
+STREAM_TICKET_SECONDS = 30
+
+
+class QuoteFanout:
+    """One Redis subscription to QUOTES_CHANNEL shared by every stream on an event loop."""
+
+    def __init__(self):
+        self.queues = set()
+        self.listener = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.queues.add(queue)
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.queues.discard(queue)
+        if not self.queues and self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+
+    def publish(self, quotes: list):
+        for queue in self.queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(quotes)
+
+    async def _listen(self):
+        while True:
+            client = aioredis.Redis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(QUOTES_CHANNEL)
+                async for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+                    try:
+                        quotes = json.loads(message['data']).get('quotes', [])
+                    except ValueError:
+                        logger.warning("Ignoring malformed quotes message")
+                        continue
+                    self.publish(quotes)
+            except aioredis.RedisError as e:
+                logger.warning(f"Quote subscription failed, reconnecting: {e}")
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+
+_fanouts = weakref.WeakKeyDictionary()
+
+
+def get_fanout() -> QuoteFanout:
+    loop = asyncio.get_running_loop()
+    fanout = _fanouts.get(loop)
+    if fanout is None:
+        fanout = _fanouts[loop] = QuoteFanout()
+    return fanout
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def ticket_key(ticket: str) -> str:
+    return f'stream-ticket:{ticket}'
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ticket(request):
+    """A single-use ticket that opens the user's watchlist stream (?watchlist=1&ticket=)."""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(ticket_key(ticket), request.user.pk, STREAM_TICKET_SECONDS)
+    return Response({'ticket': ticket, 'expires_in': STREAM_TICKET_SECONDS}, status=201)
+
+
+async def redeem_ticket(ticket: str):
+    """The ticket's user id, or None when it is unknown, expired or already used."""
+    if not ticket:
+        return None
+    key = ticket_key(ticket)
+    user_id = await cache.aget(key)
+    # Only one caller's delete finds the key, so a ticket opens one stream
+    if user_id is None or not await cache.adelete(key):
+        return None
+    return user_id
+
+
+@sync_to_async
+def watchlist_symbols(user_id):
+    return set(Watchlist.objects.filter(user_id=user_id).values_list('asset__symbol', flat=True))
+
+
+@sync_to_async
+def current_quotes(symbols):
+    quotes = AssetQuote.objects.filter(asset__symbol__in=symbols).select_related('asset')
+    return [quote_payload(q) for q in quotes]
+
+
+async def quote_events(symbols):
+    sent = {}
+
+    def changed(quotes):
+        # Deltas only: drop symbols the client did not ask for or that did not move
+        delta = []
+        for quote in quotes:
+            symbol = quote['symbol']
+            if symbol in symbols and sent.get(symbol) != (quote['price'], quote['change_24h']):
+                sent[symbol] = (quote['price'], quote['change_24h'])
+                delta.append(quote)
+        return delta
+
+    fanout = get_fanout()
+    queue = fanout.subscribe()
+    try:
+        yield sse_event('snapshot', changed(await current_quotes(symbols)))
+
+        while True:
+            try:
+                quotes = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+
+            delta = changed(quotes)
+            if delta:
+                yield sse_event('quotes', delta)
+    finally:
+        fanout.unsubscribe(queue)
+
+
+async def price_stream(request):
+    """
+    SSE endpoint for realtime quotes.
+    ?symbols=A,B,C subscribes to those symbols; ?watchlist=1 with ?ticket=<stream ticket>
+    subscribes to the user's watchlist.
+    """
+    symbols = {s.strip() for s in request.GET.get('symbols', '').split(',') if s.strip()}
+
+    if request.GET.get('watchlist'):
+        user_id = await redeem_ticket(request.GET.get('ticket', ''))
+        if user_id is None:
+            return JsonResponse({'error': 'Invalid or expired stream ticket'}, status=401)
+        symbols |= await watchlist_symbols(user_id)
+
+    if not symbols:
+        return JsonResponse({'error': 'Provide ?symbols= or ?watchlist=1&ticket='}, status=400)
+    if len(symbols) > MAX_SYMBOLS:
+        return JsonResponse({'error': f'At most {MAX_SYMBOLS} symbols per stream'}, status=400)
+
+    response = StreamingHttpResponse(quote_events(symbols), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,26 @@
+from celery import shared_task
+from .utils import refresh_market_summary
+from .news import ingest_news
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def update_market_summary():
+    """
+    Task to precompute the market summary snapshot served by the market summary view.
+    """
+    snapshot = refresh_market_summary()
+    logger.info(
+        f"Market summary refreshed: {len(snapshot['tickers'])} tickers, {len(snapshot['gainers'])} gainers"
+    )
+    return snapshot['generated_at']
+
+@shared_task
+def update_news():
+    """
+    Task to fetch all news feeds (in parallel, with conditional GETs) into the news store.
+    """
+    stats = ingest_news()
+    logger.info(f"News ingestion: {stats}")
+    return stats
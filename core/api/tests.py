@@ -1,3 +1,809 @@
-from django.test import TestCase
+"""
+Tests for the API views and their data paths.
 
-# Create your tests here.
+PricePointQueryPlanTests checks the PricePoint access paths. The PricePoint
+table is seeded with PRICEPOINT_EXPLAIN_ROWS rows and every query the API
+views, serializers and price pipeline run against it is captured and
+EXPLAINed. A sequential scan of PricePoint fails the test.
+By default the seed is small (SEED_ROWS), so the suite stays quick in every
+test run. The planners only pick index plans reliably on a table of
+realistic size, so before changing indexes or hot queries run it at
+production scale with PRICEPOINT_EXPLAIN_ROWS=10000000 (about a minute on
+SQLite); --exclude-tag=explain skips it.
+"""
+import asyncio
+import os
+import re
+import struct
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test import Client, TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import news, streaming
+from api.models import NewsFeedState, NewsItem
+from api.profiling import ProfilingMiddleware
+from api.renderers import PackedHistoryRenderer
+from api.utils import BBC_BUSINESS_FEED_URL, fetch_feed, parse_bbc_entries
+from assets.backfill import UPSTREAM, checkpoint_for
+from assets.generation import PRICES, bump_generation
+from assets.models import Asset, AssetQuote, PricePoint, Watchlist
+from assets.quotes import refresh_quotes
+from assets.rollups import rebuild_candles
+from assets.tasks import update_asset_prices
+from benchmarks.seed import analyze, seed_price_points
+
+SEED_ROWS = int(os.environ.get('PRICEPOINT_EXPLAIN_ROWS', 20_000))
+SEED_ASSETS = 200
+TABLE = PricePoint._meta.db_table
+
+
+def explain(sql: str) -> str:
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+
+def scans_price_points(sql: str, plan: str) -> bool:
+    if connection.vendor == 'postgresql':
+        # Partitions are named assets_pricepoint_pYYYYMM
+        return re.search(rf'Seq Scan on {TABLE}\w*', plan) is not None
+    # SQLite reports subquery tables by their alias (U0); a SCAN, with or
+    # without USING INDEX, walks the whole table or index
+    names = {TABLE, *re.findall(rf'"{TABLE}" (\w+)', sql)}
+    return any(re.search(rf'\bSCAN (TABLE )?{name}\b', plan) for name in names)
+
+
+@tag('explain', 'slow')
+class PricePointQueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now().replace(microsecond=0)
+        Asset.objects.bulk_create(
+            Asset(symbol=f'SYM{i}', name=f'Asset {i}', asset_type='STOCK_DSE') for i in range(SEED_ASSETS)
+        )
+        seed_price_points(SEED_ROWS, cls.now)
+        analyze()
+        cls.asset = Asset.objects.order_by('pk').first()
+        cls.user = User.objects.create_user('explain', password='unused')
+        Watchlist.objects.create(user=cls.user, asset=cls.asset)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertNoSeqScan(self, queries, require_price_points=True):
+        """EXPLAIN every captured query that reads PricePoint; fail on a full scan."""
+        checked = 0
+        for query in queries:
+            sql = query['sql']
+            if f'"{TABLE}"' not in sql or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            plan = explain(sql)
+            self.assertFalse(scans_price_points(sql, plan), f'Sequential scan of {TABLE}:\n{sql}\n\n{plan}')
+            checked += 1
+        if require_price_points:
+            self.assertGreater(checked, 0, f'No query read {TABLE}')
+
+    def test_api_views(self):
+        pk = self.asset.pk
+        for url in [
+            '/api/assets/',
+            '/api/assets/?type=stocks',
+            f'/api/assets/{pk}/',
+            f'/api/assets/{pk}/history/?period=1mo',
+            f'/api/prices/{self.asset.symbol}/history/?period=5d',
+            '/api/watchlist/',
+        ]:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                # The views read AssetQuote and candles; any PricePoint read must be indexed
+                self.assertNoSeqScan(ctx.captured_queries, require_price_points=False)
+
+    def test_refresh_quotes_24h_lookup(self):
+        prices = dict.fromkeys(Asset.objects.values_list('pk', flat=True), Decimal('101.5'))
+        with CaptureQueriesContext(connection) as ctx:
+            refresh_quotes(prices, now=self.now)
+        self.assertNoSeqScan(ctx.captured_queries)
+
+    def test_rebuild_candles_window(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rebuild_candles(self.asset, self.now - timedelta(days=1), self.now)
+        self.assertNoSeqScan(ctx.captured_queries)
+
+    def test_backfill_first_point(self):
+        with CaptureQueriesContext(connection) as ctx:
+            checkpoint_for(self.asset, UPSTREAM)
+        self.assertNoSeqScan(ctx.captured_queries)
+
+    def test_latest_points(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(self.asset.price_points.all()[:50])
+            list(PricePoint.objects.filter(asset=self.asset, timestamp__gte=self.now - timedelta(hours=1)))
+        self.assertNoSeqScan(ctx.captured_queries)
+
+
+
+class QueryCountTests(TestCase):
+    """List endpoints read the AssetQuote snapshot: the query count does not grow with the assets."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('counts', password='unused')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_assets(self, count):
+        start = Asset.objects.count()
+        assets = Asset.objects.bulk_create(
+            Asset(symbol=f'Q{i}', name=f'Asset {i}', asset_type='CRYPTO') for i in range(start, start + count)
+        )
+        # Every other asset has a quote; the rest serialize without one
+        refresh_quotes({asset.pk: Decimal('10.5') for asset in assets[::2]})
+        Watchlist.objects.bulk_create(Watchlist(user=self.user, asset=asset) for asset in assets)
+
+    def assertConstantQueries(self, request, n=5):
+        self.add_assets(n)
+        with CaptureQueriesContext(connection) as baseline:
+            self.assertEqual(len(request().json()), n)
+        self.add_assets(9 * n)
+        with self.assertNumQueries(len(baseline)):
+            self.assertEqual(len(request().json()), 10 * n)
+
+    def test_asset_list(self):
+        self.assertConstantQueries(lambda: self.client.get('/api/assets/'))
+
+    def test_watchlist(self):
+        self.assertConstantQueries(lambda: self.client.get('/api/watchlist/'))
+
+    def test_refresh_quotes(self):
+        def refresh():
+            with CaptureQueriesContext(connection) as ctx:
+                refresh_quotes(dict.fromkeys(Asset.objects.values_list('pk', flat=True), Decimal('11')))
+            return len(ctx)
+
+        self.add_assets(5)
+        queries = refresh()
+        self.add_assets(45)
+        self.assertEqual(refresh(), queries)
+
+
+class ConditionalTests(TestCase):
+    """The generation-keyed 304 path."""
+    url = '/api/assets/'
+
+    @classmethod
+    def setUpTestData(cls):
+        Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_unchanged_prices_answer_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=15', response['Cache-Control'])
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+
+    def test_if_modified_since(self):
+        start = int(time.time()) + 0.2
+        with mock.patch('time.time', return_value=start):
+            response = self.client.get(self.url)
+            # Changed this very second: advertised as the second before, so it cannot revalidate yet
+            self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200)
+        with mock.patch('time.time', return_value=start + 2):
+            last_modified = self.client.get(self.url)['Last-Modified']
+            self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_change_in_the_same_second_is_not_modified_since(self):
+        start = int(time.time()) + 0.1
+        with mock.patch('time.time', return_value=start):
+            last_modified = self.client.get(self.url)['Last-Modified']
+        with mock.patch('time.time', return_value=start + 0.5):
+            bump_generation(PRICES)
+        with mock.patch('time.time', return_value=start + 3):
+            response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_asset_changes_retire_the_etag(self):
+        def rename():
+            asset = Asset.objects.get(symbol='ETH')
+            asset.name = 'Ether'
+            asset.save()
+
+        for change in (
+            lambda: Asset.objects.create(symbol='ETH', name='Ethereum', asset_type='CRYPTO'),
+            rename,
+            lambda: Asset.objects.filter(symbol='ETH').delete(),
+        ):
+            etag = self.client.get(self.url)['ETag']
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+    def test_etag_varies_with_the_query(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(f'{self.url}?type=crypto', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_generation_sends_the_full_response(self):
+        etag = self.client.get(self.url)['ETag']
+        bump_generation(PRICES)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_flushed_cache_never_revalidates_an_old_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        bump_generation(PRICES)
+        cache.clear()
+        # The restarted counter is seeded from a later clock
+        with mock.patch('assets.generation.time.time', return_value=time.time() + 1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+def unpack_history(body: bytes):
+    """Decode the PackedHistoryRenderer layout: b'LSH1', uint32 n, int64[n] times, float64[n] prices."""
+    magic, n = struct.unpack_from('<4sI', body)
+    times = np.frombuffer(body, dtype='<i8', count=n, offset=8)
+    values = np.frombuffer(body, dtype='<f8', count=n, offset=8 + 8 * n)
+    return magic, times, values
+
+
+class HistoryFormatTests(TestCase):
+    """History format negotiation and the packed binary layout."""
+    url = '/api/prices/BTC/history/'
+    history = {'t': [1700000000, 1700000060, 1700003600], 'v': [37000.5, 37010.25, -0.125]}
+
+    @classmethod
+    def setUpTestData(cls):
+        Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('assets.cache.aget_history', new_callable=mock.AsyncMock)
+        self.aget_history = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.aget_history.return_value = (self.history, False)
+
+    def requested_format(self):
+        return self.aget_history.call_args.args[2]
+
+    def assertPacked(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], PackedHistoryRenderer.media_type)
+        magic, times, values = unpack_history(response.content)
+        self.assertEqual(magic, b'LSH1')
+        self.assertEqual(len(response.content), 8 + 16 * len(times))
+        self.assertEqual(times.tolist(), self.history['t'])
+        self.assertEqual(values.tolist(), self.history['v'])
+
+    def test_format_bin(self):
+        self.assertPacked(self.client.get(self.url, {'format': 'bin'}))
+        self.assertEqual(self.requested_format(), 'columnar')
+
+    def test_accept_header(self):
+        self.assertPacked(self.client.get(self.url, HTTP_ACCEPT=f'{PackedHistoryRenderer.media_type}, */*;q=0.1'))
+
+    def test_format_columnar(self):
+        response = self.client.get(self.url, {'format': 'columnar'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), self.history)
+        self.assertEqual(self.requested_format(), 'columnar')
+
+    def test_default_is_json_points(self):
+        points = [{'timestamp': '2023-11-14T22:13:20+00:00', 'price': 37000.5}]
+        self.aget_history.return_value = (points, False)
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), points)
+        self.assertEqual(self.requested_format(), 'points')
+
+    def test_empty_history(self):
+        self.aget_history.return_value = ({'t': [], 'v': []}, False)
+        body = self.client.get(self.url, {'format': 'bin'}).content
+        self.assertEqual(body, b'LSH1' + struct.pack('<I', 0))
+
+    def test_errors_are_json(self):
+        self.aget_history.side_effect = RuntimeError('provider down')
+        response = self.client.get(self.url, {'format': 'bin'})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), {'error': 'provider down'})
+
+    def test_renderer_falls_back_to_json_for_other_payloads(self):
+        body = PackedHistoryRenderer().render({'detail': 'Not found.'})
+        self.assertEqual(body, b'{"detail": "Not found."}')
+
+
+class WatchlistBulkTests(TestCase):
+    """The watchlist bulk add/remove endpoint."""
+    url = '/api/watchlist/bulk/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bulk', password='unused')
+        cls.btc, cls.eth, cls.aapl = Asset.objects.bulk_create(
+            Asset(symbol=symbol, name=symbol, asset_type='CRYPTO') for symbol in ('BTC', 'ETH', 'AAPL')
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Watchlist.objects.create(user=self.user, asset=self.btc)
+
+    def watched(self):
+        return set(Watchlist.objects.filter(user=self.user).values_list('asset_id', flat=True))
+
+    def test_add_and_remove(self):
+        response = self.client.post(self.url, {'add': [self.eth.pk, self.aapl.pk], 'remove': [self.btc.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'added': sorted([self.eth.pk, self.aapl.pk]), 'removed': [self.btc.pk]})
+        self.assertEqual(self.watched(), {self.eth.pk, self.aapl.pk})
+
+    def test_already_watched_and_unwatched_are_no_ops(self):
+        response = self.client.post(self.url, {'add': [self.btc.pk], 'remove': [self.eth.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'added': [], 'removed': []})
+        self.assertEqual(self.watched(), {self.btc.pk})
+
+    def test_unknown_add_ids_reject_the_whole_request(self):
+        missing = self.aapl.pk + 1000
+        response = self.client.post(self.url, {'add': [self.eth.pk, missing], 'remove': [self.btc.pk]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(missing), str(response.data['add']))
+        self.assertEqual(self.watched(), {self.btc.pk})
+
+    def test_unknown_remove_ids_are_ignored(self):
+        response = self.client.post(self.url, {'remove': [self.aapl.pk + 1000]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'added': [], 'removed': []})
+
+    def test_invalid_payloads(self):
+        for payload in (
+            {'add': [self.eth.pk], 'remove': [self.eth.pk]},
+            {'add': ['not-an-id']},
+            {'remove': self.eth.pk},
+        ):
+            with self.subTest(payload=payload):
+                response = self.client.post(self.url, payload, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.watched(), {self.btc.pk})
+
+    def test_requires_authentication(self):
+        response = APIClient().post(self.url, {'add': [self.eth.pk]}, format='json')
+        self.assertIn(response.status_code, (401, 403))
+
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Business</title>
+<item><title>Rates held steady</title><link>https://example.com/rates</link>
+<pubDate>Mon, 19 Oct 2026 10:00:00 GMT</pubDate></item>
+<item><title>Oil climbs</title><link>https://example.com/oil</link>
+<pubDate>Mon, 19 Oct 2026 09:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+
+class NewsIngestionTests(TestCase):
+    """News deduplication and conditional feed fetches."""
+
+    def item(self, title, link):
+        return {'headline': title, 'link': link, 'source': 'Test', 'origin': 'Test', 'timestamp': 1_800_000_000}
+
+    def respond(self, status, content=b'', headers=None):
+        response = mock.Mock(status_code=status, content=content, headers=headers or {}, url=BBC_BUSINESS_FEED_URL)
+        session = mock.Mock()
+        session.get.return_value = response
+        patcher = mock.patch('api.utils.get_session', return_value=session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return session
+
+    def test_store_items_dedupes_by_url_and_title(self):
+        self.assertEqual(news.store_items('headlines', [self.item('Rates held steady', 'https://example.com/rates')]), 1)
+        inserted = news.store_items('headlines', [
+            self.item('Something else', 'https://example.com/rates'),    # stored URL
+            self.item('Rates held, steady!', 'https://example.com/copy'),  # stored title, normalized
+            self.item('Oil climbs', 'https://example.com/oil'),
+            self.item('Oil climbs', 'https://example.com/oil-again'),      # same title in the batch
+            self.item('Oil falls', 'https://example.com/oil'),             # same URL in the batch
+            self.item('No link', '#'),
+        ])
+        self.assertEqual(inserted, 1)
+        self.assertEqual(
+            sorted(NewsItem.objects.filter(feed='headlines').values_list('headline', flat=True)),
+            ['Oil climbs', 'Rates held steady'],
+        )
+        # Deduplication is per feed
+        self.assertEqual(news.store_items('us', [self.item('Oil climbs', 'https://example.com/oil')]), 1)
+
+    def test_fetch_feed_uses_the_pooled_session_with_a_timeout(self):
+        session = self.respond(200, RSS, {'ETag': '"v2"', 'Last-Modified': 'Mon, 19 Oct 2026 10:00:00 GMT'})
+        feed = fetch_feed(BBC_BUSINESS_FEED_URL, etag='"v1"')
+        _, kwargs = session.get.call_args
+        self.assertEqual(kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(kwargs['timeout'], (3.05, 10))
+        self.assertEqual([e.title for e in feed.entries], ['Rates held steady', 'Oil climbs'])
+        self.assertEqual((feed.status, feed.etag), (200, '"v2"'))
+
+    def ingest(self):
+        with mock.patch.object(news, 'news_sources', return_value=[('headlines', BBC_BUSINESS_FEED_URL, parse_bbc_entries)]):
+            return news.ingest_news()
+
+    def test_not_modified_keeps_the_stored_validators(self):
+        NewsFeedState.objects.create(url=BBC_BUSINESS_FEED_URL, etag='"v1"', last_modified='Sun, 18 Oct 2026 10:00:00 GMT')
+        session = self.respond(304)
+        self.assertEqual(self.ingest(), {'fetched': 0, 'not_modified': 1, 'failed': 0, 'inserted': 0})
+
+        _, kwargs = session.get.call_args
+        self.assertEqual(kwargs['headers'], {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Sun, 18 Oct 2026 10:00:00 GMT',
+        })
+        state = NewsFeedState.objects.get(url=BBC_BUSINESS_FEED_URL)
+        self.assertEqual((state.etag, state.last_modified), ('"v1"', 'Sun, 18 Oct 2026 10:00:00 GMT'))
+        self.assertIsNotNone(state.checked_at)
+
+    def test_changed_feed_stores_items_and_new_validators(self):
+        NewsFeedState.objects.create(url=BBC_BUSINESS_FEED_URL, etag='"v1"')
+        self.respond(200, RSS, {'ETag': '"v2"'})
+        self.assertEqual(self.ingest(), {'fetched': 1, 'not_modified': 0, 'failed': 0, 'inserted': 2})
+        self.assertEqual(NewsFeedState.objects.get(url=BBC_BUSINESS_FEED_URL).etag, '"v2"')
+
+    def test_failed_fetch_is_counted(self):
+        session = self.respond(200)
+        session.get.side_effect = requests.Timeout('read timed out')
+        self.assertEqual(self.ingest(), {'fetched': 0, 'not_modified': 0, 'failed': 1, 'inserted': 0})
+
+
+async def no_events():
+    return
+    yield
+
+
+class PriceStreamTests(TestCase):
+    """Stream tickets and the argument checks of the quote stream."""
+    url = '/api/stream/prices/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('streamer', password='unused')
+        btc = Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+        Watchlist.objects.create(user=cls.user, asset=btc)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch('api.streaming.quote_events', side_effect=lambda symbols: no_events())
+        self.quote_events = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/stream/tickets/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['expires_in'], streaming.STREAM_TICKET_SECONDS)
+        return response.data['ticket']
+
+    def test_symbols(self):
+        response = self.client.get(self.url, {'symbols': 'BTC, ETH,,'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.quote_events.assert_called_once_with({'BTC', 'ETH'})
+
+    def test_missing_symbols(self):
+        for params in ({}, {'symbols': ' , '}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('?symbols=', response.json()['error'])
+        self.quote_events.assert_not_called()
+
+    def test_too_many_symbols(self):
+        symbols = ','.join(f'S{i}' for i in range(streaming.MAX_SYMBOLS + 1))
+        response = self.client.get(self.url, {'symbols': symbols})
+        self.assertEqual(response.status_code, 400)
+        self.quote_events.assert_not_called()
+
+    def test_tickets_require_authentication(self):
+        self.assertEqual(self.client.post('/api/stream/tickets/').status_code, 401)
+
+    def test_watchlist_ticket_opens_one_stream(self):
+        ticket = self.ticket()
+        response = self.client.get(self.url, {'watchlist': 1, 'ticket': ticket, 'symbols': 'ETH'})
+        self.assertEqual(response.status_code, 200)
+        self.quote_events.assert_called_once_with({'BTC', 'ETH'})
+        # Single use
+        response = self.client.get(self.url, {'watchlist': 1, 'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    def test_expired_or_unknown_tickets(self):
+        ticket = self.ticket()
+        cache.delete(streaming.ticket_key(ticket))
+        for params in ({'ticket': ticket}, {'ticket': 'guess'}, {}):
+            response = self.client.get(self.url, {'watchlist': 1, **params})
+            self.assertEqual(response.status_code, 401)
+
+    def test_jwt_in_the_query_string_is_not_accepted(self):
+        response = self.client.get(self.url, {'watchlist': 1, 'token': 'eyJ.payload.signature'})
+        self.assertEqual(response.status_code, 401)
+
+
+async def idle(fanout):
+    await asyncio.Event().wait()
+
+
+class QuoteFanoutTests(TestCase):
+    """Delivery from the quotes channel to each stream's queue, and the per-stream deltas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        btc = Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+        cls.updated_at = timezone.now()
+        AssetQuote.objects.create(asset=btc, latest_price=Decimal('100'), change_24h=1.0, updated_at=cls.updated_at)
+
+    def quote(self, symbol, price, change=1.0, updated_at='2024-01-01T00:00:00+00:00'):
+        return {'symbol': symbol, 'price': price, 'change_24h': change, 'updated_at': updated_at}
+
+    async def test_publish_reaches_every_queue(self):
+        fanout = streaming.QuoteFanout()
+        with mock.patch.object(streaming.QuoteFanout, '_listen', idle):
+            first, second = fanout.subscribe(), fanout.subscribe()
+            listener = fanout.listener
+            fanout.publish([self.quote('BTC', '1')])
+            self.assertEqual(first.get_nowait(), second.get_nowait())
+
+            # A client that falls behind loses its oldest ticks
+            for price in range(streaming.QUEUE_SIZE + 3):
+                fanout.publish([self.quote('BTC', str(price))])
+            self.assertEqual(first.qsize(), streaming.QUEUE_SIZE)
+            self.assertEqual(first.get_nowait(), [self.quote('BTC', '3')])
+
+            fanout.unsubscribe(first)
+            self.assertIs(fanout.listener, listener)
+            fanout.unsubscribe(second)
+            self.assertIsNone(fanout.listener)
+            await asyncio.sleep(0)
+            self.assertTrue(listener.cancelled())
+
+    async def test_listener_forwards_channel_messages(self):
+        messages = [
+            {'type': 'subscribe', 'data': 1},
+            {'type': 'message', 'data': b'not json'},
+            {'type': 'message', 'data': b'{"quotes": [{"symbol": "BTC", "price": "2"}]}'},
+        ]
+
+        class PubSub:
+            subscribe = mock.AsyncMock()
+            aclose = mock.AsyncMock()
+
+            async def listen(self):
+                for message in messages:
+                    yield message
+                await asyncio.Event().wait()
+
+        client = mock.Mock(aclose=mock.AsyncMock())
+        client.pubsub.return_value = PubSub()
+        fanout = streaming.QuoteFanout()
+        with mock.patch('api.streaming.aioredis.Redis.from_url', return_value=client), \
+                self.assertLogs('api.streaming', 'WARNING'):
+            queue = fanout.subscribe()
+            quotes = await asyncio.wait_for(queue.get(), 1)
+            fanout.unsubscribe(queue)
+            await asyncio.sleep(0)
+        self.assertEqual(quotes, [{'symbol': 'BTC', 'price': '2'}])
+        PubSub.subscribe.assert_awaited_once_with(streaming.QUOTES_CHANNEL)
+        # Cancelling the listener closes the subscription
+        PubSub.aclose.assert_awaited_once()
+        client.aclose.assert_awaited_once()
+
+    async def test_stream_sends_only_changed_requested_symbols(self):
+        with mock.patch.object(streaming.QuoteFanout, '_listen', idle):
+            events = streaming.quote_events({'BTC', 'ETH'})
+            self.assertEqual(await anext(events), streaming.sse_event('snapshot', [
+                self.quote('BTC', '100.0000', updated_at=self.updated_at.isoformat()),
+            ]))
+            fanout = streaming.get_fanout()
+            fanout.publish([self.quote('BTC', '100.0000'), self.quote('AAPL', '5')])
+            fanout.publish([self.quote('BTC', '101'), self.quote('ETH', '7')])
+            self.assertEqual(await anext(events), streaming.sse_event('quotes', [
+                self.quote('BTC', '101'), self.quote('ETH', '7'),
+            ]))
+            with mock.patch.object(streaming, 'KEEPALIVE_SECONDS', 0.01):
+                self.assertEqual(await anext(events), ': keepalive\n\n')
+            await events.aclose()
+            self.assertFalse(fanout.queues)
+
+
+class FixedPricesAdapter:
+    def __init__(self, prices=None, error=None):
+        self.prices = prices or {}
+        self.error = error
+
+    def get_prices(self, assets):
+        if self.error:
+            raise self.error
+        return self.prices
+
+
+class MetricsTests(TestCase):
+    """The /metrics access gate and what an ingestion tick exports."""
+    url = '/metrics'
+
+    def setUp(self):
+        cache.clear()
+        for name in ('assets.ingestion._buckets', 'assets.breaker._breakers'):
+            patcher = mock.patch.dict(name, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    def scrape(self) -> dict:
+        """{(sample name, sorted labels): value} from an allowed scrape."""
+        with self.settings(METRICS_TOKEN='', METRICS_ALLOWED_IPS=['127.0.0.1']):
+            response = self.client.get(self.url, REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        return {
+            (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.content.decode())
+            for sample in family.samples
+        }
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token_gate(self):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}, {'HTTP_AUTHORIZATION': 's3cre'}):
+            self.assertEqual(self.client.get(self.url, REMOTE_ADDR='127.0.0.1', **headers).status_code, 403)
+        response = self.client.get(self.url, REMOTE_ADDR='10.1.2.3', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'ledgersync_ingestion_last_tick_timestamp_seconds', response.content)
+
+    @override_settings(METRICS_TOKEN='', METRICS_ALLOWED_IPS=['10.0.0.9'])
+    def test_ip_gate(self):
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='10.0.0.9').status_code, 200)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='127.0.0.1').status_code, 403)
+        # A token header does not stand in for the allowlist
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.10', HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 403)
+
+    def test_ingestion_tick_is_exported(self):
+        Asset.objects.bulk_create([
+            Asset(symbol='BTC', name='Bitcoin', asset_type='CRYPTO'),
+            Asset(symbol='ETH', name='Ethereum', asset_type='CRYPTO'),
+            Asset(symbol='AAPL', name='Apple', asset_type='STOCK_GLOBAL'),
+        ])
+        adapters = {
+            'CRYPTO': FixedPricesAdapter({'BTC': Decimal('50000'), 'ETH': Decimal('3000')}),
+            'STOCK_GLOBAL': FixedPricesAdapter(error=ConnectionError('upstream down')),
+        }
+
+        before = self.scrape()
+        started = time.time()
+        with mock.patch('assets.ingestion.get_adapter', side_effect=adapters.__getitem__), \
+                mock.patch('assets.tasks.publish_quotes'), \
+                mock.patch('assets.tasks.rollup_candles.delay'), \
+                self.captureOnCommitCallbacks(execute=True), \
+                self.assertLogs('assets', 'WARNING'):
+            update_asset_prices(all_markets=True)
+        after = self.scrape()
+
+        def increase(name, **labels):
+            key = (name, tuple(sorted(labels.items())))
+            return after.get(key, 0) - before.get(key, 0)
+
+        self.assertEqual(increase('ledgersync_ingestion_assets_total', provider='CRYPTO', result='fetched'), 2)
+        self.assertEqual(increase('ledgersync_ingestion_assets_total', provider='STOCK_GLOBAL', result='failed'), 1)
+        self.assertEqual(increase('ledgersync_ingestion_points_written_total'), 2)
+        self.assertEqual(increase('ledgersync_ingestion_tick_seconds_count'), 1)
+        self.assertEqual(increase('ledgersync_ingestion_provider_seconds_count', provider='STOCK_GLOBAL'), 1)
+        self.assertEqual(
+            increase('ledgersync_upstream_errors_total', provider='STOCK_GLOBAL', method='get_prices'), 1,
+        )
+        self.assertGreaterEqual(after[('ledgersync_ingestion_last_tick_timestamp_seconds', ())], int(started))
+
+        # Price lag, read from the quotes at scrape time
+        self.assertEqual(after[('ledgersync_assets', (('asset_type', 'CRYPTO'),))], 2)
+        self.assertEqual(after[('ledgersync_assets', (('asset_type', 'STOCK_GLOBAL'),))], 1)
+        self.assertEqual(after[('ledgersync_price_lag_assets', (('asset_type', 'CRYPTO'), ('le', '60')))], 2)
+        self.assertEqual(after[('ledgersync_price_lag_assets', (('asset_type', 'STOCK_GLOBAL'), ('le', '86400')))], 0)
+        self.assertLess(after[('ledgersync_price_lag_max_seconds', (('asset_type', 'CRYPTO'),))], 60)
+        # Never priced: no age to report
+        self.assertNotIn(('ledgersync_price_lag_max_seconds', (('asset_type', 'STOCK_GLOBAL'),)), after)
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingTests(TestCase):
+    """The staff-only request profiler."""
+    url = '/api/assets/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='unused', is_staff=True)
+        cls.member = User.objects.create_user('member', password='unused')
+        Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+
+    def setUp(self):
+        cache.clear()
+        # A new client loads the middleware with PROFILING_ENABLED in effect
+        self.client = Client()
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_disabled_middleware_is_not_used(self):
+        with self.settings(PROFILING_ENABLED=False), self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+
+    def test_only_staff_are_profiled(self):
+        for headers in ({}, self.auth(self.member)):
+            response = self.client.get(self.url, HTTP_X_PROFILE='inline', **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Profile-Id', response)
+            self.assertEqual(response.json()[0]['symbol'], 'BTC')
+
+    def test_inline_report(self):
+        with self.assertLogs('api.profiling', 'INFO'):
+            response = self.client.get(self.url, {'_profile': 'inline'}, **self.auth(self.staff))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        report = response.json()
+        self.assertEqual((report['method'], report['path'], report['status']), ('GET', '/api/assets/?_profile=inline', 200))
+        self.assertGreaterEqual(report['sampling']['threads'], 1)
+        self.assertGreater(report['sql']['count'], 0)
+        self.assertEqual(len(report['sql']['statements']), report['sql']['count'])
+        self.assertTrue(any('assets_asset' in s['sql'] for s in report['sql']['statements']))
+        for key in ('hotspots', 'cumulative', 'adapters', 'duration_ms'):
+            self.assertIn(key, report)
+
+    def test_stored_report(self):
+        with self.assertLogs('api.profiling', 'INFO'):
+            response = self.client.get(self.url, HTTP_X_PROFILE='1', **self.auth(self.staff))
+        # The response itself is untouched
+        self.assertEqual(response.json()[0]['symbol'], 'BTC')
+        report_url = f"/api/profiles/{response['X-Profile-Id']}/"
+
+        report = self.client.get(report_url, **self.auth(self.staff))
+        self.assertEqual(report.status_code, 200)
+        self.assertEqual(report.json()['path'], self.url)
+        self.assertEqual(self.client.get(report_url, **self.auth(self.member)).status_code, 404)
+        self.assertEqual(self.client.get('/api/profiles/unknown/', **self.auth(self.staff)).status_code, 404)
+
+    def test_async_view(self):
+        Asset.objects.create(symbol='ETH', name='Ethereum', asset_type='CRYPTO')
+        history = ({'t': [1700000000], 'v': [1.0]}, False)
+        with mock.patch('assets.cache.aget_history', new_callable=mock.AsyncMock, return_value=history), \
+                self.assertLogs('api.profiling', 'INFO'):
+            response = self.client.get('/api/prices/ETH/history/', {'_profile': 'inline'}, **self.auth(self.staff))
+        report = response.json()
+        self.assertEqual(report['status'], 200)
+        self.assertGreater(report['sql']['count'], 0)
@@ -2,21 +2,26 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     AssetViewSet, 
-    NewsView, 
-    NewsHeadlinesView, 
-    MarketSummaryView,
-    PriceHistoryView,
     WatchlistViewSet
 )
+from . import async_views
+from .profiling import profile_report
+from .streaming import price_stream, stream_ticket
 
 router = DefaultRouter()
 router.register(r'assets', AssetViewSet, basename='asset')
 router.register(r'watchlist', WatchlistViewSet, basename='watchlist')
 
 urlpatterns = [
+    # Async views, ahead of the router so they take the asset detail routes
+    path('assets/<int:pk>/details/', async_views.asset_details, name='asset-details'),
+    path('assets/<int:pk>/history/', async_views.asset_history, name='asset-history'),
     path('', include(router.urls)),
-    path('news/', NewsView.as_view(), name='news'),
-    path('news/top-headlines/', NewsHeadlinesView.as_view(), name='news-top-headlines'),
-    path('market/summary/', MarketSummaryView.as_view(), name='market-summary'),
-    path('prices/<str:symbol>/history/', PriceHistoryView.as_view(), name='price-history'),
+    path('news/', async_views.news, name='news'),
+    path('news/top-headlines/', async_views.top_headlines, name='news-top-headlines'),
+    path('market/summary/', async_views.market_summary, name='market-summary'),
+    path('prices/<str:symbol>/history/', async_views.price_history, name='price-history'),
+    path('stream/prices/', price_stream, name='price-stream'),
+    path('stream/tickets/', stream_ticket, name='stream-ticket'),
+    path('profiles/<str:profile_id>/', profile_report, name='profile-report'),
 ]
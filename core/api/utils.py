@@ -1,6 +1,12 @@
 import yfinance as yf
 import feedparser
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from django.core.cache import cache
+from django.utils import timezone
+from assets.generation import MARKET_SUMMARY, bump_generation
+from assets.http import get_session, get_timeout
+import threading
 import time
 
 import re
@@ -45,66 +51,112 @@ def fetch_yahoo_news():
         print(f"Error fetching Yahoo news: {e}")
         return []
 
+BBC_BUSINESS_FEED_URL = "http://feeds.bbci.co.uk/news/business/rss.xml"
+
+# HTTP_PROVIDERS key for the pooled session (and timeouts) used by feed fetches
+NEWS_PROVIDER = 'news'
+
+def fetch_feed(url, etag=None, modified=None):
+    """
+    Fetches an RSS/Atom feed, sending ETag / Last-Modified validators when known.
+    An unchanged feed comes back with status 304 and no entries.
+    The download goes through the pooled session with connect/read timeouts
+    (feedparser's own fetching has none); feedparser only parses the body.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if modified:
+        headers['If-Modified-Since'] = modified
+    response = get_session(NEWS_PROVIDER).get(url, headers=headers, timeout=get_timeout(NEWS_PROVIDER))
+    if response.status_code == 304:
+        return feedparser.FeedParserDict(status=304, entries=[], etag=etag or '', modified=modified or '')
+    response.raise_for_status()
+
+    feed = feedparser.parse(response.content, response_headers={'content-location': response.url})
+    feed['status'] = response.status_code
+    feed['etag'] = response.headers.get('ETag', '')
+    feed['modified'] = response.headers.get('Last-Modified', '')
+    return feed
+
+def parse_bbc_entries(feed):
+    """
+    Normalizes BBC RSS entries into headline dicts.
+    """
+    headlines = []
+    for entry in feed.entries:
+        title = getattr(entry, 'title', None)
+        if not title:
+            continue
+            
+        link = getattr(entry, 'link', '#')
+        
+        # Prioritize media_content (usually larger) over media_thumbnail
+        image_url = None
+        if 'media_content' in entry and entry.media_content:
+             # Pick largest valid image by width (int)
+             best_image = max(entry.media_content, key=lambda x: int(x.get('width', 0)) if x.get('width') else 0)
+             image_url = best_image.get('url')
+        
+        if not image_url and 'media_thumbnail' in entry and entry.media_thumbnail:
+             image_url = entry.media_thumbnail[0]['url']
+        
+        # Enhance BBC Image URL to high resolution if possible
+        # BBC URLs often look like: https://ichef.bbci.co.uk/news/240/cpsprodpb/...
+        # We bump 240 (or any width) to 976 (standard high res)
+        if image_url:
+            image_url = re.sub(r'/news/\d+/', '/news/976/', image_url)
+             
+        # Convert struct_time to timestamp
+        timestamp = int(time.mktime(entry.published_parsed)) if hasattr(entry, 'published_parsed') else int(time.time())
+
+        headlines.append({
+            'headline': title,
+            'source': 'BBC News',
+            'link': link,
+            'image': image_url,
+            'timestamp': timestamp,
+            'origin': 'BBC'
+        })
+    return headlines
+
 def fetch_bbc_news():
     """
     Fetches business news from BBC RSS feed.
     """
     try:
-        feed_url = "http://feeds.bbci.co.uk/news/business/rss.xml"
-        feed = feedparser.parse(feed_url)
-        
-        headlines = []
-        for entry in feed.entries:
-            title = getattr(entry, 'title', None)
-            if not title:
-                continue
-                
-            link = getattr(entry, 'link', '#')
-            
-            # Prioritize media_content (usually larger) over media_thumbnail
-            image_url = None
-            if 'media_content' in entry and entry.media_content:
-                 # Pick largest valid image by width (int)
-                 best_image = max(entry.media_content, key=lambda x: int(x.get('width', 0)) if x.get('width') else 0)
-                 image_url = best_image.get('url')
-            
-            if not image_url and 'media_thumbnail' in entry and entry.media_thumbnail:
-                 image_url = entry.media_thumbnail[0]['url']
-            
-            # Enhance BBC Image URL to high resolution if possible
-            # BBC URLs often look like: https://ichef.bbci.co.uk/news/240/cpsprodpb/...
-            # We bump 240 (or any width) to 976 (standard high res)
-            if image_url:
-                image_url = re.sub(r'/news/\d+/', '/news/976/', image_url)
-                 
-            # Convert struct_time to timestamp
-            timestamp = int(time.mktime(entry.published_parsed)) if hasattr(entry, 'published_parsed') else int(time.time())
-
-            headlines.append({
-                'headline': title,
-                'source': 'BBC News',
-                'link': link,
-                'image': image_url,
-                'timestamp': timestamp,
-                'origin': 'BBC'
-            })
-        return headlines
+        return parse_bbc_entries(fetch_feed(BBC_BUSINESS_FEED_URL))
     except Exception as e:
         print(f"Error fetching BBC news: {e}")
         return []
 
+def stored_news(feed, limit=10):
+    """
+    Reads the newest stored headlines for a feed (single indexed query),
+    in the same dict shape the fetchers return.
+    """
+    from .models import NewsItem
+
+    items = NewsItem.objects.filter(feed=feed).order_by('-published_at').values(
+        'headline', 'source', 'link', 'image', 'origin', 'published_at'
+    )[:limit]
+    return [
+        {
+            'headline': item['headline'],
+            'source': item['source'],
+            'link': item['link'],
+            'image': item['image'],
+            'timestamp': int(item['published_at'].timestamp()),
+            'origin': item['origin'],
+        }
+        for item in items
+    ]
+
 def get_top_headlines(limit=10):
     """
-    Merges news from sources, sorts by time, and returns top items.
+    Returns the newest merged Yahoo/BBC headlines from the news store.
     """
-    yahoo = fetch_yahoo_news()
-    bbc = fetch_bbc_news()
-    
-    all_news = yahoo + bbc
-    
-    # Sort by timestamp descending (newest first)
-    all_news.sort(key=lambda x: x['timestamp'], reverse=True)
-    all_news = all_news[:limit]
+    all_news = stored_news('headlines', limit)
     
     # Fallback/Mock Data if we don't have enough news (prevents empty carousel)
     if len(all_news) < 3:
@@ -208,8 +260,50 @@ def get_market_summary():
         print(f"Error getting market summary: {e}")
         return {'tickers': [], 'gainers': []}
 
-import requests
+MARKET_SUMMARY_CACHE_KEY = 'market_summary'
+# Keep the snapshot well past the beat interval so a missed tick still serves data
+MARKET_SUMMARY_CACHE_TIMEOUT = 60 * 60
+MARKET_SUMMARY_FALLBACK_TIMEOUT = 5.0
+
+_summary_fallback = ThreadPoolExecutor(max_workers=1, thread_name_prefix='market-summary')
+_summary_future = None
+_summary_lock = threading.Lock()
+
+def refresh_market_summary():
+    """
+    Builds the market summary and stores it in the cache with its generation time.
+    Called from the update_market_summary beat task.
+    """
+    snapshot = get_market_summary()
+    snapshot['generated_at'] = timezone.now().isoformat()
+    cache.set(MARKET_SUMMARY_CACHE_KEY, snapshot, MARKET_SUMMARY_CACHE_TIMEOUT)
+    bump_generation(MARKET_SUMMARY)
+    return snapshot
+
+def get_market_summary_snapshot(timeout=MARKET_SUMMARY_FALLBACK_TIMEOUT):
+    """
+    Returns the precomputed market summary.
+    On a cold cache, builds it synchronously but waits at most `timeout`
+    seconds; the build keeps running in the background and fills the cache.
+    """
+    snapshot = cache.get(MARKET_SUMMARY_CACHE_KEY)
+    if snapshot is not None:
+        return snapshot
+
+    # Concurrent cold requests share one in-flight build
+    global _summary_future
+    with _summary_lock:
+        if _summary_future is None or _summary_future.done():
+            _summary_future = _summary_fallback.submit(refresh_market_summary)
+        future = _summary_future
+
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        return {'tickers': [], 'gainers': [], 'generated_at': None}
+
 from decouple import config
+from assets.http import get_session, get_timeout
 
 def fetch_finnhub_news(category='general'):
     """
@@ -220,8 +314,10 @@ def fetch_finnhub_news(category='general'):
         if not api_key:
             return []
             
-        url = f"https://finnhub.io/api/v1/news?category={category}&token={api_key}"
-        response = requests.get(url)
+        url = "https://finnhub.io/api/v1/news"
+        response = get_session('finnhub').get(
+            url, params={'category': category, 'token': api_key}, timeout=get_timeout('finnhub')
+        )
         if response.status_code != 200:
             return []
             
@@ -241,58 +337,63 @@ def fetch_finnhub_news(category='general'):
         print(f"Error fetching Finnhub news: {e}")
         return []
 
+def google_news_url(query):
+    from urllib.parse import quote
+    encoded_query = quote(query)
+    return f"https://news.google.com/rss/search?q={encoded_query}&hl=en-US&gl=US&ceid=US:en"
+
+def parse_google_entries(feed):
+    """
+    Normalizes Google News RSS entries into headline dicts.
+    """
+    headlines = []
+    
+    for entry in feed.entries[:10]:
+        timestamp = int(time.mktime(entry.published_parsed)) if hasattr(entry, 'published_parsed') else int(time.time())
+        
+        # Attempt to extract image from description HTML
+        image_url = None
+        description = getattr(entry, 'description', '')
+        if description:
+            # Look for <img src="..."
+            match = re.search(r'src="([^"]+)"', description)
+            if match:
+                image_url = match.group(1)
+        
+        headlines.append({
+            'headline': entry.title,
+            'source': entry.source.title if hasattr(entry, 'source') else 'Google News',
+            'link': entry.link,
+            'image': image_url,
+            'timestamp': timestamp,
+            'origin': 'GoogleNews'
+        })
+    return headlines
+
 def fetch_google_news_rss(query):
     """
     Fetches news from Google News RSS.
     """
     try:
-        # Encode query
-        from urllib.parse import quote
-        encoded_query = quote(query)
-        feed_url = f"https://news.google.com/rss/search?q={encoded_query}&hl=en-US&gl=US&ceid=US:en"
-        
-        feed = feedparser.parse(feed_url)
-        headlines = []
-        
-        for entry in feed.entries[:10]:
-            timestamp = int(time.mktime(entry.published_parsed)) if hasattr(entry, 'published_parsed') else int(time.time())
-            
-            # Attempt to extract image from description HTML
-            image_url = None
-            description = getattr(entry, 'description', '')
-            if description:
-                # Look for <img src="..."
-                match = re.search(r'src="([^"]+)"', description)
-                if match:
-                    image_url = match.group(1)
-            
-            headlines.append({
-                'headline': entry.title,
-                'source': entry.source.title if hasattr(entry, 'source') else 'Google News',
-                'link': entry.link,
-                'image': image_url,
-                'timestamp': timestamp,
-                'origin': 'GoogleNews'
-            })
-        return headlines
+        return parse_google_entries(fetch_feed(google_news_url(query)))
     except Exception as e:
         print(f"Error fetching Google News: {e}")
         return []
 
+# Map country codes to Google News queries
+COUNTRY_NEWS_QUERIES = {
+    'us': 'US Financial Markets',
+    'uk': 'UK Business News',
+    'jp': 'Japan Economy',
+    'bd': 'Bangladesh Economy',
+    'global': 'Global Finance News',
+}
+
 def get_country_news(country_code):
     """
-    Dispatches news fetch based on country.
-    Now uses Google News RSS for all regions as Finnhub was unreliable.
+    Returns stored news for a country.
+    Country feeds are ingested from Google News RSS; unknown countries get global news.
     """
     country = country_code.lower()
-    
-    # Map country codes to Google News queries
-    queries = {
-        'us': 'US Financial Markets',
-        'uk': 'UK Business News',
-        'jp': 'Japan Economy',
-        'bd': 'Bangladesh Economy',
-    }
-    
-    query = queries.get(country, 'Global Finance News')
-    return fetch_google_news_rss(query)
+    feed = country if country in COUNTRY_NEWS_QUERIES else 'global'
+    return stored_news(feed)
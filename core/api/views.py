@@ -1,11 +1,17 @@
-from rest_framework import viewsets, views, status
+import hashlib
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.utils import timezone
-from datetime import timedelta, datetime
-from assets.models import Asset, PricePoint
-from .serializers import AssetSerializer, PricePointSerializer, NewsSerializer
-from .utils import get_top_headlines, get_market_summary, get_country_news
+from assets import analytics
+from assets.models import Asset, Watchlist
+from assets.generation import PRICES, get_generation
+from .serializers import AssetSerializer, WatchlistBulkSerializer, WatchlistSerializer
+from .conditional import conditional
+
+# Details, history, market summary and news are async views (see async_views.py)
 
 class AssetViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -15,7 +21,7 @@ class AssetViewSet(viewsets.ReadOnlyModelViewSet):
     Provides list and retrieve actions.
     Supports filtering by 'exchange' or 'type'.
     """
-    queryset = Asset.objects.all()
+    queryset = Asset.objects.select_related('quote')
     serializer_class = AssetSerializer
     permission_classes = [] # AllowAny equivalent if default is AllowAny, or explicit
 
@@ -44,105 +50,57 @@ class AssetViewSet(viewsets.ReadOnlyModelViewSet):
                 
         return queryset
 
-    @action(detail=True, methods=['get'])
-    def details(self, request, pk=None):
-        """
-        Fetch extra details (Market Cap, Volume) via Adapter
-        """
-        asset = self.get_object()
-        from assets.adapters import get_adapter
-        try:
-            adapter = get_adapter(asset.asset_type)
-            details = adapter.get_details(asset.symbol, identifier=asset.api_identifier)
-            return Response(details)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    @action(detail=True, methods=['get'])
-    def history(self, request, pk=None):
-        """
-        Fetch price history for an asset. 
-        Proxies request to the appropriate adapter based on asset type.
-        """
-        asset = self.get_object()
-        period = request.query_params.get('period', '1d') # 24h -> 1d via adapter map usually
-        
-        # Map frontend '24h' to backend '1d' if needed, or rely on adapter defaults
-        if period == '24h': period = '1d'
-        if period == '7d': period = '5d' # approximate
+    @conditional(PRICES, max_age=15, stale_while_revalidate=45)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-        from assets.adapters import get_adapter
-        try:
-            adapter = get_adapter(asset.asset_type)
-            history = adapter.get_history(asset.symbol, period, identifier=asset.api_identifier)
-            return Response(history)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class PriceHistoryView(views.APIView):
-    """
-    API View to fetch historical price data for a symbol.
-    """
-    permission_classes = []
-
-    def get(self, request, symbol):
-        period = request.query_params.get('period', '1d') # 1d, 5d, 1mo, 1y, 5y, ytd
-        
-        # Find asset to know which adapter to use
-        # Optimistic lookup: try to find by symbol
-        asset = Asset.objects.filter(symbol=symbol).first()
-        
-        if not asset:
-            return Response({'error': 'Asset not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-        from assets.adapters import get_adapter
-        try:
-            adapter = get_adapter(asset.asset_type)
-            history = adapter.get_history(symbol, period, identifier=asset.api_identifier)
-            return Response(history)
-        except Exception as e:
-             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    @conditional(PRICES, max_age=15, stale_while_revalidate=45)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
-from assets.models import Watchlist
-from .serializers import WatchlistSerializer
+# Summaries are keyed by the prices generation, so a tick retires them long before this
+SUMMARY_TTL = 60 * 60
 
 class WatchlistViewSet(viewsets.ModelViewSet):
     serializer_class = WatchlistSerializer
     
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Watchlist.objects.filter(user=self.request.user)
+            return Watchlist.objects.filter(user=self.request.user).select_related('asset__quote')
         return Watchlist.objects.none()
         
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class NewsView(views.APIView):
-    """
-    API View to fetch financial news by country.
-    """
-    def get(self, request):
-        country = request.query_params.get('country', 'us').lower()
-        
-        # Fetch real news using helper
-        news_data = get_country_news(country)
-            
-        serializer = NewsSerializer(news_data, many=True)
-        return Response(serializer.data)
-
-class NewsHeadlinesView(views.APIView):
-    """
-    API View to fetch top 10 merged headlines from Yahoo and BBC.
-    """
-    def get(self, request):
-        headlines = get_top_headlines(limit=10)
-        serializer = NewsSerializer(headlines, many=True)
-        return Response(serializer.data)
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def summary(self, request):
+        """Returns, volatility and drawdown per watched asset and for the whole watchlist (assets.analytics)."""
+        assets = list(
+            Asset.objects.filter(watched_by__user=request.user).select_related('quote').order_by('symbol')
+        )
+        # Cached until the next ingestion tick bumps the generation, or the watchlist changes
+        generation, _ = get_generation(PRICES)
+        watched = hashlib.sha1(','.join(str(asset.pk) for asset in assets).encode()).hexdigest()[:16]
+        key = f'watchlist-summary:{request.user.pk}:{generation}:{watched}'
+        summary = cache.get(key)
+        if summary is None:
+            summary = analytics.summarize(assets)
+            cache.set(key, summary, SUMMARY_TTL)
+        return Response(summary)
 
-class MarketSummaryView(views.APIView):
-    """
-    API View to fetch market summary (Ticker indices + Top Gainers).
-    """
-    def get(self, request):
-        data = get_market_summary()
-        return Response(data)
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk(self, request):
+        """Adds and removes many assets at once: {"add": [asset ids], "remove": [asset ids]}."""
+        serializer = WatchlistBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add, remove = set(serializer.validated_data['add']), set(serializer.validated_data['remove'])
+        watchlist = Watchlist.objects.filter(user=request.user)
+        with transaction.atomic():
+            existing = set(watchlist.filter(asset_id__in=add | remove).values_list('asset_id', flat=True))
+            added = sorted(add - existing)
+            Watchlist.objects.bulk_create(
+                [Watchlist(user=request.user, asset_id=asset_id) for asset_id in added], ignore_conflicts=True,
+            )
+            removed = sorted(remove & existing)
+            watchlist.filter(asset_id__in=removed).delete()
+        return Response({'added': added, 'removed': removed})
@@ -1,36 +1,209 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
 from abc import ABC, abstractmethod
 from decimal import Decimal
 import yfinance as yf
 from pycoingecko import CoinGeckoAPI
-from bdshare import get_current_trade_data
+from bdshare import BDShareError, get_current_trade_data, get_historical_data
 from django.conf import settings
+import numpy as np
 import pandas as pd
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from .http import get_session, get_timeout, get_http_policy, get_async_client
+from .downsampling import downsample_series
+
+logger = logging.getLogger(__name__)
+
+# Lookup tables for vectorized time labels: 'HH:MM' for every minute of the
+# day, and 'Ddd HH:MM' for every minute of the week (Monday first)
+_MINUTE_LABELS = np.array([f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)])
+_WEEKDAY_MINUTE_LABELS = np.array([
+    f"{day} {label}" for day in ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun') for label in _MINUTE_LABELS
+])
+
+# Blocking upstream libraries (yfinance, bdshare) run here for the async views,
+# so a slow provider parks a thread from this pool rather than the event loop
+_blocking_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ADAPTER_THREAD_POOL_SIZE', 64), thread_name_prefix='adapter'
+)
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking adapter call in the adapter thread pool."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(_blocking_pool, call)
+
+# Set by api.profiling while a request is profiled: an object whose enter()
+# and record(method, seconds) bracket every MarketAdapter method call
+adapter_calls = contextvars.ContextVar('adapter_calls', default=None)
+
+PROFILED_METHODS = (
+    'get_price', 'get_prices', 'get_history_series', 'get_history', 'get_history_range', 'get_details',
+    'aget_history_series', 'aget_history', 'aget_details',
+)
+
+def _timed(func):
+    """Report the wrapped adapter method's duration to adapter_calls, when set."""
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def awrapper(self, *args, **kwargs):
+            calls = adapter_calls.get()
+            if calls is None:
+                return await func(self, *args, **kwargs)
+            calls.enter()
+            started = time.perf_counter()
+            try:
+                return await func(self, *args, **kwargs)
+            finally:
+                calls.record(f"{type(self).__name__}.{func.__name__}", time.perf_counter() - started)
+        return awrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        calls = adapter_calls.get()
+        if calls is None:
+            return func(self, *args, **kwargs)
+        calls.enter()
+        started = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            calls.record(f"{type(self).__name__}.{func.__name__}", time.perf_counter() - started)
+    return wrapper
+
+def _instrument(cls):
+    # Without profiling nothing ever sets adapter_calls, so leave the methods unwrapped
+    if not getattr(settings, 'PROFILING_ENABLED', False):
+        return
+    for name in PROFILED_METHODS:
+        func = cls.__dict__.get(name)
+        if func is not None and not getattr(func, '__isabstractmethod__', False):
+            setattr(cls, name, _timed(func))
+
+def empty_series():
+    return pd.DatetimeIndex([], tz='UTC'), np.empty(0, dtype=np.float64)
+
+def format_history_times(times: pd.DatetimeIndex, period: str) -> np.ndarray:
+    """
+    Vectorized chart labels in the index's own timezone:
+    '%H:%M' for 1d, '%a %H:%M' for 5d and '%Y-%m-%d' otherwise.
+    """
+    if times.tz is not None:
+        times = times.tz_localize(None)  # wall-clock time in that zone
+    minutes = times.values.astype('datetime64[m]').astype(np.int64)
+
+    if period == '1d':
+        return _MINUTE_LABELS[minutes % 1440]
+    if period == '5d':
+        # 1970-01-01 was a Thursday (index 3 with Monday = 0)
+        weekday = (minutes // 1440 + 3) % 7
+        return _WEEKDAY_MINUTE_LABELS[weekday * 1440 + minutes % 1440]
+    return np.datetime_as_string(minutes.astype('datetime64[m]'), unit='D')
+
+def columnar_history(times: pd.DatetimeIndex, values) -> dict:
+    """Turn a (times, values) series into {'t': epoch seconds int64[], 'v': float64[]}."""
+    return {
+        't': times.values.astype('datetime64[s]').astype(np.int64),
+        'v': np.asarray(values, dtype=np.float64),
+    }
+
+def shape_history(times: pd.DatetimeIndex, values, period: str) -> list:
+    """Turn a (times, values) series into [{'time': label, 'value': float}]."""
+    labels = format_history_times(times, period).tolist()
+    values = np.asarray(values, dtype=np.float64).tolist()
+    return [{'time': t, 'value': v} for t, v in zip(labels, values)]
 
 class MarketAdapter(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _instrument(cls)
+
     @abstractmethod
     def get_price(self, symbol: str, identifier: str = None) -> Decimal:
         """Fetch the current price for a given asset."""
         pass
 
-    def get_history(self, symbol: str, period: str, identifier: str = None) -> list:
+    def get_history_series(self, symbol: str, period: str, identifier: str = None):
+        """
+        Fetch historical prices as arrays.
+        Returns (times, values): a tz-aware pandas DatetimeIndex and a float64 ndarray.
+        Upstream failures raise; an empty series means there is no data.
+        Default implementation returns an empty series.
+        """
+        return empty_series()
+
+    def get_history(self, symbol: str, period: str, identifier: str = None, points: int = None) -> list:
         """
         Fetch historical price data.
         Returns a list of dicts: [{'time': 'timestamp/str', 'value': float}]
-        Default implementation returns empty list.
+        built from get_history_series, downsampled to `points` (LTTB) when given.
+        """
+        times, values = downsample_series(*self.get_history_series(symbol, period, identifier=identifier), points)
+        return shape_history(times, values, self.label_period(period))
+
+    def label_period(self, period: str) -> str:
+        """Period whose label format get_history should use."""
+        return period
+
+    def get_history_range(self, symbol: str, start: datetime, end: datetime, identifier: str = None):
+        """
+        Historical prices in [start, end) as a (times, values) series, for backfills.
+        Upstream failures raise; an empty series means no data in the range.
         """
-        return []
+        raise NotImplementedError(f"{type(self).__name__} has no ranged history")
 
     def get_details(self, symbol: str, identifier: str = None) -> dict:
         """
         Fetch detailed asset information (Market Cap, Volume, etc.)
         Returns dict with 'market_cap', 'volume'.
+        Upstream failures raise (so circuit breakers see them); callers
+        fall back to cached details.
         """
         return {'market_cap': 'N/A', 'volume': 'N/A'}
 
+    def get_prices(self, assets: list) -> dict:
+        """
+        Fetch current prices for many assets at once.
+        Returns a dict of {symbol: Decimal}; assets whose price could not be
+        fetched are left out. Default implementation calls get_price per asset,
+        providers with a batch endpoint override this.
+        """
+        prices = {}
+        for asset in assets:
+            try:
+                prices[asset.symbol] = self.get_price(asset.symbol, asset.api_identifier)
+            except Exception as e:
+                logger.warning(f"Error fetching price for {asset.symbol}: {e}")
+        return prices
+
+    # Async variants for the async views. The defaults run the blocking
+    # methods in the adapter thread pool; adapters with a plain HTTP API
+    # override them with the async client.
+    async def aget_history_series(self, symbol: str, period: str, identifier: str = None):
+        return await run_blocking(self.get_history_series, symbol, period, identifier=identifier)
+
+    async def aget_history(self, symbol: str, period: str, identifier: str = None, points: int = None) -> list:
+        series = await self.aget_history_series(symbol, period, identifier=identifier)
+        times, values = downsample_series(*series, points)
+        return shape_history(times, values, self.label_period(period))
+
+    async def aget_details(self, symbol: str, identifier: str = None) -> dict:
+        return await run_blocking(self.get_details, symbol, identifier=identifier)
+
+_instrument(MarketAdapter)
+
 class CryptoAdapter(MarketAdapter):
     def __init__(self):
         self.cg = CoinGeckoAPI()
+        # Share the pooled keep-alive session and bound every call
+        self.cg.session = get_session('coingecko')
+        self.cg.request_timeout = get_timeout('coingecko')
 
     def get_price(self, symbol: str, identifier: str = None) -> Decimal:
         if not identifier:
@@ -44,81 +217,136 @@ class CryptoAdapter(MarketAdapter):
         except Exception as e:
             raise ValueError(f"Error fetching crypto price: {str(e)}")
 
+    def get_prices(self, assets: list) -> dict:
+        # One comma-joined /simple/price call for every tracked coin
+        by_identifier = {a.api_identifier: a.symbol for a in assets if a.api_identifier}
+        if not by_identifier:
+            return {}
+
+        try:
+            data = self.cg.get_price(ids=','.join(by_identifier), vs_currencies='usd')
+        except Exception as e:
+            raise ValueError(f"Error fetching crypto prices: {str(e)}")
+
+        prices = {}
+        for identifier, symbol in by_identifier.items():
+            usd = data.get(identifier, {}).get('usd')
+            if usd is not None:
+                prices[symbol] = Decimal(str(usd))
+        return prices
+
+    # Map period to CoinGecko 'days' parameter
+    # 1d -> 1, 5d -> 7? (CG supports 1, 7, 14, 30, 90, 180, 365, max)
+    DAYS_MAP = {
+        '1d': '1',
+        '5d': '7', 
+        '1mo': '30',
+        '1y': '365',
+        '5y': 'max', # Approximate, CG uses 'max' for full history
+        'ytd': '365', # Approximate
+        'max': 'max'
+    }
+
+    async def _aget(self, path: str, **params) -> dict:
+        """GET a CoinGecko endpoint with the shared async client."""
+        response = await get_async_client('coingecko').get(f"{self.cg.api_base_url}{path}", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _details(data: dict, identifier: str) -> dict:
+        if identifier not in data:
+            return {'market_cap': 'N/A', 'volume': 'N/A'}
+
+        item = data[identifier]
+        mc = item.get('usd_market_cap', 0)
+        vol = item.get('usd_24h_vol', 0)
+
+        # Format
+        def format_num(n):
+            if n > 1e12: return f"${(n/1e12):.2f}T"
+            if n > 1e9: return f"${(n/1e9):.2f}B"
+            if n > 1e6: return f"${(n/1e6):.2f}M"
+            return f"${n:,.2f}"
+
+        return {
+            'market_cap': format_num(mc),
+            'volume': format_num(vol)
+        }
+
+    @staticmethod
+    def _series(data: dict):
+        prices = np.asarray(data.get('prices', []), dtype=np.float64).reshape(-1, 2)
+
+        # Format: [timestamp_ms, price]; labels are rendered in the server timezone
+        times = pd.to_datetime(prices[:, 0].astype(np.int64), unit='ms', utc=True).tz_convert(settings.TIME_ZONE)
+        return times, prices[:, 1]
+
     def get_details(self, symbol: str, identifier: str = None) -> dict:
         if not identifier: return {'market_cap': 'N/A', 'volume': 'N/A'}
         try:
             # CoinGecko get_price can return more info
             data = self.cg.get_price(ids=identifier, vs_currencies='usd', include_market_cap='true', include_24hr_vol='true')
-            if identifier in data:
-                item = data[identifier]
-                mc = item.get('usd_market_cap', 0)
-                vol = item.get('usd_24h_vol', 0)
-                
-                # Format
-                def format_num(n):
-                    if n > 1e12: return f"${(n/1e12):.2f}T"
-                    if n > 1e9: return f"${(n/1e9):.2f}B"
-                    if n > 1e6: return f"${(n/1e6):.2f}M"
-                    return f"${n:,.2f}"
-
-                return {
-                    'market_cap': format_num(mc),
-                    'volume': format_num(vol)
-                }
-            return {'market_cap': 'N/A', 'volume': 'N/A'}
-        except Exception:
-            return {'market_cap': 'N/A', 'volume': 'N/A'}
+        except Exception as e:
+            raise ValueError(f"Error fetching crypto details: {str(e)}")
+        return self._details(data, identifier)
+
+    async def aget_details(self, symbol: str, identifier: str = None) -> dict:
+        if not identifier: return {'market_cap': 'N/A', 'volume': 'N/A'}
+        try:
+            data = await self._aget(
+                'simple/price', ids=identifier, vs_currencies='usd', include_market_cap='true', include_24hr_vol='true'
+            )
+        except Exception as e:
+            raise ValueError(f"Error fetching crypto details: {str(e)}")
+        return self._details(data, identifier)
 
-    def get_history(self, symbol: str, period: str, identifier: str = None) -> list:
+    def get_history_series(self, symbol: str, period: str, identifier: str = None):
         if not identifier:
              raise ValueError("Crypto assets require an API identifier (e.g., 'bitcoin').")
-        
-        # Map period to CoinGecko 'days' parameter
-        # 1d -> 1, 5d -> 7? (CG supports 1, 7, 14, 30, 90, 180, 365, max)
-        days_map = {
-            '1d': '1',
-            '5d': '7', 
-            '1mo': '30',
-            '1y': '365',
-            '5y': 'max', # Approximate, CG uses 'max' for full history
-            'ytd': '365', # Approximate
-            'max': 'max'
-        }
-        days = days_map.get(period, '1')
 
         try:
-            data = self.cg.get_coin_market_chart_by_id(id=identifier, vs_currency='usd', days=days)
-            prices = data.get('prices', [])
-            
-            # Format: [timestamp_ms, price]
-            history = []
-            for ts, price in prices:
-                # Convert ms timestamp to readable for frontend or keep as is?
-                # Frontend Recharts expects a 'time' label.
-                # For 1d (intraday), time format HH:mm is good. For others Date.
-                
-                dt = datetime.fromtimestamp(ts / 1000)
-                if period == '1d':
-                    time_str = dt.strftime('%H:%M')
-                elif period == '5d':
-                    time_str = dt.strftime('%a %H:%M')
-                else: 
-                    time_str = dt.strftime('%Y-%m-%d')
-                
-                history.append({
-                    'time': time_str,
-                    'value': price
-                })
-            return history
+            data = self.cg.get_coin_market_chart_by_id(id=identifier, vs_currency='usd', days=self.DAYS_MAP.get(period, '1'))
+        except Exception as e:
+            raise ValueError(f"Error fetching crypto history: {str(e)}")
+        return self._series(data)
+
+    def get_history_range(self, symbol: str, start: datetime, end: datetime, identifier: str = None):
+        if not identifier:
+             raise ValueError("Crypto assets require an API identifier (e.g., 'bitcoin').")
+
+        try:
+            data = self.cg.get_coin_market_chart_range_by_id(
+                id=identifier, vs_currency='usd',
+                from_timestamp=int(start.timestamp()), to_timestamp=int(end.timestamp()),
+            )
         except Exception as e:
-            print(f"Error fetching crypto history: {e}")
-            return []
+            raise ValueError(f"Error fetching crypto history range: {str(e)}")
+        times, values = self._series(data)
+        keep = times < pd.Timestamp(end)
+        return times[keep], values[keep]
+
+    async def aget_history_series(self, symbol: str, period: str, identifier: str = None):
+        if not identifier:
+             raise ValueError("Crypto assets require an API identifier (e.g., 'bitcoin').")
+
+        try:
+            data = await self._aget(
+                f'coins/{identifier}/market_chart', vs_currency='usd', days=self.DAYS_MAP.get(period, '1')
+            )
+        except Exception as e:
+            raise ValueError(f"Error fetching crypto history: {str(e)}")
+        return self._series(data)
 
 class GlobalStockAdapter(MarketAdapter):
+    # yfinance keeps its own process-wide session; we only bound the read time
+    def __init__(self):
+        self.timeout = get_http_policy('yahoo')['read_timeout']
+
     def get_price(self, symbol: str, identifier: str = None) -> Decimal:
         try:
             ticker = yf.Ticker(symbol)
-            hist = ticker.history(period='1d')
+            hist = ticker.history(period='1d', timeout=self.timeout)
             
             if hist.empty:
                 raise ValueError(f"No history data found for {symbol}")
@@ -128,6 +356,28 @@ class GlobalStockAdapter(MarketAdapter):
         except Exception as e:
             raise ValueError(f"Error fetching global stock price for {symbol}: {str(e)}")
 
+    def get_prices(self, assets: list) -> dict:
+        # One multi-ticker download instead of a Ticker().history() per symbol
+        symbols = [a.symbol for a in assets]
+        if not symbols:
+            return {}
+
+        try:
+            data = yf.download(symbols, period='1d', group_by='column', progress=False, threads=True, timeout=self.timeout)
+        except Exception as e:
+            raise ValueError(f"Error fetching global stock prices: {str(e)}")
+
+        if data is None or data.empty:
+            return {}
+
+        last_close = data['Close'].ffill().iloc[-1]
+        prices = {}
+        for symbol in symbols:
+            value = last_close.get(symbol)
+            if value is not None and not pd.isna(value):
+                prices[symbol] = Decimal(str(value))
+        return prices
+
     def get_details(self, symbol: str, identifier: str = None) -> dict:
         try:
             ticker = yf.Ticker(symbol)
@@ -147,10 +397,10 @@ class GlobalStockAdapter(MarketAdapter):
                 'market_cap': format_num(mc),
                 'volume': format_num(vol)
             }
-        except Exception:
-            return {'market_cap': 'N/A', 'volume': 'N/A'}
+        except Exception as e:
+            raise ValueError(f"Error fetching stock details for {symbol}: {str(e)}")
 
-    def get_history(self, symbol: str, period: str, identifier: str = None) -> list:
+    def get_history_series(self, symbol: str, period: str, identifier: str = None):
         try:
             ticker = yf.Ticker(symbol)
             # Map periods
@@ -159,34 +409,38 @@ class GlobalStockAdapter(MarketAdapter):
             if period not in valid_periods:
                 period = '1d' # default
 
-            hist = ticker.history(period=period)
+            hist = ticker.history(period=period, timeout=self.timeout)
             
             # Fallback for closed market on 1d (e.g. weekend)
             if period == '1d' and (hist.empty or len(hist) < 2):
                  # Fetch 5d and take the last available trading day
-                 hist_5d = ticker.history(period='5d')
+                 hist_5d = ticker.history(period='5d', timeout=self.timeout)
                  if not hist_5d.empty:
                      last_date = hist_5d.index[-1].date()
                      hist = hist_5d[hist_5d.index.date == last_date]
 
-            results = []
-            for date, row in hist.iterrows():
-                # date is a timestamp (localized)
-                if period == '1d':
-                    time_str = date.strftime('%H:%M')
-                elif period == '5d':
-                    time_str = date.strftime('%a %H:%M')
-                else:
-                    time_str = date.strftime('%Y-%m-%d')
-                
-                results.append({
-                    'time': time_str,
-                    'value': float(row['Close'])
-                })
-            return results
+            if hist.empty:
+                return empty_series()
+
+            # Index stays in the exchange timezone so labels show local trading hours
+            return pd.DatetimeIndex(hist.index), hist['Close'].to_numpy(dtype=np.float64)
+        except Exception as e:
+            raise ValueError(f"Error fetching stock history for {symbol}: {str(e)}")
+
+    def get_history_range(self, symbol: str, start: datetime, end: datetime, identifier: str = None):
+        # Yahoo only serves hourly bars for the last 730 days
+        interval = '1h' if start >= datetime.now(start.tzinfo) - timedelta(days=729) else '1d'
+        try:
+            hist = yf.Ticker(symbol).history(start=start, end=end, interval=interval, timeout=self.timeout)
         except Exception as e:
-            print(f"Error fetching stock history: {e}")
-            return []
+            raise ValueError(f"Error fetching stock history range for {symbol}: {str(e)}")
+        if hist.empty:
+            return empty_series()
+        return pd.DatetimeIndex(hist.index).tz_convert('UTC'), hist['Close'].to_numpy(dtype=np.float64)
+
+    def label_period(self, period: str) -> str:
+        # Unknown periods are fetched (and labelled) as 1d
+        return period if period in ['1d', '5d', '1mo', '1y', '5y', 'ytd', 'max'] else '1d'
 
 class DSEAdapter(MarketAdapter):
     def get_price(self, symbol: str, identifier: str = None) -> Decimal:
@@ -201,6 +455,27 @@ class DSEAdapter(MarketAdapter):
         except Exception as e:
              raise ValueError(f"Error fetching DSE price for {symbol}: {str(e)}")
 
+    def get_prices(self, assets: list) -> dict:
+        # A single full-board fetch covers every DSE symbol
+        if not assets:
+            return {}
+
+        try:
+            df = get_current_trade_data()
+        except Exception as e:
+            raise ValueError(f"Error fetching DSE board: {str(e)}")
+
+        if df.empty or 'ltp' not in df.columns:
+            raise ValueError("Invalid board data received from DSE")
+
+        board = dict(zip(df['symbol'].astype(str).str.upper(), df['ltp']))
+        prices = {}
+        for asset in assets:
+            ltp = board.get(asset.symbol.upper())
+            if ltp is not None:
+                prices[asset.symbol] = Decimal(str(ltp).replace(',', ''))
+        return prices
+
     def get_details(self, symbol: str, identifier: str = None) -> dict:
         try:
             df = get_current_trade_data(symbol)
@@ -215,54 +490,80 @@ class DSEAdapter(MarketAdapter):
                 'market_cap': 'N/A', # Not available easily from bdshare live
                 'volume': str(vol)
             }
-        except:
-            return {'market_cap': 'N/A', 'volume': 'N/A'}
+        except Exception as e:
+            raise ValueError(f"Error fetching DSE details for {symbol}: {str(e)}")
     
-    def get_history(self, symbol: str, period: str, identifier: str = None) -> list:
-        # Fallback to local DB functionality needs to be handled in View or here via Model import
-        # Importing here might cause circular import if not careful, but models usually safe inside method
+    def get_history_series(self, symbol: str, period: str, identifier: str = None):
+        # DSE history comes from the local store, read from the candle rollups
+        # (one row per bucket) rather than every raw tick.
+        # Models are imported here to avoid a circular import.
         from .models import Asset
+        from .rollups import candle_series
         try:
-             # Find asset
-             asset = Asset.objects.filter(symbol=symbol).first()
-             if not asset: return []
-             
-             # Calculate delta
-             now = datetime.now()
-             if period == '1d': cutoff = now - timedelta(days=1)
-             elif period == '5d': cutoff = now - timedelta(days=5)
-             elif period == '1mo': cutoff = now - timedelta(days=30)
-             elif period == '1y': cutoff = now - timedelta(days=365)
-             else: cutoff = now - timedelta(days=365) # Default 1y cap for local db
-
-             points = asset.price_points.filter(timestamp__gte=cutoff).order_by('timestamp')
-             
-             results = []
-             for p in points:
-                 dt = p.timestamp
-                 if period == '1d':
-                    time_str = dt.strftime('%H:%M')
-                 elif period == '5d':
-                    time_str = dt.strftime('%a %H:%M')
-                 else:
-                    time_str = dt.strftime('%Y-%m-%d')
-
-                 results.append({
-                     'time': time_str,
-                     'value': float(p.price)
-                 })
-             return results
+            asset = Asset.objects.filter(symbol=symbol).first()
+            if not asset:
+                return empty_series()
+            return candle_series(asset, period)
+        except Exception:
+            # Raise like the other adapters so breakers and the cache see the failure
+            logger.exception(f"Error reading DSE history for {symbol}")
+            raise
 
+    def get_history_range(self, symbol: str, start: datetime, end: datetime, identifier: str = None):
+        # Daily closes from the DSE archive, stamped at the session close (14:30 Dhaka)
+        try:
+            df = get_historical_data(start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d'), code=symbol)
+        except BDShareError:
+            return empty_series()  # no trading days in the range
         except Exception as e:
-            print(f"Error fetching DSE history: {e}")
-            return []
+            raise ValueError(f"Error fetching DSE history range for {symbol}: {str(e)}")
+
+        closes = pd.to_numeric(df['close'].astype(str).str.replace(',', ''), errors='coerce')
+        times = (pd.to_datetime(df.index) + pd.Timedelta(hours=14, minutes=30)).tz_localize('Asia/Dhaka').tz_convert('UTC')
+        keep = (closes.notna().to_numpy()) & (times >= pd.Timestamp(start)) & (times < pd.Timestamp(end))
+        order = np.argsort(times[keep])
+        return times[keep][order], closes.to_numpy(dtype=np.float64)[keep][order]
+
+    async def aget_history_series(self, symbol: str, period: str, identifier: str = None):
+        # Local database read: run it on Django's sync thread, not the upstream pool
+        return await sync_to_async(self.get_history_series)(symbol, period, identifier=identifier)
+
+ADAPTER_CLASSES = {
+    'CRYPTO': CryptoAdapter,
+    'STOCK_GLOBAL': GlobalStockAdapter,
+    'STOCK_DSE': DSEAdapter,
+}
+
+# One long-lived adapter per asset type for the whole process
+_adapters = {}
+_adapters_lock = threading.Lock()
 
 def get_adapter(asset_type: str) -> MarketAdapter:
-    if asset_type == 'CRYPTO':
-        return CryptoAdapter()
-    elif asset_type == 'STOCK_GLOBAL':
-        return GlobalStockAdapter()
-    elif asset_type == 'STOCK_DSE':
-        return DSEAdapter()
-    else:
+    adapter = _adapters.get(asset_type)
+    if adapter is not None:
+        return adapter
+
+    adapter_class = ADAPTER_CLASSES.get(asset_type)
+    if adapter_class is None:
         raise ValueError(f"Unsupported asset type: {asset_type}")
+
+    with _adapters_lock:
+        if asset_type not in _adapters:
+            _adapters[asset_type] = build_adapter(asset_type, adapter_class)
+        return _adapters[asset_type]
+
+
+def build_adapter(asset_type: str, adapter_class) -> MarketAdapter:
+    """
+    The live adapter, or its offline stand-in when settings.MARKET_DATA_SOURCE
+    is 'simulated' or 'replay' (see assets.simulated).
+    """
+    source = getattr(settings, 'MARKET_DATA_SOURCE', 'live')
+    if source == 'live':
+        return adapter_class()
+
+    # Imported here: assets.simulated builds on this module
+    from .simulated import SOURCES
+    if source not in SOURCES:
+        raise ValueError(f"Unknown MARKET_DATA_SOURCE: {source}")
+    return SOURCES[source](asset_type)
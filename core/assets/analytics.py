@@ -0,0 +1,159 @@
+"""
+Vectorized performance analytics for a set of assets (watchlist summaries).
+
+Daily closes for every asset are read from the 1d candle rollups in one
+query and aligned into a (days x assets) float64 matrix. Gaps are
+forward-filled (the write filter skips unchanged prices, and markets close),
+and the last row is the live AssetQuote price. Every statistic is then a
+column-wise NumPy operation over the whole matrix:
+
+- returns over WINDOWS (percent, None where the asset has no price that far back)
+- volatility: annualized standard deviation of daily log returns (percent)
+- max_drawdown: the largest peak-to-trough fall over the year (percent, <= 0)
+
+The aggregate is an equal-weighted, daily rebalanced portfolio of the assets.
+"""
+import math
+
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Candle
+from .rollups import RESOLUTIONS, bucket_start
+
+# Window name -> days back from the latest close
+WINDOWS = {'1d': 1, '7d': 7, '30d': 30, '1y': 365}
+HISTORY_DAYS = max(WINDOWS.values())
+
+# Calendar days: forward-filled weekends and holidays contribute zero returns,
+# so the variance per calendar day still adds up to the annual figure
+PERIODS_PER_YEAR = 365
+
+PERFORMERS = 5
+
+
+def daily_closes(assets, now=None) -> np.ndarray:
+    """
+    (HISTORY_DAYS + 1, len(assets)) closes, oldest day first, ending today.
+    Days before an asset's first candle are NaN.
+    """
+    now = now or timezone.now()
+    day = RESOLUTIONS['1d']
+    today = bucket_start(now, '1d')
+    first = today - HISTORY_DAYS * day
+    closes = np.full((HISTORY_DAYS + 1, len(assets)), np.nan)
+    if not assets:
+        return closes
+
+    column = {asset.pk: i for i, asset in enumerate(assets)}
+    rows = list(
+        Candle.objects.filter(asset_id__in=column, resolution='1d', bucket_start__gte=first)
+        .annotate(close_value=Cast('close', FloatField()))
+        .values_list('asset_id', 'bucket_start', 'close_value')
+    )
+    if rows:
+        asset_ids, starts, values = zip(*rows)
+        days = [(start - first) // day for start in starts]
+        closes[days, [column[asset_id] for asset_id in asset_ids]] = values
+
+    for i, asset in enumerate(assets):
+        quote = getattr(asset, 'quote', None)
+        if quote is not None:
+            closes[-1, i] = float(quote.latest_price)
+    return forward_fill(closes)
+
+
+def forward_fill(closes: np.ndarray) -> np.ndarray:
+    """Carry each column's last value down over NaN rows."""
+    rows = np.arange(len(closes))[:, None]
+    last = np.where(np.isnan(closes), 0, rows)
+    np.maximum.accumulate(last, axis=0, out=last)
+    return closes[last, np.arange(closes.shape[1])]
+
+
+def period_returns(closes: np.ndarray) -> dict:
+    """{window: per-column fractional return from window days ago to the latest close}."""
+    return {
+        name: closes[-1] / closes[-1 - days] - 1 if days < len(closes) else np.full(closes.shape[1], np.nan)
+        for name, days in WINDOWS.items()
+    }
+
+
+def volatility(closes: np.ndarray) -> np.ndarray:
+    """Annualized standard deviation of daily log returns per column (NaN below 2 returns)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_returns = np.diff(np.log(closes), axis=0)
+    valid = ~np.isnan(log_returns)
+    count = valid.sum(axis=0)
+    filled = np.where(valid, log_returns, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = filled.sum(axis=0) / count
+        variance = (np.where(valid, log_returns - mean, 0.0) ** 2).sum(axis=0) / (count - 1)
+    return np.where(count > 1, np.sqrt(variance) * math.sqrt(PERIODS_PER_YEAR), np.nan)
+
+
+def max_drawdown(closes: np.ndarray) -> np.ndarray:
+    """Largest fall from a running peak per column, as a fraction <= 0 (NaN without data)."""
+    peaks = np.fmax.accumulate(closes, axis=0)
+    with np.errstate(invalid='ignore'):
+        drawdowns = closes / peaks - 1
+    has_data = ~np.isnan(closes).all(axis=0)
+    return np.where(has_data, np.where(np.isnan(drawdowns), 0.0, drawdowns).min(axis=0), np.nan)
+
+
+def portfolio_index(closes: np.ndarray) -> np.ndarray:
+    """Equal-weighted, daily rebalanced value index (starting at 1) as a one-column matrix."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        daily = closes[1:] / closes[:-1] - 1
+    valid = ~np.isnan(daily)
+    count = valid.sum(axis=1)
+    mean = np.where(count > 0, np.where(valid, daily, 0.0).sum(axis=1) / np.maximum(count, 1), 0.0)
+    return np.concatenate([[1.0], np.cumprod(1 + mean)])[:, None]
+
+
+def _pct(value):
+    return None if np.isnan(value) else round(float(value) * 100, 2)
+
+
+def summarize(assets, now=None) -> dict:
+    """Per-asset and aggregate statistics for assets (with quote selected)."""
+    now = now or timezone.now()
+    closes = daily_closes(assets, now)
+    returns = period_returns(closes)
+    vol = volatility(closes)
+    drawdown = max_drawdown(closes)
+
+    index = portfolio_index(closes)
+    aggregate_returns = period_returns(index)
+
+    best, worst = {}, {}
+    for name, values in returns.items():
+        ranked = [i for i in np.argsort(values) if not np.isnan(values[i])]
+        best[name] = [{'symbol': assets[i].symbol, 'return': _pct(values[i])} for i in ranked[::-1][:PERFORMERS]]
+        worst[name] = [{'symbol': assets[i].symbol, 'return': _pct(values[i])} for i in ranked[:PERFORMERS]]
+
+    return {
+        'as_of': now.isoformat(),
+        'assets': [
+            {
+                'id': asset.pk,
+                'symbol': asset.symbol,
+                'name': asset.name,
+                'asset_type': asset.asset_type,
+                'latest_price': None if np.isnan(closes[-1, i]) else float(closes[-1, i]),
+                'returns': {name: _pct(values[i]) for name, values in returns.items()},
+                'volatility': _pct(vol[i]),
+                'max_drawdown': _pct(drawdown[i]),
+            }
+            for i, asset in enumerate(assets)
+        ],
+        'aggregate': {
+            'returns': {name: _pct(values[0]) for name, values in aggregate_returns.items()},
+            'volatility': _pct(volatility(index)[0]),
+            'max_drawdown': _pct(max_drawdown(index)[0]),
+        },
+        'best': best,
+        'worst': worst,
+    }
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AssetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assets'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .generation import asset_changed
+        Asset = self.get_model('Asset')
+        post_save.connect(asset_changed, sender=Asset, dispatch_uid='assets.generation.asset_changed')
+        post_delete.connect(asset_changed, sender=Asset, dispatch_uid='assets.generation.asset_changed')
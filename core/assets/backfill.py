@@ -0,0 +1,204 @@
+"""
+Historical price backfill (the backfill_prices command).
+
+History is pulled per asset in date-range chunks from its adapter
+(get_history_range) or streamed from a local CSV/Parquet file. It is written
+straight into the candle rollups, for each resolution as far back as that
+resolution is retained. Only points inside the raw retention window
+(PRICE_RETENTION_DAYS) are also stored as PricePoints, with PostgreSQL COPY
+(bulk_create batches on other backends); older ones would be pruned on the
+next retention run anyway.
+
+Every chunk commits on its own together with the asset's BackfillCheckpoint,
+so an interrupted run resumes at the last committed chunk and the live
+ingestion never waits on a long transaction. A backfill stops before the
+asset's first stored PricePoint or candle, so it never overlaps live data.
+Upstream requests are paced by the provider's shared rate limit, which
+holds across backfills running in parallel.
+"""
+import csv
+import io
+import logging
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pandas as pd
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import partitions
+from .adapters import get_adapter
+from .ingestion import get_shared_limit
+from .models import BackfillCheckpoint, PricePoint
+from .retention import candle_cutoffs, raw_cutoffs
+from .rollups import merge_series
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM = 'upstream'
+DEFAULT_CHUNK_DAYS = 30
+DEFAULT_BATCH_SIZE = 5000
+FILE_COLUMNS = ['symbol', 'timestamp', 'price']
+
+
+def checkpoint_for(asset, source: str) -> BackfillCheckpoint:
+    """
+    The asset's checkpoint for source. A new one ends at the asset's live
+    data: its first stored PricePoint or candle (which outlive raw points),
+    or now.
+    """
+    checkpoint = BackfillCheckpoint.objects.filter(asset=asset, source=source).first()
+    if checkpoint is None:
+        starts = [
+            asset.price_points.order_by('timestamp').values_list('timestamp', flat=True).first(),
+            asset.candles.order_by('bucket_start').values_list('bucket_start', flat=True).first(),
+        ]
+        end = min((ts for ts in starts if ts is not None), default=timezone.now())
+        checkpoint = BackfillCheckpoint.objects.create(asset=asset, source=source, end=end)
+    return checkpoint
+
+
+def _price(value) -> Decimal:
+    return Decimal(f'{value:.4f}')
+
+
+def copy_points(rows):
+    """COPY (asset_id, price, timestamp) rows into the PricePoint table (PostgreSQL)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for asset_id, price, ts in rows:
+        writer.writerow([asset_id, _price(price), ts.isoformat()])
+
+    sql = f'COPY "{PricePoint._meta.db_table}" (asset_id, price, "timestamp") FROM STDIN WITH (FORMAT csv)'
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):  # psycopg2
+            buffer.seek(0)
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def write_points(rows, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Write [(asset_id, price, timestamp), ...]; returns the number of rows."""
+    if not rows:
+        return 0
+
+    if connection.vendor == 'postgresql':
+        if partitions.enabled(connection):
+            for month in {partitions.month_start(ts) for _, _, ts in rows}:
+                partitions.create_partition(connection, month)
+        copy_points(rows)
+    else:
+        PricePoint.objects.bulk_create(
+            [PricePoint(asset_id=asset_id, price=_price(price), timestamp=ts) for asset_id, price, ts in rows],
+            batch_size=batch_size,
+        )
+    return len(rows)
+
+
+def commit_chunk(asset, checkpoint, rows, end: datetime, batch_size: int) -> int:
+    """
+    Merge one time-ordered chunk into the candles, store the part inside raw
+    retention as PricePoints and advance the checkpoint, atomically.
+    Returns the number of rows in the chunk.
+    """
+    with transaction.atomic():
+        if rows:
+            # Chunks arrive oldest first, so a bucket straddling the previous
+            # chunk continues it (merge_series keeps that bucket's open)
+            times = pd.DatetimeIndex([ts for _, _, ts in rows])
+            merge_series(asset.pk, times, [price for _, price, _ in rows], candle_cutoffs(), batch_size)
+            cutoff = raw_cutoffs()[asset.asset_type]
+            write_points([row for row in rows if row[2] >= cutoff], batch_size)
+        checkpoint.backfilled_until = end
+        checkpoint.save(update_fields=['backfilled_until', 'updated_at'])
+    return len(rows)
+
+
+def _finish(checkpoint):
+    checkpoint.completed = True
+    checkpoint.save(update_fields=['completed', 'updated_at'])
+
+
+def backfill_upstream(asset, start: datetime, chunk_days: int = DEFAULT_CHUNK_DAYS,
+                      batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Pull asset's upstream history from start up to its first live data,
+    chunk_days at a time, paced by the provider's shared rate limit.
+    Returns the number of points backfilled by this run.
+    """
+    checkpoint = checkpoint_for(asset, UPSTREAM)
+    if checkpoint.completed:
+        return 0
+
+    adapter = get_adapter(asset.asset_type)
+    limit = get_shared_limit(asset.asset_type)
+    cursor = max(start, checkpoint.backfilled_until or start)
+    total = 0
+    while cursor < checkpoint.end:
+        chunk_end = min(cursor + timedelta(days=chunk_days), checkpoint.end)
+        limit.acquire()
+        times, values = adapter.get_history_range(asset.symbol, cursor, chunk_end, identifier=asset.api_identifier)
+        rows = [(asset.pk, value, ts) for ts, value in zip(times.to_pydatetime(), values)]
+        total += commit_chunk(asset, checkpoint, rows, chunk_end, batch_size)
+        logger.info(f"Backfilled {asset.symbol} {cursor:%Y-%m-%d}..{chunk_end:%Y-%m-%d}: {len(rows)} points")
+        cursor = chunk_end
+
+    _finish(checkpoint)
+    return total
+
+
+def read_file(path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Stream (symbol, timestamp, price) DataFrames from a CSV or Parquet file."""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Reading Parquet files requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=FILE_COLUMNS):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=FILE_COLUMNS, chunksize=batch_size)
+
+
+def backfill_file(path: str, assets, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Import a file with symbol,timestamp,price columns (sorted by timestamp)
+    for the given assets. Returns {symbol: points backfilled by this run}.
+    """
+    source = f'file:{os.path.basename(path)}'
+    by_symbol = {asset.symbol: asset for asset in assets}
+    checkpoints = {}
+    written = {}
+
+    for frame in read_file(path, batch_size):
+        frame = frame[frame['symbol'].isin(by_symbol)]
+        frame = frame.assign(timestamp=pd.to_datetime(frame['timestamp'], utc=True))
+        for symbol, group in frame.groupby('symbol'):
+            asset = by_symbol[symbol]
+            if symbol not in checkpoints:
+                checkpoints[symbol] = checkpoint_for(asset, source)
+            checkpoint = checkpoints[symbol]
+            if checkpoint.completed:
+                continue
+
+            keep = group['timestamp'] < checkpoint.end
+            if checkpoint.backfilled_until:
+                keep &= group['timestamp'] >= checkpoint.backfilled_until
+            group = group[keep]
+            if group.empty:
+                continue
+
+            times = group['timestamp'].dt.to_pydatetime()
+            rows = [(asset.pk, float(price), ts) for ts, price in zip(times, group['price'])]
+            # Resume just after the newest row of this batch
+            end = times.max() + timedelta(microseconds=1)
+            written[symbol] = written.get(symbol, 0) + commit_chunk(asset, checkpoint, rows, end, batch_size)
+
+    for checkpoint in checkpoints.values():
+        if not checkpoint.completed:
+            _finish(checkpoint)
+    return written
@@ -0,0 +1,163 @@
+"""
+Per-provider circuit breakers.
+
+Every upstream call for a provider (asset type) goes through its breaker,
+which also records its latency and errors (assets.metrics).
+Failed calls and calls slower than slow_call_seconds count as bad; once the
+bad share of the recent window reaches failure_rate the circuit opens and
+calls fail fast with CircuitOpen, so callers can serve last-known-good data
+instead of waiting on a dead upstream. After open_seconds a limited number of
+half-open probe calls decide whether to close it again.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Override per asset type with settings.CIRCUIT_BREAKERS
+DEFAULT_BREAKER_POLICY = {
+    'window': 20,              # recent calls considered
+    'min_calls': 5,            # calls needed in the window before it can trip
+    'failure_rate': 0.5,       # bad share of the window that opens the circuit
+    'slow_call_seconds': 5.0,  # successful calls slower than this count as bad
+    'open_seconds': 30.0,      # time before half-open probes are let through
+    'half_open_calls': 1,      # concurrent probes while half-open
+}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the provider while its circuit is open."""
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker driven by error rate and latency."""
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float,
+                 slow_call_seconds: float, open_seconds: float, half_open_calls: int):
+        self.name = name
+        self.min_calls = max(1, int(min_calls))
+        self.failure_rate = float(failure_rate)
+        self.slow_call_seconds = float(slow_call_seconds)
+        self.open_seconds = float(open_seconds)
+        self.half_open_calls = max(1, int(half_open_calls))
+        self.outcomes = deque(maxlen=max(1, int(window)))
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes = 0
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are rejected outright (before half-open probing)."""
+        with self.lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.open_seconds
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self.state, self.probes = HALF_OPEN, 0
+
+            if self.state == HALF_OPEN:
+                if self.probes >= self.half_open_calls:
+                    return False
+                self.probes += 1
+            return True
+
+    def record(self, ok: bool, seconds: float):
+        bad = not ok or seconds > self.slow_call_seconds
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probes = max(0, self.probes - 1)
+                if bad:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self.outcomes.clear()
+                    logger.info(f"Circuit {self.name} closed")
+                return
+
+            self.outcomes.append(bad)
+            if len(self.outcomes) >= self.min_calls and sum(self.outcomes) / len(self.outcomes) >= self.failure_rate:
+                self._open()
+
+    def release(self):
+        """Give back a half-open probe slot for a call that was cancelled."""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probes = max(0, self.probes - 1)
+
+    def _open(self):
+        if self.state != OPEN:
+            logger.warning(f"Circuit {self.name} opened")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+
+    def _before_call(self):
+        if not self.allow():
+            metrics.CIRCUIT_REJECTED.labels(provider=self.name).inc()
+            raise CircuitOpen(f"{self.name} circuit is open")
+        return time.monotonic()
+
+    def _finish(self, func, started: float, error: Exception = None):
+        seconds = time.monotonic() - started
+        self.record(error is None, seconds)
+        metrics.record_upstream_call(self.name, func, seconds, error)
+
+    def call(self, func, *args, **kwargs):
+        started = self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._finish(func, started, e)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self._finish(func, started)
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        """call() for a coroutine function."""
+        started = self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            self._finish(func, started, e)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self._finish(func, started)
+        return result
+
+
+# Breakers are process-wide, like the ingestion token buckets
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker_policy(asset_type: str) -> dict:
+    overrides = getattr(settings, 'CIRCUIT_BREAKERS', {}).get(asset_type, {})
+    return {**DEFAULT_BREAKER_POLICY, **overrides}
+
+
+def get_breaker(asset_type: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(asset_type)
+        if breaker is None:
+            breaker = CircuitBreaker(asset_type, **get_breaker_policy(asset_type))
+            _breakers[asset_type] = breaker
+        return breaker
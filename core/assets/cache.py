@@ -0,0 +1,228 @@
+"""
+Shared cache for adapter history and details results.
+
+Entries are stored with a "fresh until" time. Fresh entries are served
+directly; stale ones are still served while one revalidation task on the
+running loop refreshes them. Concurrent misses for the same key are
+collapsed into a single upstream fetch behind a cache lock (SET NX on Redis).
+Only the async views read through this cache, so loaders are coroutine
+functions.
+
+Upstream calls go through the provider circuit breakers (assets.breaker);
+while a provider is down, callers get last-known-good data flagged stale.
+"""
+import asyncio
+import logging
+import time
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from . import metrics
+from .adapters import get_adapter, columnar_history, shape_history
+from .breaker import get_breaker
+from .downsampling import downsample_series
+from .rollups import candle_series
+
+logger = logging.getLogger(__name__)
+
+# Seconds an entry is considered fresh, per period
+HISTORY_TTLS = {
+    '1d': 60,
+    '5d': 5 * 60,
+    '1mo': 15 * 60,
+    '1y': 3 * 60 * 60,
+    'ytd': 3 * 60 * 60,
+    '5y': 6 * 60 * 60,
+    'max': 6 * 60 * 60,
+}
+DEFAULT_TTL = 60
+
+# Empty results usually mean the upstream failed; don't pin them for long
+EMPTY_TTL = 15
+
+LOCK_TTL = 30
+
+# Last good details per asset are kept this long for the stale fallback
+DETAILS_LAST_GOOD_TTL = 24 * 60 * 60
+UNAVAILABLE_DETAILS = {'market_cap': 'N/A', 'volume': 'N/A'}
+
+
+def history_ttl(period: str) -> int:
+    return getattr(settings, 'HISTORY_CACHE_TTLS', HISTORY_TTLS).get(period, DEFAULT_TTL)
+
+
+def history_key(asset_id, period: str) -> str:
+    return f'history:{asset_id}:{period}'
+
+
+def _is_empty(data) -> bool:
+    if isinstance(data, dict):
+        return not len(data['v'])
+    return not data
+
+
+def _envelope(data, ttl: int):
+    """(cache value, cache timeout) for data with a freshness window of ttl."""
+    fresh_for = min(ttl, EMPTY_TTL) if _is_empty(data) else ttl
+    stale_for = ttl * getattr(settings, 'HISTORY_CACHE_STALE_FACTOR', 4)
+    return {'data': data, 'fresh_until': time.time() + fresh_for}, fresh_for + stale_for
+
+
+def _count(key: str, result: str):
+    metrics.CACHE_REQUESTS.labels(cache=key.split(':', 1)[0], result=result).inc()
+
+
+class CacheWaitTimeout(Exception):
+    """Raised when another worker's fetch of a missing key did not finish in time."""
+
+
+_revalidate_tasks = set()
+
+
+def _failed_key(key: str) -> str:
+    return f'{key}:failed'
+
+
+async def _arevalidate(key: str, lock_key: str, loader, ttl: int):
+    try:
+        await cache.aset(key, *_envelope(await loader(), ttl))
+        await cache.adelete(_failed_key(key))
+    except Exception as e:
+        logger.warning(f"History revalidation failed for {key}: {e}")
+        # Until a revalidation succeeds, the stale copy is served flagged as such
+        await cache.aset(_failed_key(key), 1, ttl)
+    finally:
+        await cache.adelete(lock_key)
+
+
+async def aget_or_fetch(key: str, loader, ttl: int, wait: float = None, unavailable=None):
+    """
+    Return (value, stale) for key, awaiting loader() at most once across all
+    processes when it is missing. Stale values are returned immediately and
+    refreshed in the background; stale is True when the last refresh failed
+    or unavailable() (e.g. an open circuit breaker) says it cannot succeed.
+    Raises CacheWaitTimeout rather than calling loader() itself when another
+    worker's fetch takes longer than wait.
+    """
+    lock_key = f'{key}:lock'
+    envelope = await cache.aget(key)
+    if envelope is not None:
+        if envelope['fresh_until'] > time.time():
+            _count(key, 'hit')
+            return envelope['data'], False
+        _count(key, 'stale')
+        if await cache.aadd(lock_key, 1, LOCK_TTL):
+            task = asyncio.create_task(_arevalidate(key, lock_key, loader, ttl))
+            _revalidate_tasks.add(task)
+            task.add_done_callback(_revalidate_tasks.discard)
+        failing = (unavailable is not None and unavailable()) or await cache.aget(_failed_key(key)) is not None
+        return envelope['data'], failing
+
+    if await cache.aadd(lock_key, 1, LOCK_TTL):
+        _count(key, 'miss')
+        try:
+            data = await loader()
+            await cache.aset(key, *_envelope(data, ttl))
+            return data, False
+        finally:
+            await cache.adelete(lock_key)
+
+    wait = getattr(settings, 'HISTORY_CACHE_WAIT', 10.0) if wait is None else wait
+    deadline = time.time() + wait
+    delay = 0.05
+    while time.time() < deadline:
+        await asyncio.sleep(delay)
+        envelope = await cache.aget(key)
+        if envelope is not None:
+            _count(key, 'wait')
+            return envelope['data'], False
+        delay = min(delay * 2, 0.5)
+
+    # Loading here as well would let every waiter through to the provider
+    _count(key, 'timeout')
+    raise CacheWaitTimeout(f"Timed out waiting for {key}")
+
+
+def pack_series(times: pd.DatetimeIndex, values) -> dict:
+    """A full-resolution (times, values) series as the cached {'t', 'v', 'tz'} arrays."""
+    return {**columnar_history(times, values), 'tz': str(times.tz or 'UTC')}
+
+
+def unpack_series(data: dict):
+    """pack_series() back to (times in their original zone, values)."""
+    times = pd.DatetimeIndex(data['t'].astype('datetime64[s]')).tz_localize('UTC').tz_convert(data['tz'])
+    return times, np.asarray(data['v'], dtype=np.float64)
+
+
+def render_series(asset, period: str, times, values, fmt: str = 'points', points: int = None):
+    """Downsample a series to points (LTTB) and shape it as fmt."""
+    times, values = downsample_series(times, values, points)
+    if fmt == 'columnar':
+        return columnar_history(times, values)
+    return shape_history(times, values, get_adapter(asset.asset_type).label_period(period))
+
+
+def local_history(asset, period: str, fmt: str = 'points', points: int = None):
+    """
+    History rebuilt from the local candle rollups: the last-known-good
+    fallback while a provider is failing or its circuit is open.
+    """
+    return render_series(asset, period, *candle_series(asset, period), fmt, points)
+
+
+async def aget_history(asset, period: str, fmt: str = 'points', points: int = None):
+    """
+    Cached history for an Asset, as (data, stale).
+    fmt 'points' is adapter.get_history(); 'columnar' is {'t': epochs, 'v': prices} arrays.
+    points, when given, downsamples the series to at most that many points (LTTB).
+    The full-resolution series is cached once per (asset, period) and every
+    format and points value is rendered from it, so neither causes an
+    upstream fetch of its own.
+    Upstream fetches go through the provider's circuit breaker; if the fetch
+    fails or the circuit is open, data is local_history() and stale is True.
+    A cached copy served past its freshness while the provider is failing is
+    flagged stale too.
+    """
+    adapter = get_adapter(asset.asset_type)
+    breaker = get_breaker(asset.asset_type)
+
+    async def loader():
+        return pack_series(*await breaker.acall(
+            adapter.aget_history_series, asset.symbol, period, identifier=asset.api_identifier
+        ))
+
+    try:
+        series, stale = await aget_or_fetch(
+            history_key(asset.pk, period), loader, history_ttl(period), unavailable=lambda: breaker.is_open,
+        )
+    except Exception as e:
+        logger.warning(f"Serving local history for {asset.symbol} {period}: {e}")
+        metrics.FALLBACKS.labels(provider=asset.asset_type, kind='history').inc()
+        return await sync_to_async(local_history)(asset, period, fmt, points), True
+    return render_series(asset, period, *unpack_series(series), fmt, points), stale
+
+
+def details_key(asset_id) -> str:
+    return f'details:{asset_id}'
+
+
+async def aget_details(asset):
+    """
+    Adapter details for an Asset as (details, stale), through the provider's
+    circuit breaker. Every good result is kept as the last-known-good copy
+    that is served, with stale True, while the provider is unavailable.
+    """
+    adapter = get_adapter(asset.asset_type)
+    try:
+        details = await get_breaker(asset.asset_type).acall(
+            adapter.aget_details, asset.symbol, identifier=asset.api_identifier
+        )
+    except Exception as e:
+        logger.warning(f"Serving last known details for {asset.symbol}: {e}")
+        metrics.FALLBACKS.labels(provider=asset.asset_type, kind='details').inc()
+        return await cache.aget(details_key(asset.pk), UNAVAILABLE_DETAILS), True
+
+    await cache.aset(details_key(asset.pk), details, DETAILS_LAST_GOOD_TTL)
+    return details, False
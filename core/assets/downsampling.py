@@ -0,0 +1,53 @@
+"""
+Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013).
+
+Keeps the visual shape of a series with far fewer points: the first and last
+points are kept, the rest is split into equal buckets and from each bucket the
+point forming the largest triangle with the previously kept point and the
+average of the next bucket is chosen.
+"""
+import numpy as np
+
+
+def lttb_indices(x, y, threshold: int) -> np.ndarray:
+    """Indices of the points LTTB keeps from (x, y) (sorted by x)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket edges over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        px, py = x[previous], y[previous]
+        areas = np.abs(
+            (px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py)
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def downsample_series(times, values, threshold: int):
+    """Apply LTTB to a (DatetimeIndex, ndarray) history series."""
+    if not threshold or len(times) <= threshold:
+        return times, values
+    x = times.values.astype('datetime64[ms]').astype(np.int64)
+    idx = lttb_indices(x, values, threshold)
+    return times[idx], np.asarray(values)[idx]
@@ -0,0 +1,62 @@
+"""
+Data generation counters.
+
+Each resource ('prices', 'market_summary', 'news') has a counter in the shared
+cache that its ingestion task bumps whenever it writes new data. Read
+endpoints derive ETag / Last-Modified from it, so an unchanged resource can be
+answered with 304 before any query or upstream call runs.
+
+A counter that has to start over (first use, or the cache was flushed or
+evicted it) starts from the current time in milliseconds rather than 1.
+Counters move by one per write, far slower than the clock, so a restarted
+counter is always past every value handed out before and an old ETag can
+never match again.
+
+The asset list and detail responses also show Asset rows, so saving or
+deleting an Asset bumps 'prices' too (asset_changed, connected in
+AssetsConfig.ready). Bulk writes that skip model signals must bump it
+themselves.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+PRICES = 'prices'
+MARKET_SUMMARY = 'market_summary'
+NEWS = 'news'
+
+
+def _keys(resource: str):
+    return f'generation:{resource}', f'generation:{resource}:modified'
+
+
+def _initial_generation() -> int:
+    return int(time.time() * 1000)
+
+
+def get_generation(resource: str):
+    """Returns (generation, last_modified epoch seconds) for resource."""
+    gen_key, modified_key = _keys(resource)
+    values = cache.get_many([gen_key, modified_key])
+    if gen_key not in values or modified_key not in values:
+        # First use (or cache flushed): start a new generation now
+        cache.add(gen_key, _initial_generation(), None)
+        cache.add(modified_key, time.time(), None)
+        values = cache.get_many([gen_key, modified_key])
+    return values[gen_key], values[modified_key]
+
+
+def bump_generation(resource: str) -> int:
+    gen_key, modified_key = _keys(resource)
+    try:
+        generation = cache.incr(gen_key)
+    except ValueError:
+        generation = _initial_generation()
+        cache.set(gen_key, generation, None)
+    cache.set(modified_key, time.time(), None)
+    return generation
+
+
+def asset_changed(sender, **kwargs):
+    """post_save / post_delete receiver for Asset: retire cached asset responses once committed."""
+    transaction.on_commit(lambda: bump_generation(PRICES))
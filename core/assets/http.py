@@ -0,0 +1,83 @@
+"""
+Process-wide pooled HTTP sessions for upstream providers.
+
+One requests.Session per provider keeps connections alive between calls (no
+TLS handshake per request), with a pool sized for that provider and explicit
+(connect, read) timeouts so a hung upstream cannot hold a worker forever.
+The async views use the same policy through get_async_client.
+"""
+import asyncio
+import threading
+import weakref
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HTTP_POLICY = {
+    'pool_size': 10,
+    'connect_timeout': 3.05,
+    'read_timeout': 10,
+    'retries': 2,
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# httpx clients are bound to the event loop they were first used on
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_http_policy(provider: str) -> dict:
+    overrides = getattr(settings, 'HTTP_PROVIDERS', {}).get(provider, {})
+    return {**DEFAULT_HTTP_POLICY, **overrides}
+
+
+def get_timeout(provider: str) -> tuple:
+    policy = get_http_policy(provider)
+    return (policy['connect_timeout'], policy['read_timeout'])
+
+
+def get_session(provider: str) -> requests.Session:
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            policy = get_http_policy(provider)
+            retries = Retry(
+                total=policy['retries'],
+                backoff_factor=0.5,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=['GET'],
+            )
+            adapter = HTTPAdapter(
+                pool_connections=policy['pool_size'],
+                pool_maxsize=policy['pool_size'],
+                max_retries=retries,
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[provider] = session
+        return session
+
+
+def get_async_client(provider: str) -> httpx.AsyncClient:
+    """
+    Pooled httpx.AsyncClient for provider on the running event loop.
+    Connection failures are retried; HTTP error statuses are not.
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(provider)
+    if client is None:
+        policy = get_http_policy(provider)
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(policy['read_timeout'], connect=policy['connect_timeout']),
+            limits=httpx.Limits(
+                max_connections=policy['pool_size'],
+                max_keepalive_connections=policy['pool_size'],
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=policy['retries']),
+        )
+        clients[provider] = client
+    return client
@@ -0,0 +1,216 @@
+"""
+Concurrent price ingestion.
+
+Each provider (asset type) gets its own small thread pool so a slow upstream
+only delays its own assets. Calls to a provider are capped by its pool size
+and paced by a token bucket, so a tick costs roughly the time of the slowest
+provider instead of the sum of all of them.
+Calls also go through the provider's circuit breaker: while it is open a
+provider's batches fail fast and its assets keep their last price.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .adapters import get_adapter
+from .breaker import CircuitOpen, get_breaker
+
+logger = logging.getLogger(__name__)
+
+# Conservative defaults; override per asset type with settings.INGESTION_PROVIDERS.
+# rate is in calls per second, burst is the bucket size, batch_size is how many
+# assets go into one get_prices() call.
+DEFAULT_PROVIDER_POLICY = {
+    'max_concurrency': 2,
+    'rate': 1.0,
+    'burst': 2,
+    'batch_size': 100,
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available
+    or the timeout expires.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class SharedRateLimit:
+    """
+    Rate limit shared by every process through the cache: at most capacity
+    calls per window of capacity / rate seconds, counted with cache.incr on
+    a key per window. Fixed windows can let up to twice capacity through
+    around a window edge, which the providers' own limits tolerate.
+    Same acquire() as TokenBucket.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: int):
+        self.name = name
+        self.capacity = max(1, int(capacity))
+        self.window = self.capacity / float(rate) if rate > 0 else 1.0
+
+    def acquire(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.time()
+            index = int(now // self.window)
+            key = f'ratelimit:{self.name}:{index}'
+            cache.add(key, 0, int(self.window) + 60)
+            try:
+                if cache.incr(key) <= self.capacity:
+                    return True
+            except ValueError:
+                continue  # the window key expired in between; take the next one
+            wait = (index + 1) * self.window - now
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+# Buckets live for the lifetime of the worker process so the rate limit
+# holds across ticks, not just within one.
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_provider_policy(asset_type: str) -> dict:
+    overrides = getattr(settings, 'INGESTION_PROVIDERS', {}).get(asset_type, {})
+    return {**DEFAULT_PROVIDER_POLICY, **overrides}
+
+
+def get_bucket(asset_type: str) -> TokenBucket:
+    with _buckets_lock:
+        bucket = _buckets.get(asset_type)
+        if bucket is None:
+            policy = get_provider_policy(asset_type)
+            bucket = TokenBucket(policy['rate'], policy['burst'])
+            _buckets[asset_type] = bucket
+        return bucket
+
+
+def get_shared_limit(asset_type: str) -> SharedRateLimit:
+    """The provider's rate policy enforced across processes (backfills running side by side)."""
+    policy = get_provider_policy(asset_type)
+    return SharedRateLimit(asset_type, policy['rate'], policy['burst'])
+
+
+class IngestionExecutor:
+    """
+    Runs adapter.get_prices() for every provider concurrently.
+
+    run() returns (prices, report) where prices is {symbol: Decimal} across all
+    providers and report is {asset_type: {'seconds', 'assets', 'calls', 'errors', 'circuit'}}.
+    """
+
+    def __init__(self, acquire_timeout: float = None):
+        self.acquire_timeout = acquire_timeout
+        if self.acquire_timeout is None:
+            self.acquire_timeout = getattr(settings, 'INGESTION_ACQUIRE_TIMEOUT', 30.0)
+
+    def run(self, assets):
+        by_type = defaultdict(list)
+        for asset in assets:
+            by_type[asset.asset_type].append(asset)
+
+        prices = {}
+        report = {}
+        if not by_type:
+            return prices, report
+
+        with ThreadPoolExecutor(max_workers=len(by_type)) as pool:
+            futures = {
+                pool.submit(self._run_provider, asset_type, group): asset_type
+                for asset_type, group in by_type.items()
+            }
+            for future in as_completed(futures):
+                asset_type = futures[future]
+                provider_prices, provider_report = future.result()
+                prices.update(provider_prices)
+                report[asset_type] = provider_report
+
+        return prices, report
+
+    def _run_provider(self, asset_type, assets):
+        started = time.perf_counter()
+        policy = get_provider_policy(asset_type)
+        batch_size = max(1, int(policy['batch_size']))
+        batches = [assets[i:i + batch_size] for i in range(0, len(assets), batch_size)]
+
+        prices = {}
+        errors = 0
+        try:
+            adapter = get_adapter(asset_type)
+        except Exception as e:
+            logger.error(f"No adapter for {asset_type}: {str(e)}")
+            batches, errors = [], len(batches)
+
+        breaker = get_breaker(asset_type)
+        if batches:
+            bucket = get_bucket(asset_type)
+            with ThreadPoolExecutor(max_workers=max(1, int(policy['max_concurrency']))) as pool:
+                futures = [pool.submit(self._fetch_batch, adapter, bucket, breaker, batch) for batch in batches]
+                for future in as_completed(futures):
+                    try:
+                        prices.update(future.result())
+                    except CircuitOpen as e:
+                        errors += 1
+                        logger.warning(f"Skipping {asset_type} batch, keeping last prices: {str(e)}")
+                    except Exception as e:
+                        errors += 1
+                        logger.error(f"Error updating {asset_type} prices: {str(e)}")
+
+        return prices, {
+            'seconds': round(time.perf_counter() - started, 3),
+            'assets': len(assets),
+            'calls': len(batches),
+            'errors': errors,
+            'circuit': breaker.state,
+        }
+
+    def _fetch_batch(self, adapter, bucket, breaker, batch):
+        # Fail fast without spending a rate-limit token
+        if breaker.is_open:
+            metrics.CIRCUIT_REJECTED.labels(provider=breaker.name).inc()
+            raise CircuitOpen(f"{breaker.name} circuit is open")
+        if not bucket.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError("Rate limit budget exhausted for this tick")
+        return breaker.call(adapter.get_prices, batch)
@@ -0,0 +1,60 @@
+"""
+Management command to backfill historical prices for assets into the candle
+rollups (and raw PricePoints inside raw retention), from their upstream
+providers or from a local CSV/Parquet file.
+Progress is checkpointed per asset, so re-running resumes an interrupted
+backfill; it can run alongside the live ingestion.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from assets.models import Asset
+from assets.backfill import DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_DAYS, backfill_file, backfill_upstream
+
+
+class Command(BaseCommand):
+    help = 'Backfills historical candles (and recent price points) before each asset\'s live data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', help='Limit to these symbols (default: all assets)')
+        parser.add_argument('--file', help='Import from a CSV or Parquet file with symbol,timestamp,price columns')
+        parser.add_argument('--start', help='Earliest date to pull from upstream, YYYY-MM-DD (default: one year ago)')
+        parser.add_argument('--chunk-days', type=int, default=DEFAULT_CHUNK_DAYS, help='Days per upstream request')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per write batch')
+
+    def handle(self, *args, **options):
+        assets = Asset.objects.all()
+        if options['symbols']:
+            assets = assets.filter(symbol__in=options['symbols'])
+
+        if options['file']:
+            try:
+                written = backfill_file(options['file'], assets, batch_size=options['batch_size'])
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+            for symbol, count in sorted(written.items()):
+                self.stdout.write(f'{symbol}: {count} history points')
+            self.stdout.write(self.style.SUCCESS(f'\nBackfill complete! {sum(written.values())} history points backfilled'))
+            return
+
+        if options['start']:
+            try:
+                start = datetime.strptime(options['start'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+            except ValueError:
+                raise CommandError('--start must be YYYY-MM-DD')
+        else:
+            start = datetime.now(dt_timezone.utc) - timedelta(days=365)
+
+        total = 0
+        for asset in assets:
+            try:
+                written = backfill_upstream(
+                    asset, start, chunk_days=options['chunk_days'], batch_size=options['batch_size']
+                )
+            except Exception as e:
+                # The checkpoint keeps every committed chunk; re-run to resume
+                self.stderr.write(self.style.ERROR(f'{asset.symbol}: stopped ({e})'))
+                continue
+            total += written
+            self.stdout.write(f'{asset.symbol}: {written} history points')
+
+        self.stdout.write(self.style.SUCCESS(f'\nBackfill complete! {total} history points backfilled'))
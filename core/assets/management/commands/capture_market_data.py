@@ -0,0 +1,80 @@
+"""
+Management command to record live adapter responses as NDJSON, for
+MARKET_DATA_SOURCE='replay' (see assets.simulated).
+Each line is one response: {"t", "asset_type", "method", ["symbol", "period",] "result"}.
+Calls are paced by the ingestion token buckets, like the live task.
+"""
+import json
+import time
+from django.core.management.base import BaseCommand
+from assets.adapters import ADAPTER_CLASSES, columnar_history
+from assets.ingestion import get_bucket, get_provider_policy
+from assets.models import Asset
+
+
+class Command(BaseCommand):
+    help = 'Records live price, history and details responses to an NDJSON file for replay'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='NDJSON file to write')
+        parser.add_argument('symbols', nargs='*', help='Limit to these symbols (default: all assets)')
+        parser.add_argument('--ticks', type=int, default=30, help='Price snapshots to record')
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds between price snapshots')
+        parser.add_argument('--periods', nargs='*', default=['1d', '5d', '1mo', '1y'],
+                            help='History periods to record once per asset')
+        parser.add_argument('--details', action='store_true', help='Also record details once per asset')
+
+    def handle(self, *args, **options):
+        assets = Asset.objects.all()
+        if options['symbols']:
+            assets = assets.filter(symbol__in=options['symbols'])
+        by_type = {}
+        for asset in assets:
+            by_type.setdefault(asset.asset_type, []).append(asset)
+        # Always the live adapters, whatever MARKET_DATA_SOURCE says
+        adapters = {asset_type: ADAPTER_CLASSES[asset_type]() for asset_type in by_type}
+
+        with open(options['output'], 'w') as out:
+            def write(asset_type, method, result, **fields):
+                out.write(json.dumps({'t': time.time(), 'asset_type': asset_type, 'method': method, **fields,
+                                      'result': result}) + '\n')
+
+            for asset_type, group in by_type.items():
+                for asset in group:
+                    for period in options['periods']:
+                        self._record(write, adapters[asset_type], asset_type, 'get_history_series', asset, period=period)
+                    if options['details']:
+                        self._record(write, adapters[asset_type], asset_type, 'get_details', asset)
+
+            for tick in range(options['ticks']):
+                started = time.monotonic()
+                for asset_type, group in by_type.items():
+                    batch_size = max(1, int(get_provider_policy(asset_type)['batch_size']))
+                    for i in range(0, len(group), batch_size):
+                        get_bucket(asset_type).acquire()
+                        try:
+                            prices = adapters[asset_type].get_prices(group[i:i + batch_size])
+                        except Exception as e:
+                            self.stderr.write(f'{asset_type} prices: {e}')
+                            continue
+                        write(asset_type, 'get_prices', {symbol: str(price) for symbol, price in prices.items()})
+                out.flush()
+                self.stdout.write(f'Tick {tick + 1}/{options["ticks"]} recorded')
+                if tick + 1 < options['ticks']:
+                    time.sleep(max(0.0, options['interval'] - (time.monotonic() - started)))
+
+        self.stdout.write(self.style.SUCCESS(f'\nCapture complete! Written to {options["output"]}'))
+
+    def _record(self, write, adapter, asset_type, method, asset, period=None):
+        get_bucket(asset_type).acquire()
+        try:
+            if method == 'get_history_series':
+                times, values = adapter.get_history_series(asset.symbol, period, identifier=asset.api_identifier)
+                columns = columnar_history(times, values)
+                write(asset_type, method, {'t': columns['t'].tolist(), 'v': columns['v'].tolist()},
+                      symbol=asset.symbol, period=period)
+            else:
+                write(asset_type, method, adapter.get_details(asset.symbol, identifier=asset.api_identifier),
+                      symbol=asset.symbol)
+        except Exception as e:
+            self.stderr.write(f'{asset.symbol} {method}: {e}')
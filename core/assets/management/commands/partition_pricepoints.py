@@ -0,0 +1,80 @@
+"""
+Management command to convert the PricePoint table into a monthly range
+partitioned table (PostgreSQL only). Run once during a maintenance window,
+then set PRICEPOINT_PARTITIONING=True so retention drops whole months.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from assets import partitions
+
+TABLE = partitions.TABLE
+LEGACY = f'{TABLE}_unpartitioned'
+SEQUENCE = f'{TABLE}_part_id_seq'
+
+
+class Command(BaseCommand):
+    help = 'Converts assets_pricepoint into a monthly range-partitioned table (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-legacy', action='store_true', help=f'Keep the old table as {LEGACY}')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning is only supported on PostgreSQL.')
+        if partitions.is_partitioned(connection):
+            self.stdout.write('Already partitioned, ensuring upcoming partitions exist.')
+            partitions.ensure_partitions(connection, timezone.now())
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Existing secondary indexes are recreated under their original
+            # names so later Django migrations still find them.
+            cursor.execute(
+                "SELECT i.indexname, i.indexdef FROM pg_indexes i "
+                "WHERE i.tablename = %s AND i.indexname NOT IN ("
+                "  SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p')",
+                [TABLE, TABLE],
+            )
+            indexes = cursor.fetchall()
+
+            cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY}"')
+            for name, _ in indexes:
+                cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_legacy"')
+
+            cursor.execute(f'''
+                CREATE TABLE "{TABLE}" (
+                    "id" bigint NOT NULL,
+                    "price" numeric(20, 4) NOT NULL,
+                    "timestamp" timestamp with time zone NOT NULL,
+                    "asset_id" bigint NOT NULL
+                        REFERENCES "assets_asset" ("id") DEFERRABLE INITIALLY DEFERRED,
+                    PRIMARY KEY ("id", "timestamp")
+                ) PARTITION BY RANGE ("timestamp")
+            ''')
+            cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}"."id"')
+            cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN "id" SET DEFAULT nextval(\'"{SEQUENCE}"\')')
+            for name, definition in indexes:
+                cursor.execute(definition.replace(f' ON public.{LEGACY} ', f' ON public.{TABLE} ')
+                               .replace(f' ON {LEGACY} ', f' ON {TABLE} '))
+
+            cursor.execute(f'SELECT MIN("timestamp") FROM "{LEGACY}"')
+            oldest = cursor.fetchone()[0] or timezone.now()
+            month = partitions.month_start(oldest)
+            while month <= partitions.month_start(timezone.now()):
+                partitions.create_partition(connection, month)
+                month = partitions.add_months(month, 1)
+            partitions.ensure_partitions(connection, timezone.now())
+
+            cursor.execute(
+                f'INSERT INTO "{TABLE}" ("id", "price", "timestamp", "asset_id") '
+                f'SELECT "id", "price", "timestamp", "asset_id" FROM "{LEGACY}"'
+            )
+            cursor.execute(f'SELECT setval(\'"{SEQUENCE}"\', COALESCE(MAX("id"), 0) + 1, false) FROM "{TABLE}"')
+
+            if not options['keep_legacy']:
+                cursor.execute(f'DROP TABLE "{LEGACY}"')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nPartitioning complete! Set PRICEPOINT_PARTITIONING=True to enable partition retention.'
+        ))
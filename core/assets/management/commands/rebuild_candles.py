@@ -0,0 +1,27 @@
+"""
+Management command to (re)build OHLC candle rollups from raw PricePoints.
+Needed once for data recorded before rollups existed, and after backfills.
+"""
+from django.core.management.base import BaseCommand
+from assets.models import Asset
+from assets.rollups import rebuild_candles
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds 1m/1h/1d candles from raw price points'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', help='Limit to these symbols (default: all assets)')
+
+    def handle(self, *args, **options):
+        assets = Asset.objects.all()
+        if options['symbols']:
+            assets = assets.filter(symbol__in=options['symbols'])
+
+        total = 0
+        for asset in assets:
+            written = rebuild_candles(asset)
+            total += written
+            self.stdout.write(f'{asset.symbol}: {written} candles')
+
+        self.stdout.write(self.style.SUCCESS(f'\nRebuild complete! {total} candles written'))
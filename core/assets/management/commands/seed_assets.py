@@ -1,15 +1,27 @@
 """
 Management command to seed initial asset data for the Asset model.
 This populates the database with stocks and crypto assets.
+With --simulated N it adds N synthetic assets instead, for load tests with
+MARKET_DATA_SOURCE='simulated'.
 """
 from django.core.management.base import BaseCommand
 from assets.models import Asset
 
+SIMULATED_PREFIXES = {'CRYPTO': 'SIMC', 'STOCK_GLOBAL': 'SIMG', 'STOCK_DSE': 'SIMD'}
+
 
 class Command(BaseCommand):
     help = 'Seeds the database with initial asset data (stocks and crypto)'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--simulated', type=int, metavar='N',
+                            help='Create N synthetic assets spread over the asset types')
+
     def handle(self, *args, **options):
+        if options['simulated']:
+            self.seed_simulated(options['simulated'])
+            return
+
         # Define initial assets to seed
         assets_data = [
             # Global Stocks
@@ -68,3 +80,16 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(
             f'\nSeed complete! Created: {created_count}, Updated: {updated_count}'
         ))
+
+    def seed_simulated(self, count):
+        types = list(SIMULATED_PREFIXES)
+        assets = []
+        for i in range(count):
+            asset_type = types[i % len(types)]
+            symbol = f'{SIMULATED_PREFIXES[asset_type]}{i:06d}'
+            assets.append(Asset(
+                symbol=symbol, name=f'Simulated {symbol}', asset_type=asset_type,
+                api_identifier=symbol.lower() if asset_type == 'CRYPTO' else symbol,
+            ))
+        created = Asset.objects.bulk_create(assets, batch_size=5000, ignore_conflicts=True)
+        self.stdout.write(self.style.SUCCESS(f'\nSeed complete! {len(created)} simulated assets'))
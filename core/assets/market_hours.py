@@ -0,0 +1,129 @@
+"""
+Exchange trading calendar for the ingestion scheduler.
+
+Stocks are only fetched while their venue is in session, plus one
+settlement fetch a few minutes after each close so the official closing
+price is captured. Crypto trades around the clock and is always due.
+
+Venues come from the asset type and, for global stocks, the yfinance symbol
+suffix (AAPL -> US, VOD.L -> LSE, 7203.T -> JPX). Regular weekday sessions
+only; exchange holidays are listed per venue in settings.MARKET_HOLIDAYS.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+MON, TUE, WED, THU, FRI, SAT, SUN = range(7)
+
+VENUES = {
+    'DSE': {'tz': 'Asia/Dhaka', 'days': (SUN, MON, TUE, WED, THU), 'open': time(10, 0), 'close': time(14, 30)},
+    'US': {'tz': 'America/New_York', 'days': (MON, TUE, WED, THU, FRI), 'open': time(9, 30), 'close': time(16, 0)},
+    'LSE': {'tz': 'Europe/London', 'days': (MON, TUE, WED, THU, FRI), 'open': time(8, 0), 'close': time(16, 30)},
+    'XETRA': {'tz': 'Europe/Berlin', 'days': (MON, TUE, WED, THU, FRI), 'open': time(9, 0), 'close': time(17, 30)},
+    'EURONEXT': {'tz': 'Europe/Paris', 'days': (MON, TUE, WED, THU, FRI), 'open': time(9, 0), 'close': time(17, 30)},
+    'JPX': {'tz': 'Asia/Tokyo', 'days': (MON, TUE, WED, THU, FRI), 'open': time(9, 0), 'close': time(15, 30)},
+}
+
+# yfinance symbol suffix -> venue; unsuffixed global symbols trade in the US
+SYMBOL_SUFFIX_VENUES = {
+    '.L': 'LSE',
+    '.DE': 'XETRA',
+    '.PA': 'EURONEXT',
+    '.AS': 'EURONEXT',
+    '.BR': 'EURONEXT',
+    '.T': 'JPX',
+}
+
+# Seconds after the close before the settlement fetch
+DEFAULT_SETTLEMENT_DELAY = 5 * 60
+
+
+def venue_for(asset):
+    """Venue code for an Asset, or None for 24/7 markets (crypto)."""
+    if asset.asset_type == 'STOCK_DSE':
+        return 'DSE'
+    if asset.asset_type == 'STOCK_GLOBAL':
+        for suffix, venue in SYMBOL_SUFFIX_VENUES.items():
+            if asset.symbol.upper().endswith(suffix):
+                return venue
+        return 'US'
+    return None
+
+
+def session(venue: str, day):
+    """(open, close) aware datetimes for venue's session on a local date, or None if closed."""
+    spec = VENUES[venue]
+    holidays = getattr(settings, 'MARKET_HOLIDAYS', {}).get(venue, ())
+    if day.weekday() not in spec['days'] or day.isoformat() in holidays:
+        return None
+    tz = ZoneInfo(spec['tz'])
+    return datetime.combine(day, spec['open'], tz), datetime.combine(day, spec['close'], tz)
+
+
+def is_open(venue, now: datetime = None) -> bool:
+    if venue is None:
+        return True
+    now = now or timezone.now()
+    bounds = session(venue, now.astimezone(ZoneInfo(VENUES[venue]['tz'])).date())
+    return bounds is not None and bounds[0] <= now < bounds[1]
+
+
+def last_close(venue: str, now: datetime = None):
+    """The most recent session close at or before now (looks back two weeks)."""
+    now = now or timezone.now()
+    today = now.astimezone(ZoneInfo(VENUES[venue]['tz'])).date()
+    for days_back in range(15):
+        bounds = session(venue, today - timedelta(days=days_back))
+        if bounds is not None and bounds[1] <= now:
+            return bounds[1]
+    return None
+
+
+def _settled_key(venue: str) -> str:
+    return f'market:settled:{venue}'
+
+
+def settlement_due(venue: str, now: datetime = None) -> bool:
+    """True once per close: after the settlement delay, until mark_settled()."""
+    now = now or timezone.now()
+    close = last_close(venue, now)
+    if close is None:
+        return False
+    delay = getattr(settings, 'MARKET_SETTLEMENT_DELAY', DEFAULT_SETTLEMENT_DELAY)
+    if now < close + timedelta(seconds=delay):
+        return False
+    return (cache.get(_settled_key(venue)) or 0) < close.timestamp()
+
+
+def mark_settled(venues, now: datetime = None):
+    now = now or timezone.now()
+    for venue in venues:
+        close = last_close(venue, now)
+        if close is not None:
+            cache.set(_settled_key(venue), close.timestamp(), None)
+
+
+def plan_tick(assets, now: datetime = None):
+    """
+    Pick the assets to fetch this tick.
+    Returns (due, settling): the assets whose market is open or owes its
+    settlement fetch, and the venues being settled (pass them to
+    mark_settled once their prices are stored).
+    """
+    now = now or timezone.now()
+    by_venue = defaultdict(list)
+    for asset in assets:
+        by_venue[venue_for(asset)].append(asset)
+
+    due, settling = [], []
+    for venue, group in by_venue.items():
+        if is_open(venue, now):
+            due.extend(group)
+        elif settlement_due(venue, now):
+            due.extend(group)
+            settling.append(venue)
+    return due, settling
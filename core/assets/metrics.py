@@ -0,0 +1,110 @@
+"""
+Prometheus metrics (prometheus_client).
+
+The instruments used across the code base are defined at the bottom. Run
+every process (web workers and Celery workers alike) with
+PROMETHEUS_MULTIPROC_DIR pointing at one shared directory that is emptied
+before they start (start.sh does this). prometheus_client then keeps each
+process's samples in files there, and /metrics (api.metrics) merges them
+with its MultiProcessCollector: counters and histograms are summed, and
+gauges follow their multiprocess_mode. Without the directory, /metrics only
+sees the process serving it.
+"""
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """True if exc, or an exception it was raised from, is an upstream 429."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        response = getattr(exc, 'response', None)
+        if getattr(response, 'status_code', None) == 429:
+            return True
+        # yfinance raises its own YFRateLimitError; others only say so in the message
+        if type(exc).__name__ == 'YFRateLimitError' or 'Too Many Requests' in str(exc):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def record_upstream_call(provider: str, func, seconds: float, error: BaseException = None):
+    method = getattr(func, '__name__', 'call')
+    UPSTREAM_SECONDS.labels(provider=provider, method=method).observe(seconds)
+    if error is not None:
+        UPSTREAM_ERRORS.labels(provider=provider, method=method).inc()
+        if is_rate_limited(error):
+            UPSTREAM_RATE_LIMITED.labels(provider=provider, method=method).inc()
+
+
+def mark_process_dead(pid: int = None):
+    """Drop a stopped process's live gauges (gunicorn child_exit, Celery worker_process_shutdown)."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+# Instruments
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TICK_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UPSTREAM_SECONDS = Histogram(
+    'ledgersync_upstream_call_seconds', 'Upstream provider call latency (through the circuit breaker)',
+    ['provider', 'method'], buckets=UPSTREAM_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    'ledgersync_upstream_errors_total', 'Failed upstream provider calls', ['provider', 'method'],
+)
+UPSTREAM_RATE_LIMITED = Counter(
+    'ledgersync_upstream_rate_limited_total', 'Upstream provider calls answered with 429', ['provider', 'method'],
+)
+CIRCUIT_REJECTED = Counter(
+    'ledgersync_circuit_rejected_total', 'Calls failed fast by an open circuit breaker', ['provider'],
+)
+
+HTTP_SECONDS = Histogram(
+    'ledgersync_http_request_seconds', 'Request latency per view', ['view', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_QUERIES = Histogram(
+    'ledgersync_http_request_queries', 'SQL queries per request', ['view'], buckets=QUERY_COUNT_BUCKETS,
+)
+HTTP_DB_SECONDS = Histogram(
+    'ledgersync_http_request_db_seconds', 'Time spent in SQL per request', ['view'], buckets=LATENCY_BUCKETS,
+)
+
+CACHE_REQUESTS = Counter(
+    'ledgersync_cache_requests_total',
+    'Shared cache lookups by result (hit, stale, miss, wait, timeout)', ['cache', 'result'],
+)
+CONDITIONAL_RESPONSES = Counter(
+    'ledgersync_conditional_responses_total', 'Generation-validated requests by result (not_modified, full)',
+    ['resource', 'result'],
+)
+FALLBACKS = Counter(
+    'ledgersync_fallback_total', 'Last-known-good data served while a provider was failing', ['provider', 'kind'],
+)
+
+TICK_SECONDS = Histogram(
+    'ledgersync_ingestion_tick_seconds', 'update_asset_prices duration', buckets=TICK_BUCKETS,
+)
+TICK_PROVIDER_SECONDS = Histogram(
+    'ledgersync_ingestion_provider_seconds', 'Time to fetch one provider within a tick', ['provider'],
+    buckets=TICK_BUCKETS,
+)
+TICK_ASSETS = Counter(
+    'ledgersync_ingestion_assets_total', 'Assets attempted per tick by result (fetched, failed)',
+    ['provider', 'result'],
+)
+TICK_WRITTEN = Counter(
+    'ledgersync_ingestion_points_written_total', 'PricePoints written (after the write filter)',
+)
+# The newest value across processes, including worker children that have exited
+TICK_LAST = Gauge(
+    'ledgersync_ingestion_last_tick_timestamp_seconds', 'Unix time the last update_asset_prices finished',
+    multiprocess_mode='max',
+)
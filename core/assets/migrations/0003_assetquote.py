@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:17
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def populate_quotes(apps, schema_editor):
+    Asset = apps.get_model('assets', 'Asset')
+    AssetQuote = apps.get_model('assets', 'AssetQuote')
+
+    quotes = []
+    for asset in Asset.objects.all():
+        latest = asset.price_points.order_by('-timestamp').first()
+        if not latest:
+            continue
+        past = asset.price_points.filter(timestamp__lte=latest.timestamp - timedelta(hours=24)).order_by('-timestamp').first()
+        change = 0.0
+        if past and past.price:
+            change = round(float(((latest.price - past.price) / past.price) * 100), 2)
+        quotes.append(AssetQuote(
+            asset=asset,
+            latest_price=latest.price,
+            price_24h_ago=past.price if past else None,
+            change_24h=change,
+            updated_at=latest.timestamp,
+        ))
+    AssetQuote.objects.bulk_create(quotes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_watchlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetQuote',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quote', serialize=False, to='assets.asset')),
+                ('latest_price', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('price_24h_ago', models.DecimalField(blank=True, decimal_places=4, max_digits=20, null=True)),
+                ('change_24h', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(populate_quotes, migrations.RunPython.noop),
+    ]
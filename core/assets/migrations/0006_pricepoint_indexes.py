@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BRIN_INDEX = 'pricepoint_ts_brin'
+ASSET_TS_INDEX = 'pricepoint_asset_ts'
+
+
+def asset_ts_index(include=()):
+    return models.Index(fields=['asset', '-timestamp'], include=include, name=ASSET_TS_INDEX)
+
+
+def create_asset_ts_index(apps, schema_editor):
+    # Where covering indexes exist (PostgreSQL), price is carried in the
+    # index so latest and 24h-ago lookups are index-only scans. The model
+    # declares the plain index, so other backends need no W040 silencing.
+    include = ['price'] if schema_editor.connection.features.supports_covering_indexes else []
+    schema_editor.add_index(apps.get_model('assets', 'PricePoint'), asset_ts_index(include))
+
+
+def drop_asset_ts_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('assets', 'PricePoint'), asset_ts_index())
+
+
+def create_brin_index(apps, schema_editor):
+    # PostgreSQL only: a few pages summarising the append-ordered timestamp
+    # column, used by retention's range scans across all assets.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('assets', 'PricePoint')._meta.db_table
+    schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{BRIN_INDEX}" ON "{table}" USING brin ("timestamp")')
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{BRIN_INDEX}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0005_backfillcheckpoint'),
+    ]
+
+    operations = [
+        # Build the composite index before dropping the asset_id index it replaces
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='pricepoint', index=asset_ts_index()),
+            ],
+            database_operations=[
+                migrations.RunPython(create_asset_ts_index, drop_asset_ts_index),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='pricepoint',
+            name='asset',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_points', to='assets.asset'),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
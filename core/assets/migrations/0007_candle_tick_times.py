@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0006_pricepoint_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candle',
+            name='first_tick_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='candle',
+            name='last_tick_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Asset(models.Model):
     ASSET_TYPE_CHOICES = [
@@ -16,16 +17,87 @@ class Asset(models.Model):
         return self.symbol
 
 class PricePoint(models.Model):
-    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='price_points')
+    # Indexed by the leading column of pricepoint_asset_ts below
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='price_points', db_index=False)
     price = models.DecimalField(max_digits=20, decimal_places=4)
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # default (not auto_now_add) so backfilled points keep their own timestamps
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Every hot read is "one asset, newest first / a time window".
+            # On PostgreSQL migration 0006 builds this index with INCLUDE
+            # (price), so latest and 24h-ago lookups are index-only scans,
+            # and adds a BRIN index on timestamp for retention range scans.
+            models.Index(fields=['asset', '-timestamp'], name='pricepoint_asset_ts'),
+        ]
 
     def __str__(self):
         return f"{self.asset.symbol} - {self.price} @ {self.timestamp}"
 
+class Candle(models.Model):
+    """
+    OHLC rollup of PricePoint ticks. Built incrementally by the rollup task
+    so history queries can read one row per bucket instead of every tick.
+    """
+    RESOLUTION_CHOICES = [
+        ('1m', '1 Minute'),
+        ('1h', '1 Hour'),
+        ('1d', '1 Day'),
+    ]
+
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='candles')
+    resolution = models.CharField(max_length=2, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+    open = models.DecimalField(max_digits=20, decimal_places=4)
+    high = models.DecimalField(max_digits=20, decimal_places=4)
+    low = models.DecimalField(max_digits=20, decimal_places=4)
+    close = models.DecimalField(max_digits=20, decimal_places=4)
+    # Times of the ticks behind open and close, so late or out-of-order ticks
+    # never move them backwards (empty on candles built before they existed)
+    first_tick_at = models.DateTimeField(blank=True, null=True)
+    last_tick_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('asset', 'resolution', 'bucket_start')
+        ordering = ['bucket_start']
+
+    def __str__(self):
+        return f"{self.asset.symbol} {self.resolution} @ {self.bucket_start}"
+
+class AssetQuote(models.Model):
+    """
+    Latest-quote snapshot per asset, kept current by the ingestion task so
+    list endpoints never have to scan price_points.
+    """
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name='quote')
+    latest_price = models.DecimalField(max_digits=20, decimal_places=4)
+    price_24h_ago = models.DecimalField(max_digits=20, decimal_places=4, blank=True, null=True)
+    change_24h = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.asset.symbol} - {self.latest_price} ({self.change_24h}%)"
+
+class BackfillCheckpoint(models.Model):
+    """
+    Progress of the backfill_prices command per asset and source, so an
+    interrupted backfill resumes where it stopped.
+    """
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='backfill_checkpoints')
+    source = models.CharField(max_length=255)  # 'upstream' or 'file:<name>'
+    end = models.DateTimeField()  # live data starts here; the backfill stops before it
+    backfilled_until = models.DateTimeField(blank=True, null=True)  # everything before is written
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('asset', 'source')
+
+    def __str__(self):
+        return f"{self.asset.symbol} backfill from {self.source} until {self.backfilled_until}"
+
 class Watchlist(models.Model):
     user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='watchlist')
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='watched_by')
@@ -0,0 +1,94 @@
+"""
+Optional monthly range partitioning of the PricePoint table (PostgreSQL only).
+
+Enabled with PRICEPOINT_PARTITIONING=True after converting the table once
+with `manage.py partition_pricepoints`. Expired months are then removed with
+DETACH PARTITION + DROP TABLE instead of a row-by-row DELETE.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from .models import PricePoint
+
+TABLE = PricePoint._meta.db_table
+PARTITION_RE = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(dt: datetime, months: int) -> datetime:
+    index = dt.year * 12 + dt.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned(connection) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def enabled(connection) -> bool:
+    return getattr(settings, 'PRICEPOINT_PARTITIONING', False) and is_partitioned(connection)
+
+
+def list_partitions(connection) -> list:
+    """[(month_start, partition_name), ...] sorted by month."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    result = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            result.append((datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc), name))
+    return sorted(result)
+
+
+def create_partition(connection, month: datetime):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{TABLE}" '
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [month, add_months(month, 1)],
+        )
+
+
+def ensure_partitions(connection, now: datetime, months_ahead: int = None):
+    """Make sure the current month and the next months_ahead months exist."""
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'PRICEPOINT_PARTITIONS_AHEAD', 2)
+    current = month_start(now)
+    for offset in range(months_ahead + 1):
+        create_partition(connection, add_months(current, offset))
+
+
+def drop_partitions_before(connection, cutoff: datetime) -> list:
+    """Detach and drop every partition whose whole range ends before cutoff."""
+    dropped = []
+    for month, name in list_partitions(connection):
+        if add_months(month, 1) > cutoff:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+        dropped.append(name)
+    return dropped
@@ -0,0 +1,50 @@
+from datetime import timedelta
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from .models import Asset, AssetQuote, PricePoint
+
+
+def compute_change(current, past) -> float:
+    """Percent change between two prices, rounded to 2 places (0.0 if unknown)."""
+    if current is None or not past:
+        return 0.0
+    return round(float(((current - past) / past) * 100), 2)
+
+
+def refresh_quotes(prices: dict, now=None) -> int:
+    """
+    Upsert the AssetQuote snapshot for every asset in prices ({asset_id: Decimal}).
+    The 24h-ago price for all assets is looked up in a single query.
+    """
+    if not prices:
+        return 0
+
+    now = now or timezone.now()
+    past_price = PricePoint.objects.filter(
+        asset=OuterRef('pk'),
+        timestamp__lte=now - timedelta(hours=24),
+    ).order_by('-timestamp').values('price')[:1]
+
+    past_prices = dict(
+        Asset.objects.filter(pk__in=prices.keys())
+        .annotate(past_price=Subquery(past_price))
+        .values_list('pk', 'past_price')
+    )
+
+    quotes = [
+        AssetQuote(
+            asset_id=asset_id,
+            latest_price=price,
+            price_24h_ago=past_prices.get(asset_id),
+            change_24h=compute_change(price, past_prices.get(asset_id)),
+            updated_at=now,
+        )
+        for asset_id, price in prices.items()
+    ]
+    AssetQuote.objects.bulk_create(
+        quotes,
+        update_conflicts=True,
+        unique_fields=['asset'],
+        update_fields=['latest_price', 'price_24h_ago', 'change_24h', 'updated_at'],
+    )
+    return len(quotes)
@@ -0,0 +1,46 @@
+"""
+Publishes quote updates to Redis pub/sub after each ingestion tick.
+Streaming clients (api.streaming) subscribe to QUOTES_CHANNEL and forward
+only the symbols they care about.
+"""
+import json
+import logging
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+QUOTES_CHANNEL = 'ledgersync:quotes'
+
+_client = None
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def quote_payload(quote) -> dict:
+    return {
+        'symbol': quote.asset.symbol,
+        'price': str(quote.latest_price),
+        'change_24h': quote.change_24h,
+        'updated_at': quote.updated_at.isoformat(),
+    }
+
+
+def publish_quotes(quotes) -> int:
+    """
+    Publishes one message carrying every quote of the tick.
+    Returns the number of subscribers that received it (0 on failure).
+    """
+    if not quotes:
+        return 0
+    message = json.dumps({'quotes': [quote_payload(q) for q in quotes]})
+    try:
+        return get_redis().publish(QUOTES_CHANNEL, message)
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish quotes: {e}")
+        return 0
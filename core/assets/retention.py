@@ -0,0 +1,97 @@
+"""
+Retention for raw PricePoints and candle rollups.
+
+Raw ticks are kept for PRICE_RETENTION_DAYS per asset type; older history
+lives on in the candles. Deletes run in small id batches so they never hold
+long locks against the live ingestion writes.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import Asset, Candle, PricePoint
+from . import partitions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RAW_RETENTION_DAYS = 7
+
+
+def raw_cutoffs(now=None) -> dict:
+    """{asset_type: cutoff datetime} for raw PricePoints."""
+    now = now or timezone.now()
+    days = getattr(settings, 'PRICE_RETENTION_DAYS', {})
+    return {
+        asset_type: now - timedelta(days=days.get(asset_type, DEFAULT_RAW_RETENTION_DAYS))
+        for asset_type, _ in Asset.ASSET_TYPE_CHOICES
+    }
+
+
+def candle_cutoffs(now=None) -> dict:
+    """{resolution: cutoff datetime, or None when kept forever} for candles."""
+    now = now or timezone.now()
+    return {
+        resolution: None if days is None else now - timedelta(days=days)
+        for resolution, days in getattr(settings, 'CANDLE_RETENTION_DAYS', {}).items()
+    }
+
+
+def delete_in_batches(queryset, batch_size: int) -> int:
+    """Delete queryset rows batch_size ids at a time; returns rows deleted."""
+    model = queryset.model
+    total = 0
+    while True:
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        deleted, _ = model.objects.filter(id__in=ids).delete()
+        total += deleted
+
+
+def prune_price_points(now=None, batch_size: int = None) -> int:
+    batch_size = batch_size or getattr(settings, 'PRICE_RETENTION_BATCH_SIZE', 5000)
+    total = 0
+    for asset_type, cutoff in raw_cutoffs(now).items():
+        deleted = delete_in_batches(
+            PricePoint.objects.filter(asset__asset_type=asset_type, timestamp__lt=cutoff).order_by(),
+            batch_size,
+        )
+        if deleted:
+            logger.info(f"Pruned {deleted} {asset_type} price points older than {cutoff:%Y-%m-%d}")
+        total += deleted
+    return total
+
+
+def prune_candles(now=None, batch_size: int = None) -> int:
+    batch_size = batch_size or getattr(settings, 'PRICE_RETENTION_BATCH_SIZE', 5000)
+    total = 0
+    for resolution, cutoff in candle_cutoffs(now).items():
+        if cutoff is None:
+            continue
+        total += delete_in_batches(
+            Candle.objects.filter(resolution=resolution, bucket_start__lt=cutoff).order_by(),
+            batch_size,
+        )
+    return total
+
+
+def enforce_retention(now=None) -> dict:
+    """
+    Apply the retention policy. With monthly partitioning enabled on
+    PostgreSQL, whole months older than every asset type's cutoff are
+    detached and dropped first; the row-by-row pass then only has to trim
+    what is left inside the boundary partitions.
+    """
+    now = now or timezone.now()
+    dropped = []
+    if partitions.enabled(connection):
+        partitions.ensure_partitions(connection, now)
+        oldest_allowed = min(raw_cutoffs(now).values())
+        dropped = partitions.drop_partitions_before(connection, oldest_allowed)
+
+    return {
+        'partitions_dropped': dropped,
+        'price_points': prune_price_points(now),
+        'candles': prune_candles(now),
+    }
@@ -0,0 +1,266 @@
+"""
+OHLC candle rollups built from PricePoint ticks.
+
+apply_ticks() merges a tick batch into the open bucket of each resolution,
+so every ingestion tick touches at most one candle per asset per resolution.
+The merge happens inside the upsert (upsert_candles), so rollup tasks that
+overlap or arrive out of order cannot overwrite each other.
+rebuild_candles() recomputes buckets from raw PricePoints (first-time
+population). merge_series() writes a historical series straight into the
+candles (backfills, whose raw points mostly predate raw retention).
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.db import connections, router, transaction
+from django.utils import timezone
+import numpy as np
+import pandas as pd
+from .models import Candle
+from .write_filter import get_write_policy
+
+RESOLUTIONS = {
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+
+# Lookback window per history period (local store caps at 1y)
+PERIOD_WINDOWS = {
+    '1d': timedelta(days=1),
+    '5d': timedelta(days=5),
+    '1mo': timedelta(days=30),
+    '1y': timedelta(days=365),
+}
+DEFAULT_WINDOW = timedelta(days=365)
+
+# Coarsest resolution that still gives a chart at least this many points
+MIN_POINTS = 100
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Columns written by upsert_candles (conflict key first)
+CANDLE_COLUMNS = [
+    'asset', 'resolution', 'bucket_start', 'open', 'high', 'low', 'close', 'first_tick_at', 'last_tick_at',
+]
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Floor a timestamp to the start of its bucket (UTC aligned)."""
+    size = RESOLUTIONS[resolution]
+    ts = ts.astimezone(dt_timezone.utc)
+    return _EPOCH + ((ts - _EPOCH) // size) * size
+
+
+def resolution_for(window: timedelta) -> str:
+    """Pick the coarsest resolution yielding at least MIN_POINTS buckets."""
+    for resolution, size in sorted(RESOLUTIONS.items(), key=lambda r: r[1], reverse=True):
+        if window / size >= MIN_POINTS:
+            return resolution
+    return '1m'
+
+
+def upsert_candles(candles, batch_size=500) -> int:
+    """
+    Merge Candles (with first_tick_at/last_tick_at set) into the stored
+    ones inside the database, so concurrent or out-of-order writers cannot
+    lose each other's updates: high and low only widen, and open and close
+    are taken from whichever side has the earlier first or later last tick.
+    Stored candles without tick times keep their open and take the new close.
+    Works on PostgreSQL and SQLite (ON CONFLICT DO UPDATE).
+    """
+    candles = list(candles)
+    if not candles:
+        return 0
+    connection = connections[router.db_for_write(Candle)]
+    qn = connection.ops.quote_name
+    table = qn(Candle._meta.db_table)
+    greatest, least = ('GREATEST', 'LEAST') if connection.vendor == 'postgresql' else ('MAX', 'MIN')
+    fields = [Candle._meta.get_field(name) for name in CANDLE_COLUMNS]
+    columns = ', '.join(qn(field.column) for field in fields)
+
+    def stored(name):
+        return f'{table}.{qn(name)}'
+
+    def new(name):
+        return f'EXCLUDED.{qn(name)}'
+
+    earlier = f"{new('first_tick_at')} < {stored('first_tick_at')}"
+    later = f"{stored('last_tick_at')} IS NULL OR {new('last_tick_at')} >= {stored('last_tick_at')}"
+    updates = ', '.join([
+        f"{qn('open')} = CASE WHEN {earlier} THEN {new('open')} ELSE {stored('open')} END",
+        f"{qn('high')} = {greatest}({stored('high')}, {new('high')})",
+        f"{qn('low')} = {least}({stored('low')}, {new('low')})",
+        f"{qn('close')} = CASE WHEN {later} THEN {new('close')} ELSE {stored('close')} END",
+        f"{qn('first_tick_at')} = CASE WHEN {earlier} THEN {new('first_tick_at')} ELSE {stored('first_tick_at')} END",
+        f"{qn('last_tick_at')} = CASE WHEN {later} THEN {new('last_tick_at')} ELSE {stored('last_tick_at')} END",
+    ])
+    conflict = ', '.join(qn(name) for name in ('asset_id', 'resolution', 'bucket_start'))
+
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, candles))
+    row = f"({', '.join(['%s'] * len(fields))})"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for i in range(0, len(candles), batch_size):
+            batch = candles[i:i + batch_size]
+            params = [
+                field.get_db_prep_save(getattr(candle, field.attname), connection)
+                for candle in batch for field in fields
+            ]
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {', '.join([row] * len(batch))} "
+                f"ON CONFLICT ({conflict}) DO UPDATE SET {updates}",
+                params,
+            )
+    return len(candles)
+
+
+def apply_ticks(ticks) -> int:
+    """
+    Merge ticks [(asset_id, price, timestamp), ...] into the open candles.
+    The batch is reduced to one candle per asset and bucket and merged with
+    upsert_candles, so overlapping or out-of-order rollup tasks compose.
+    """
+    ticks = sorted(ticks, key=lambda t: t[2])
+    if not ticks:
+        return 0
+
+    written = 0
+    for resolution in RESOLUTIONS:
+        candles = {}
+        for asset_id, price, ts in ticks:
+            key = (asset_id, bucket_start(ts, resolution))
+            candle = candles.get(key)
+            if candle is None:
+                candles[key] = Candle(
+                    asset_id=asset_id, resolution=resolution, bucket_start=key[1],
+                    open=price, high=price, low=price, close=price, first_tick_at=ts, last_tick_at=ts,
+                )
+            else:
+                candle.high = max(candle.high, price)
+                candle.low = min(candle.low, price)
+                candle.close, candle.last_tick_at = price, ts
+        written += upsert_candles(candles.values())
+    return written
+
+
+def _ohlc(series: pd.Series, size: timedelta) -> pd.DataFrame:
+    """OHLC plus first/last tick time per bucket of a time-indexed series."""
+    ohlc = series.resample(pd.Timedelta(size), origin='epoch').ohlc()
+    stamps = pd.Series(series.index, index=series.index).resample(pd.Timedelta(size), origin='epoch')
+    ohlc['first_tick_at'] = stamps.first()
+    ohlc['last_tick_at'] = stamps.last()
+    return ohlc.dropna()
+
+
+def _candles(asset_id, resolution: str, ohlc: pd.DataFrame) -> list:
+    return [
+        Candle(
+            asset_id=asset_id, resolution=resolution, bucket_start=row.Index.to_pydatetime(),
+            open=Decimal(str(row.open)), high=Decimal(str(row.high)),
+            low=Decimal(str(row.low)), close=Decimal(str(row.close)),
+            first_tick_at=row.first_tick_at.to_pydatetime(), last_tick_at=row.last_tick_at.to_pydatetime(),
+        )
+        for row in ohlc.itertuples()
+    ]
+
+
+def rebuild_candles(asset, start=None, end=None, batch_size=5000) -> int:
+    """
+    Recompute every candle for asset from raw PricePoints in [start, end).
+    Used to seed rollups for data that predates them.
+    """
+    points = asset.price_points.order_by('timestamp')
+    if start:
+        points = points.filter(timestamp__gte=start)
+    if end:
+        points = points.filter(timestamp__lt=end)
+
+    rows = list(points.values_list('timestamp', 'price').iterator(chunk_size=batch_size))
+    if not rows:
+        return 0
+
+    series = pd.Series(
+        [float(p) for _, p in rows],
+        index=pd.DatetimeIndex([ts for ts, _ in rows]).tz_convert('UTC'),
+    )
+
+    written = 0
+    for resolution, size in RESOLUTIONS.items():
+        candles = _candles(asset.pk, resolution, _ohlc(series, size))
+        Candle.objects.bulk_create(
+            candles,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['asset', 'resolution', 'bucket_start'],
+            update_fields=CANDLE_COLUMNS[3:],
+        )
+        written += len(candles)
+    return written
+
+
+def merge_series(asset_id, times: pd.DatetimeIndex, values, cutoffs: dict, batch_size=5000) -> int:
+    """
+    Merge a time-ordered series into the candles of every resolution, from
+    that resolution's cutoff (None for all of it), through upsert_candles:
+    buckets the live ticks already opened keep their later close, and the
+    series supplies any earlier open. Returns the number of candles written.
+    """
+    series = pd.Series(np.asarray(values, dtype=np.float64), index=times.tz_convert('UTC'))
+    written = 0
+    for resolution, size in RESOLUTIONS.items():
+        cutoff = cutoffs.get(resolution)
+        part = series if cutoff is None else series[series.index >= cutoff]
+        if part.empty:
+            continue
+        written += upsert_candles(_candles(asset_id, resolution, _ohlc(part, size)), batch_size)
+    return written
+
+
+def forward_fill(rows: list, resolution: str, max_gap_seconds: float, end: datetime) -> list:
+    """
+    Carry each close forward into the empty buckets after it, as many as
+    max_gap_seconds can reach (rounded up, so at least one bucket even when
+    buckets are longer than the gap) and not past end. Longer gaps are real
+    (market closed, ingestion down) and are left as they are.
+    """
+    if not rows:
+        return rows
+    size = RESOLUTIONS[resolution]
+    limit = max(1, math.ceil(max_gap_seconds / size.total_seconds()))
+
+    filled = []
+    boundaries = [ts for ts, _ in rows[1:]] + [end + size]
+    for (ts, close), next_start in zip(rows, boundaries):
+        filled.append((ts, close))
+        gap_start = ts + size
+        for i in range(limit):
+            if gap_start + i * size >= next_start:
+                break
+            filled.append((gap_start + i * size, close))
+    return filled
+
+
+def candle_history(asset, period: str, now: datetime = None) -> list:
+    """
+    Return [(bucket_start, close), ...] for the period, read from the
+    coarsest resolution that fits. Empty buckets up to one write-filter
+    heartbeat after a close (at least the next bucket) are forward-filled.
+    """
+    now = now or timezone.now()
+    window = PERIOD_WINDOWS.get(period, DEFAULT_WINDOW)
+    resolution = resolution_for(window)
+    cutoff = bucket_start(now - window, resolution)
+    rows = list(
+        asset.candles.filter(resolution=resolution, bucket_start__gte=cutoff)
+        .order_by('bucket_start')
+        .values_list('bucket_start', 'close')
+    )
+    heartbeat = get_write_policy(asset.asset_type)['heartbeat_seconds']
+    return forward_fill(rows, resolution, heartbeat, bucket_start(now, resolution))
+
+
+def candle_series(asset, period: str):
+    """candle_history as (UTC DatetimeIndex, float64 closes), the adapter series shape."""
+    rows = candle_history(asset, period)
+    times = pd.DatetimeIndex([t for t, _ in rows], tz='UTC')
+    return times, np.asarray([close for _, close in rows], dtype=np.float64)
@@ -0,0 +1,390 @@
+"""
+Offline market data for local load testing.
+
+With settings.MARKET_DATA_SOURCE = 'simulated' (or 'replay') get_adapter()
+hands out these adapters instead of the CoinGecko / yfinance / DSE ones, so
+the ingestion and API tiers can be driven at any number of assets without
+touching an upstream.
+
+- SimulatedAdapter: a deterministic geometric Brownian motion per asset,
+  reflected at the policy's price bounds. The path is built by
+  Brownian-bridge refinement from hashed normals, so the price of any asset
+  at any time is computed directly (no state, same answer in every process)
+  and vectorized across assets or timestamps.
+- ReplayAdapter: replays an NDJSON capture of real adapter responses
+  (manage.py capture_market_data) at replay_speed, looping over the capture.
+  Symbols missing from the capture replay a captured symbol of the same
+  asset type, scaled by a stable per-symbol factor.
+
+Both can add latency, jitter and an error rate per call (per asset type, in
+settings.MARKET_SIMULATION). The ingestion token buckets still apply; lift
+INGESTION_PROVIDERS rates for a stress run.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .adapters import MarketAdapter, empty_series
+
+# Override per asset type with settings.MARKET_SIMULATION
+DEFAULT_SIMULATION_POLICY = {
+    'seed': 0,
+    'mu': 0.05,               # annual drift
+    'sigma': 0.3,             # annual volatility
+    'min_price': 1.0,         # prices start log-uniform in, and stay within, [min_price, max_price]
+    'max_price': 500.0,
+    'step_seconds': 60,       # resolution of the price path
+    'latency_ms': 0.0,        # added to every call, like an upstream round trip
+    'jitter_ms': 0.0,
+    'error_rate': 0.0,        # share of calls that fail
+    'replay_speed': 1.0,      # capture seconds replayed per wall-clock second
+}
+
+ORIGIN = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+LEVELS = 26  # 2**26 steps: ~127 years of one-minute steps
+SECONDS_PER_YEAR = 365.25 * 86400
+
+# (window, resolution) per history period, like CoinGecko's granularity
+HISTORY_WINDOWS = {
+    '1d': (timedelta(days=1), timedelta(minutes=5)),
+    '5d': (timedelta(days=5), timedelta(minutes=30)),
+    '1mo': (timedelta(days=30), timedelta(hours=1)),
+    '1y': (timedelta(days=365), timedelta(days=1)),
+    '5y': (timedelta(days=1826), timedelta(days=1)),
+}
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def get_simulation_policy(asset_type: str) -> dict:
+    overrides = getattr(settings, 'MARKET_SIMULATION', {}).get(asset_type, {})
+    return {**DEFAULT_SIMULATION_POLICY, **overrides}
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, elementwise on uint64 (wrapping arithmetic)."""
+    x = x + _GOLDEN
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _uniform(keys: np.ndarray) -> np.ndarray:
+    """(0, 1) floats from hashed keys."""
+    return ((_mix(keys) >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0 ** -53
+
+
+def _normal(keys: np.ndarray) -> np.ndarray:
+    """Standard normals from hashed keys (Box-Muller)."""
+    u1 = _uniform(keys)
+    u2 = _uniform(keys ^ _GOLDEN)
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+
+@lru_cache(maxsize=200_000)
+def symbol_key(symbol: str, seed: int = 0) -> int:
+    """Stable 64-bit key for a symbol."""
+    digest = hashlib.blake2b(symbol.encode(), digest_size=8, salt=seed.to_bytes(8, 'little')).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def brownian(keys, steps) -> np.ndarray:
+    """
+    Standard Brownian motion W(step) (unit variance per step) of each key's
+    path at integer steps; keys and steps broadcast. Each path is refined
+    from W(0) = 0 and W(2**LEVELS) by Brownian-bridge midpoints whose
+    normals are hashed from (key, midpoint), so every point is independent
+    of the others' evaluation order.
+    """
+    keys, steps = np.broadcast_arrays(np.atleast_1d(np.asarray(keys, dtype=np.uint64)),
+                                      np.atleast_1d(np.asarray(steps, dtype=np.int64)))
+    steps = np.clip(steps, 0, (1 << LEVELS) - 1)
+    lo = np.zeros(steps.shape, dtype=np.int64)
+    hi = np.full(steps.shape, 1 << LEVELS, dtype=np.int64)
+    w_lo = np.zeros(steps.shape)
+    w_hi = math.sqrt(1 << LEVELS) * _normal(_mix(keys ^ _mix(hi.astype(np.uint64))))
+    for _ in range(LEVELS):
+        mid = (lo + hi) >> 1
+        w_mid = (w_lo + w_hi) / 2 + np.sqrt((hi - lo) / 4) * _normal(_mix(keys ^ _mix(mid.astype(np.uint64))))
+        right = steps >= mid
+        lo, w_lo = np.where(right, mid, lo), np.where(right, w_mid, w_lo)
+        hi, w_hi = np.where(right, hi, mid), np.where(right, w_hi, w_mid)
+    return w_lo
+
+
+def history_grid(period: str, now: datetime):
+    """UTC timestamps for a history period at its resolution, ending at now."""
+    if period in HISTORY_WINDOWS:
+        window, resolution = HISTORY_WINDOWS[period]
+        start = now - window
+    elif period == 'ytd':
+        start, resolution = datetime(now.year, 1, 1, tzinfo=dt_timezone.utc), timedelta(days=1)
+    elif period == 'max':
+        start, resolution = ORIGIN, timedelta(days=7)
+    else:
+        return history_grid('1d', now)
+    return range_grid(start, now, resolution)
+
+
+def range_grid(start: datetime, end: datetime, resolution: timedelta = None):
+    """UTC timestamps in [start, end) on a resolution grid (5m / 1h / 1d by span)."""
+    if resolution is None:
+        span = end - start
+        if span <= timedelta(days=1):
+            resolution = timedelta(minutes=5)
+        elif span <= timedelta(days=90):
+            resolution = timedelta(hours=1)
+        else:
+            resolution = timedelta(days=1)
+    step = pd.Timedelta(resolution)
+    first, end = pd.Timestamp(start).ceil(step), pd.Timestamp(end)
+    if first >= end:
+        return pd.DatetimeIndex([], tz='UTC')
+    return pd.date_range(first, end, freq=step, inclusive='left')
+
+
+def format_usd(n) -> str:
+    if n > 1e12: return f"${(n/1e12):.2f}T"
+    if n > 1e9: return f"${(n/1e9):.2f}B"
+    if n > 1e6: return f"${(n/1e6):.2f}M"
+    return f"${n:,.2f}"
+
+
+def to_decimal(value: float) -> Decimal:
+    return Decimal(f'{max(value, 0.0001):.4f}')
+
+
+class SyntheticAdapter(MarketAdapter):
+    """Shared call shaping for the offline adapters: latency, jitter and injected errors."""
+
+    def __init__(self, asset_type: str):
+        self.asset_type = asset_type
+        self.policy = get_simulation_policy(asset_type)
+
+    def _delay(self) -> float:
+        """Seconds this call takes."""
+        latency = self.policy['latency_ms']
+        if self.policy['jitter_ms']:
+            latency = random.gauss(latency, self.policy['jitter_ms'])
+        return max(0.0, latency) / 1000
+
+    def _check_error(self):
+        if self.policy['error_rate'] and random.random() < self.policy['error_rate']:
+            raise ValueError(f"Simulated {self.asset_type} upstream error")
+
+    def _call(self, func, *args):
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        self._check_error()
+        return func(*args)
+
+    async def _acall(self, func, *args):
+        # Waits like an HTTP provider: the coroutine parks, no thread is held
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        self._check_error()
+        return func(*args)
+
+    def get_price(self, symbol: str, identifier: str = None) -> Decimal:
+        price = self._call(self._prices, [symbol]).get(symbol)
+        if price is None:
+            raise ValueError(f"No simulated price for {symbol}")
+        return price
+
+    def get_prices(self, assets: list) -> dict:
+        return self._call(self._prices, [a.symbol for a in assets])
+
+    def get_history_series(self, symbol: str, period: str, identifier: str = None):
+        return self._call(self._series, symbol, period)
+
+    def get_history_range(self, symbol: str, start: datetime, end: datetime, identifier: str = None):
+        return self._call(self._range, symbol, start, end)
+
+    def get_details(self, symbol: str, identifier: str = None) -> dict:
+        return self._call(self._details, symbol)
+
+    async def aget_history_series(self, symbol: str, period: str, identifier: str = None):
+        return await self._acall(self._series, symbol, period)
+
+    async def aget_details(self, symbol: str, identifier: str = None) -> dict:
+        return await self._acall(self._details, symbol)
+
+    @staticmethod
+    def _labelled(times: pd.DatetimeIndex, values):
+        # Labels in the server timezone, like the crypto adapter
+        return times.tz_convert(settings.TIME_ZONE), np.asarray(values, dtype=np.float64)
+
+
+class SimulatedAdapter(SyntheticAdapter):
+    """Deterministic geometric Brownian motion per asset."""
+
+    def _keys(self, symbols) -> np.ndarray:
+        return np.array([symbol_key(s, self.policy['seed']) for s in symbols], dtype=np.uint64)
+
+    def prices_at(self, symbols, times) -> np.ndarray:
+        """GBM prices of symbols at times (datetimes or a DatetimeIndex); broadcast."""
+        p = self.policy
+        keys = self._keys(symbols)
+        seconds = (pd.DatetimeIndex(times) - pd.Timestamp(ORIGIN)).total_seconds().to_numpy()
+        steps = (seconds // p['step_seconds']).astype(np.int64)
+        low, high = math.log(p['min_price']), math.log(p['max_price'])
+        years = steps * p['step_seconds'] / SECONDS_PER_YEAR
+        diffusion = p['sigma'] * math.sqrt(p['step_seconds'] / SECONDS_PER_YEAR)
+        offset = (high - low) * _uniform(keys ^ np.uint64(p['seed'] + 1))
+        offset = offset + (p['mu'] - p['sigma'] ** 2 / 2) * years + diffusion * brownian(keys, steps)
+        # Reflect the log price at the bounds so years of drift stay in range
+        span = high - low
+        folded = np.mod(offset, 2 * span) if span > 0 else np.zeros_like(offset)
+        return np.exp(low + np.where(folded > span, 2 * span - folded, folded))
+
+    def _prices(self, symbols) -> dict:
+        if not symbols:
+            return {}
+        values = self.prices_at(symbols, [datetime.now(dt_timezone.utc)])
+        return {symbol: to_decimal(value) for symbol, value in zip(symbols, values.tolist())}
+
+    def _series(self, symbol: str, period: str):
+        times = history_grid(period, datetime.now(dt_timezone.utc))
+        if not len(times):
+            return empty_series()
+        return self._labelled(times, self.prices_at([symbol], times))
+
+    def _range(self, symbol: str, start: datetime, end: datetime):
+        times = range_grid(start, end)
+        if not len(times):
+            return empty_series()
+        return times, self.prices_at([symbol], times)
+
+    def _details(self, symbol: str) -> dict:
+        key = np.array([symbol_key(symbol, self.policy['seed'])], dtype=np.uint64)
+        price = float(self.prices_at([symbol], [datetime.now(dt_timezone.utc)])[0])
+        shares = 10 ** (6 + 4 * float(_uniform(key ^ np.uint64(2))[0]))
+        turnover = 0.002 + 0.02 * float(_uniform(key ^ np.uint64(3))[0])
+        return {'market_cap': format_usd(price * shares), 'volume': format_usd(price * shares * turnover)}
+
+
+class Capture:
+    """An NDJSON capture of adapter responses, indexed for replay."""
+
+    def __init__(self, path: str):
+        ticks = defaultdict(list)
+        symbols = defaultdict(set)
+        self.histories = {}  # (symbol, period) -> (recorded_at, epoch seconds, values)
+        self.details = {}
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                method, asset_type = record['method'], record['asset_type']
+                if method == 'get_prices':
+                    for symbol, price in record['result'].items():
+                        ticks[symbol].append((record['t'], float(price)))
+                        symbols[asset_type].add(symbol)
+                elif method == 'get_history_series':
+                    result = record['result']
+                    self.histories[(record['symbol'], record['period'])] = (
+                        record['t'], np.asarray(result['t'], dtype=np.float64), np.asarray(result['v'], dtype=np.float64)
+                    )
+                    symbols[asset_type].add(record['symbol'])
+                elif method == 'get_details':
+                    self.details[record['symbol']] = record['result']
+                    symbols[asset_type].add(record['symbol'])
+
+        self.ticks = {}
+        for symbol, rows in ticks.items():
+            rows.sort()
+            self.ticks[symbol] = (np.array([t for t, _ in rows]), np.array([p for _, p in rows]))
+        stamps = [t for times, _ in self.ticks.values() for t in (times[0], times[-1])]
+        self.start = min(stamps, default=0.0)
+        self.end = max(stamps, default=0.0)
+        self.symbols = {asset_type: sorted(names) for asset_type, names in symbols.items()}
+
+    def source(self, asset_type: str, symbol: str):
+        """(captured symbol, price factor) to replay for symbol."""
+        if symbol in self.ticks or symbol in self.details:
+            return symbol, 1.0
+        captured = self.symbols.get(asset_type) or sorted(self.ticks)
+        if not captured:
+            raise ValueError(f"Capture has no {asset_type} data")
+        key = symbol_key(symbol)
+        return captured[key % len(captured)], 0.5 + 1.5 * (key >> 11) / 2 ** 53
+
+    def clock(self, now: float, speed: float) -> float:
+        """Capture time replayed at wall-clock time now (looping)."""
+        span = self.end - self.start
+        return self.start + (now * speed) % span if span > 0 else self.start
+
+
+@lru_cache(maxsize=4)
+def load_capture(path: str) -> Capture:
+    return Capture(path)
+
+
+class ReplayAdapter(SyntheticAdapter):
+    """Replays settings.MARKET_REPLAY_FILE at the asset type's replay_speed."""
+
+    def __init__(self, asset_type: str):
+        super().__init__(asset_type)
+        path = getattr(settings, 'MARKET_REPLAY_FILE', '')
+        if not path:
+            raise ValueError("MARKET_DATA_SOURCE='replay' needs MARKET_REPLAY_FILE")
+        self.capture = load_capture(path)
+
+    def _prices(self, symbols) -> dict:
+        at = self.capture.clock(time.time(), self.policy['replay_speed'])
+        prices = {}
+        for symbol in symbols:
+            captured, factor = self.capture.source(self.asset_type, symbol)
+            if captured not in self.capture.ticks:
+                continue
+            times, values = self.capture.ticks[captured]
+            i = max(0, int(np.searchsorted(times, at, side='right')) - 1)
+            prices[symbol] = to_decimal(values[i] * factor)
+        return prices
+
+    def _history(self, symbol: str, period: str):
+        captured, factor = self.capture.source(self.asset_type, symbol)
+        recorded = self.capture.histories.get((captured, period))
+        if recorded is None:
+            return None
+        recorded_at, seconds, values = recorded
+        # Shift the recorded window so it ends now
+        times = pd.to_datetime(seconds + (time.time() - recorded_at), unit='s', utc=True)
+        return times, values * factor
+
+    def _series(self, symbol: str, period: str):
+        history = self._history(symbol, period)
+        return self._labelled(*history) if history else empty_series()
+
+    def _range(self, symbol: str, start: datetime, end: datetime):
+        for period in ('1y', '5y', 'max'):
+            history = self._history(symbol, period)
+            if history:
+                times, values = history
+                keep = (times >= pd.Timestamp(start)) & (times < pd.Timestamp(end))
+                return times[keep], values[keep]
+        return empty_series()
+
+    def _details(self, symbol: str) -> dict:
+        captured, _ = self.capture.source(self.asset_type, symbol)
+        return self.capture.details.get(captured, {'market_cap': 'N/A', 'volume': 'N/A'})
+
+
+SOURCES = {
+    'simulated': SimulatedAdapter,
+    'replay': ReplayAdapter,
+}
@@ -1,30 +1,112 @@
+from decimal import Decimal
 from celery import shared_task
-from .models import Asset, PricePoint
-from .adapters import get_adapter
+from django.utils.dateparse import parse_datetime
+from .models import Asset, AssetQuote, PricePoint
+from .ingestion import IngestionExecutor
+from .quotes import refresh_quotes
+from .rollups import apply_ticks
+from .retention import enforce_retention
+from .realtime import publish_quotes
+from .generation import PRICES, bump_generation
+from . import market_hours, metrics, write_filter
 import logging
+import time
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
 @shared_task
-def update_asset_prices():
+def update_asset_prices(all_markets=False):
     """
-    Task to update prices for all assets in the database.
+    Task to update prices for the assets whose market is open.
+    Stocks outside their venue's session are skipped except for one
+    settlement fetch after each close (see market_hours); crypto is always
+    fetched. all_markets=True fetches everything regardless.
+    Providers are fetched concurrently by the IngestionExecutor (batched and
+    rate limited per provider); prices that changed (see write_filter) are
+    written with a single bulk_create, while the AssetQuote snapshot and the
+    candle rollups see every fetched price.
+    Tick duration and per-provider results are recorded in assets.metrics.
     """
-    assets = Asset.objects.all()
-    logger.info(f"Starting price update for {assets.count()} assets.")
+    started = time.perf_counter()
+    tracked = list(Asset.objects.all())
+    if all_markets:
+        assets, settling = tracked, []
+    else:
+        assets, settling = market_hours.plan_tick(tracked)
+    if not assets:
+        record_tick(started)
+        return f"All {len(tracked)} assets are in closed markets"
+    logger.info(
+        f"Starting price update for {len(assets)}/{len(tracked)} assets"
+        + (f" (settling {', '.join(settling)})" if settling else "")
+    )
 
+    prices, report = IngestionExecutor().run(assets)
+    for asset_type, stats in report.items():
+        logger.info(
+            f"{asset_type}: {stats['assets']} assets in {stats['calls']} calls, "
+            f"{stats['errors']} errors, {stats['seconds']}s, circuit {stats['circuit']}"
+        )
+        metrics.TICK_PROVIDER_SECONDS.labels(provider=asset_type).observe(stats['seconds'])
+    outcomes = Counter((a.asset_type, 'fetched' if prices.get(a.symbol) else 'failed') for a in assets)
+    for (asset_type, result), count in outcomes.items():
+        metrics.TICK_ASSETS.labels(provider=asset_type, result=result).inc(count)
+
+    points = []
     for asset in assets:
-        try:
-            adapter = get_adapter(asset.asset_type)
-            price = adapter.get_price(asset.symbol, asset.api_identifier)
-            
-            if price:
-                PricePoint.objects.create(asset=asset, price=price)
-                logger.info(f"Updated {asset.symbol}: {price}")
-            else:
-                logger.warning(f"Failed to fetch price for {asset.symbol} (returned None)")
-                
-        except Exception as e:
-            logger.error(f"Error updating {asset.symbol}: {str(e)}")
-            
-    return f"Completed update for {assets.count()} assets"
+        price = prices.get(asset.symbol)
+        if price:
+            points.append(PricePoint(asset=asset, price=price))
+        else:
+            logger.warning(f"Failed to fetch price for {asset.symbol} (returned None)")
+
+    # Only store prices that moved (or are due a heartbeat); quotes still see every tick
+    written = write_filter.changed_points(points)
+    PricePoint.objects.bulk_create(written)
+    write_filter.record_written(written)
+    refresh_quotes({p.asset_id: p.price for p in points})
+    logger.info(f"Wrote {len(written)} of {len(points)} price points.")
+
+    if points:
+        bump_generation(PRICES)
+    publish_quotes(AssetQuote.objects.filter(asset_id__in=[p.asset_id for p in points]).select_related('asset'))
+
+    fetched = {p.asset_id for p in points}
+    settled = {market_hours.venue_for(a) for a in assets if a.pk in fetched}
+    market_hours.mark_settled([venue for venue in settling if venue in settled])
+
+    if points:
+        # Every fetched price extends the open candles, including the ones the write filter skipped
+        rollup_candles.delay([[p.asset_id, str(p.price), p.timestamp.isoformat()] for p in points])
+
+    metrics.TICK_WRITTEN.inc(len(written))
+    record_tick(started)
+
+    timings = ", ".join(f"{t}={s['seconds']}s" for t, s in sorted(report.items()))
+    return f"Completed update for {len(points)}/{len(assets)} assets, wrote {len(written)} ({timings})"
+
+def record_tick(started):
+    metrics.TICK_SECONDS.observe(time.perf_counter() - started)
+    metrics.TICK_LAST.set(time.time())
+
+@shared_task
+def rollup_candles(ticks):
+    """
+    Merge one ingestion tick into the open 1m/1h/1d candles.
+    ticks is a JSON-friendly list of [asset_id, price, iso_timestamp].
+    """
+    written = apply_ticks([
+        (asset_id, Decimal(price), parse_datetime(ts)) for asset_id, price, ts in ticks
+    ])
+    return f"Updated {written} candles"
+
+@shared_task
+def enforce_price_retention():
+    """
+    Prune raw price points and candles past their retention window
+    (dropping whole monthly partitions first when partitioning is enabled).
+    """
+    result = enforce_retention()
+    logger.info(f"Retention: {result}")
+    return result
@@ -1,3 +1,986 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import analytics, backfill, cache as history_cache, market_hours, partitions, retention, write_filter
+from .ingestion import IngestionExecutor, SharedRateLimit, TokenBucket
+from .breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from .downsampling import downsample_series, lttb_indices
+from .models import Asset, BackfillCheckpoint, Candle, PricePoint
+from .rollups import apply_ticks, bucket_start, forward_fill
+from .simulated import ReplayAdapter, SimulatedAdapter, load_capture
+
+nan = np.nan
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class AnalyticsTests(SimpleTestCase):
+    # Eight days, oldest first: a steady climber, and an asset listed on day 2
+    # with a 20% drawdown
+    closes = np.array([
+        [100, nan],
+        [101, 50],
+        [102, 50],
+        [103, 50],
+        [104, 40],
+        [105, 40],
+        [106, 60],
+        [107, 55],
+    ], dtype=np.float64)
+
+    def test_forward_fill(self):
+        filled = analytics.forward_fill(np.array([[nan, 1], [2, nan], [nan, nan], [4, 3]], dtype=np.float64))
+        np.testing.assert_array_equal(filled, [[nan, 1], [2, 1], [2, 1], [4, 3]])
+
+    def test_period_returns(self):
+        returns = analytics.period_returns(self.closes)
+        np.testing.assert_allclose(returns['1d'], [107 / 106 - 1, 55 / 60 - 1])
+        # The second asset has no close seven days back
+        np.testing.assert_allclose(returns['7d'], [0.07, nan])
+        # Windows longer than the matrix are NaN for every asset
+        self.assertTrue(np.isnan(returns['30d']).all())
+        self.assertTrue(np.isnan(returns['1y']).all())
+
+    def test_max_drawdown(self):
+        drawdown = analytics.max_drawdown(np.column_stack([self.closes, np.full(len(self.closes), nan)]))
+        np.testing.assert_allclose(drawdown[:2], [0.0, -0.2])
+        self.assertTrue(np.isnan(drawdown[2]))
+
+    def test_volatility(self):
+        closes = np.array([[1, 5, nan], [2, 5, nan], [1, 5, nan], [2, 5, 3]], dtype=np.float64)
+        vol = analytics.volatility(closes)
+        expected = np.std([math.log(2), -math.log(2), math.log(2)], ddof=1) * math.sqrt(analytics.PERIODS_PER_YEAR)
+        self.assertAlmostEqual(vol[0], expected)
+        self.assertEqual(vol[1], 0.0)
+        # A single price has no returns
+        self.assertTrue(np.isnan(vol[2]))
+
+    def test_portfolio_index(self):
+        # Day 2 averages only the asset that still has a price
+        closes = np.array([[100, 100], [110, 90], [132, nan]], dtype=np.float64)
+        np.testing.assert_allclose(analytics.portfolio_index(closes), [[1.0], [1.0], [1.2]])
+
+    def test_pct(self):
+        self.assertEqual(analytics._pct(0.12345), 12.35)
+        self.assertIsNone(analytics._pct(nan))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch('assets.breaker.time.monotonic', lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(
+            'test', window=4, min_calls=4, failure_rate=0.5, slow_call_seconds=5.0, open_seconds=30.0,
+            half_open_calls=1,
+        )
+
+    def trip(self):
+        for ok in (True, True, False, False):
+            self.breaker.record(ok, 0.1)
+
+    def test_opens_once_the_window_is_bad_enough(self):
+        for ok in (True, True, False):
+            self.breaker.record(ok, 0.1)
+        # Below min_calls nothing trips
+        self.assertEqual(self.breaker.state, CLOSED)
+        # A slow success counts as bad
+        self.breaker.record(True, 6.0)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_admits_one_probe_then_closes(self):
+        self.trip()
+        self.clock += 30
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record(True, 0.1)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        self.trip()
+        self.clock += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(False, 0.1)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open)
+
+    def test_cancelled_probe_releases_its_slot(self):
+        self.trip()
+        self.clock += 30
+
+        def cancelled():
+            raise asyncio.CancelledError
+
+        with self.assertRaises(asyncio.CancelledError):
+            self.breaker.call(cancelled)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertEqual(self.breaker.probes, 0)
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_open_circuit_fails_fast(self):
+        self.trip()
+        upstream = mock.Mock()
+        with self.assertRaises(CircuitOpen):
+            self.breaker.call(upstream)
+        upstream.assert_not_called()
+
+
+class FakeClock:
+    """Stands in for time.time/monotonic; sleep() moves it forward instead of waiting."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    def patch(self, test, *names):
+        for name in names:
+            patcher = mock.patch(name, self)
+            patcher.start()
+            test.addCleanup(patcher.stop)
+        patcher = mock.patch('assets.ingestion.time.sleep', self.sleep)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
+class RateLimitTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clock = FakeClock()
+        self.clock.patch(self, 'assets.ingestion.time.monotonic', 'assets.ingestion.time.time')
+
+    def test_token_bucket_allows_its_burst_then_paces(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+        self.assertTrue(all(bucket.acquire(timeout=0) for _ in range(3)))
+        self.assertFalse(bucket.acquire(timeout=0))
+        # One token every 1 / rate seconds
+        for _ in range(4):
+            self.assertTrue(bucket.acquire())
+        self.assertEqual(self.clock.now, 1002.0)
+
+    def test_token_bucket_timeout(self):
+        bucket = TokenBucket(rate=0.1, capacity=1)
+        bucket.acquire()
+        self.assertFalse(bucket.acquire(timeout=3))
+        self.assertEqual(self.clock.now, 1003.0)
+
+    def test_token_bucket_refill_is_capped(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.clock.now += 60
+        self.assertEqual(sum(bucket.acquire(timeout=0) for _ in range(5)), 2)
+
+    def test_shared_limit_is_shared_between_instances(self):
+        # Two processes' limiters for one provider: capacity 4 per 2 second window between them
+        first, second = SharedRateLimit('CRYPTO', rate=2, capacity=4), SharedRateLimit('CRYPTO', rate=2, capacity=4)
+        self.assertTrue(all(limit.acquire(timeout=0) for limit in (first, second, first, second)))
+        self.assertFalse(first.acquire(timeout=0))
+        self.assertFalse(second.acquire(timeout=0))
+        # Another provider has its own budget
+        self.assertTrue(SharedRateLimit('STOCK_GLOBAL', rate=2, capacity=4).acquire(timeout=0))
+
+        # The next call waits for the next window
+        self.assertTrue(second.acquire())
+        self.assertEqual(self.clock.now, 1002.0)
+        self.assertEqual(sum(first.acquire(timeout=0) for _ in range(5)), 3)
+
+
+class RecordingAdapter:
+    """get_prices() that records how many calls to its provider overlap, optionally failing."""
+
+    def __init__(self, fail=False, seconds=0.02):
+        self.fail = fail
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.started = []
+
+    def get_prices(self, assets):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.started.append(time.monotonic())
+        try:
+            time.sleep(self.seconds)
+            if self.fail:
+                raise ConnectionError('upstream down')
+            return {asset.symbol: Decimal(len(asset.symbol)) for asset in assets}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@override_settings(INGESTION_PROVIDERS={
+    'CRYPTO': {'max_concurrency': 2, 'rate': 1000, 'burst': 1000, 'batch_size': 2},
+    'STOCK_GLOBAL': {'max_concurrency': 3, 'rate': 1000, 'burst': 1000, 'batch_size': 1},
+    'STOCK_DSE': {'max_concurrency': 3, 'rate': 25, 'burst': 1, 'batch_size': 1},
+})
+class IngestionExecutorTests(SimpleTestCase):
+
+    def setUp(self):
+        # Fresh buckets and breakers for every test
+        for name in ('assets.ingestion._buckets', 'assets.breaker._breakers'):
+            patcher = mock.patch.dict(name, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assets(self, asset_type, count):
+        return [Asset(symbol=f'{asset_type}{i}', asset_type=asset_type) for i in range(count)]
+
+    def run_executor(self, adapters, assets):
+        def get_adapter(asset_type):
+            if asset_type not in adapters:
+                raise ValueError(f'No adapter for {asset_type}')
+            return adapters[asset_type]
+
+        with mock.patch('assets.ingestion.get_adapter', side_effect=get_adapter):
+            return IngestionExecutor(acquire_timeout=5).run(assets)
+
+    def test_concurrency_is_capped_per_provider(self):
+        crypto, stock = RecordingAdapter(), RecordingAdapter()
+        prices, report = self.run_executor(
+            {'CRYPTO': crypto, 'STOCK_GLOBAL': stock},
+            self.assets('CRYPTO', 12) + self.assets('STOCK_GLOBAL', 9),
+        )
+        self.assertEqual(len(prices), 21)
+        self.assertEqual((len(crypto.started), crypto.max_active), (6, 2))
+        self.assertLessEqual(stock.max_active, 3)
+        self.assertEqual(report['CRYPTO']['calls'], 6)
+        self.assertEqual(report['STOCK_GLOBAL']['calls'], 9)
+
+    def test_calls_are_paced_by_the_rate(self):
+        dse = RecordingAdapter(seconds=0)
+        prices, report = self.run_executor({'STOCK_DSE': dse}, self.assets('STOCK_DSE', 6))
+        self.assertEqual(len(prices), 6)
+        # A burst of one at 25 calls a second: each call waits about 40ms for its token
+        gaps = np.diff(sorted(dse.started))
+        self.assertGreater(gaps.min(), 0.03)
+
+    def test_failing_provider_keeps_the_others(self):
+        crypto, stock = RecordingAdapter(), RecordingAdapter(fail=True)
+        assets = self.assets('CRYPTO', 4) + self.assets('STOCK_GLOBAL', 3) + self.assets('BONDS', 2)
+        with self.assertLogs('assets.ingestion', 'ERROR'):
+            prices, report = self.run_executor({'CRYPTO': crypto, 'STOCK_GLOBAL': stock}, assets)
+        self.assertEqual(sorted(prices), ['CRYPTO0', 'CRYPTO1', 'CRYPTO2', 'CRYPTO3'])
+        self.assertEqual(report['CRYPTO']['errors'], 0)
+        self.assertEqual((report['STOCK_GLOBAL']['calls'], report['STOCK_GLOBAL']['errors']), (3, 3))
+        # A type without an adapter is an error for its own provider only
+        self.assertEqual((report['BONDS']['calls'], report['BONDS']['errors']), (0, 1))
+
+
+class MarketHoursTests(SimpleTestCase):
+    # Monday 2026-10-19; New York is on EDT (UTC-4), Dhaka on UTC+6
+    btc = Asset(pk=1, symbol='BTC', asset_type='CRYPTO')
+    aapl = Asset(pk=2, symbol='AAPL', asset_type='STOCK_GLOBAL')
+    square = Asset(pk=3, symbol='SQURPHARMA', asset_type='STOCK_DSE')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_venue_for(self):
+        self.assertIsNone(market_hours.venue_for(self.btc))
+        self.assertEqual(market_hours.venue_for(self.aapl), 'US')
+        self.assertEqual(market_hours.venue_for(Asset(symbol='VOD.L', asset_type='STOCK_GLOBAL')), 'LSE')
+        self.assertEqual(market_hours.venue_for(Asset(symbol='7203.T', asset_type='STOCK_GLOBAL')), 'JPX')
+        self.assertEqual(market_hours.venue_for(self.square), 'DSE')
+
+    def test_sessions(self):
+        self.assertTrue(market_hours.is_open('US', utc(2026, 10, 19, 13, 30)))
+        self.assertFalse(market_hours.is_open('US', utc(2026, 10, 19, 13, 29)))
+        self.assertFalse(market_hours.is_open('US', utc(2026, 10, 19, 20, 0)))
+        # Sunday is a DSE trading day but not a US one
+        self.assertFalse(market_hours.is_open('US', utc(2026, 10, 18, 18, 0)))
+        self.assertTrue(market_hours.is_open('DSE', utc(2026, 10, 18, 5, 0)))
+        self.assertTrue(market_hours.is_open(None, utc(2026, 10, 18, 5, 0)))
+
+    @override_settings(MARKET_HOLIDAYS={'US': ['2026-10-19']})
+    def test_holidays_close_the_venue(self):
+        self.assertFalse(market_hours.is_open('US', utc(2026, 10, 19, 18, 0)))
+        self.assertTrue(market_hours.is_open('LSE', utc(2026, 10, 19, 12, 0)))
+        # The last close skips the holiday back to Friday
+        self.assertEqual(market_hours.last_close('US', utc(2026, 10, 19, 18, 0)), utc(2026, 10, 16, 20, 0))
+
+    def test_plan_tick_during_the_session(self):
+        now = utc(2026, 10, 19, 18, 0)
+        market_hours.mark_settled(['DSE'], now)
+        due, settling = market_hours.plan_tick([self.btc, self.aapl, self.square], now)
+        # DSE closed at 08:30 UTC and is already settled
+        self.assertEqual(due, [self.btc, self.aapl])
+        self.assertEqual(settling, [])
+
+    def test_one_settlement_fetch_after_the_close(self):
+        assets = [self.btc, self.aapl]
+        # Still inside the settlement delay
+        self.assertEqual(market_hours.plan_tick(assets, utc(2026, 10, 19, 20, 2)), ([self.btc], []))
+
+        now = utc(2026, 10, 19, 20, 10)
+        self.assertEqual(market_hours.plan_tick(assets, now), ([self.btc, self.aapl], ['US']))
+        market_hours.mark_settled(['US'], now)
+        self.assertEqual(market_hours.plan_tick(assets, utc(2026, 10, 19, 20, 20)), ([self.btc], []))
+
+
+class WriteFilterTests(SimpleTestCase):
+    policy = {'epsilon': 0.001, 'heartbeat_seconds': 900}
+    now = utc(2026, 10, 19, 12, 0)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_should_write(self):
+        written_at = self.now.timestamp() - 60
+        self.assertTrue(write_filter.should_write(None, Decimal('100'), self.now, self.policy))
+        # 0.05% is inside epsilon, 0.2% is not
+        self.assertFalse(write_filter.should_write((Decimal('100'), written_at), Decimal('100.05'), self.now, self.policy))
+        self.assertTrue(write_filter.should_write((Decimal('100'), written_at), Decimal('99.8'), self.now, self.policy))
+        # An unchanged price is still written once the heartbeat is due
+        stale = (Decimal('100'), self.now.timestamp() - 900)
+        self.assertTrue(write_filter.should_write(stale, Decimal('100'), self.now, self.policy))
+        # Zero has no relative change
+        self.assertFalse(write_filter.should_write((Decimal('0'), written_at), Decimal('0'), self.now, self.policy))
+        self.assertTrue(write_filter.should_write((Decimal('0'), written_at), Decimal('1'), self.now, self.policy))
+
+    @override_settings(PRICE_WRITE_FILTER={'CRYPTO': {'epsilon': 0.001, 'heartbeat_seconds': 900}})
+    def test_changed_points_remembers_what_was_written(self):
+        btc = Asset(pk=1, symbol='BTC', asset_type='CRYPTO')
+        eth = Asset(pk=2, symbol='ETH', asset_type='CRYPTO')
+        first = [PricePoint(asset=btc, price=Decimal('100')), PricePoint(asset=eth, price=Decimal('10'))]
+        # Cold cache: everything is written once
+        self.assertEqual(write_filter.changed_points(first, self.now), first)
+        write_filter.record_written(first, self.now)
+
+        later = self.now + timedelta(minutes=1)
+        moved = PricePoint(asset=eth, price=Decimal('11'))
+        second = [PricePoint(asset=btc, price=Decimal('100.01')), moved]
+        self.assertEqual(write_filter.changed_points(second, later), [moved])
+        # Past the heartbeat both are due again
+        self.assertEqual(write_filter.changed_points(second, self.now + timedelta(minutes=15)), second)
+
+
+class ForwardFillTests(SimpleTestCase):
+    start = utc(2026, 10, 19, 12, 0)
+
+    def minute(self, n):
+        return self.start + timedelta(minutes=n)
+
+    def test_fills_gaps_up_to_the_heartbeat(self):
+        rows = [(self.minute(0), 1), (self.minute(3), 2), (self.minute(10), 3)]
+        filled = forward_fill(rows, '1m', 120, end=self.minute(11))
+        self.assertEqual(filled, [
+            (self.minute(0), 1), (self.minute(1), 1), (self.minute(2), 1),
+            (self.minute(3), 2), (self.minute(4), 2), (self.minute(5), 2),
+            # Minutes 6-9 are beyond the heartbeat and stay empty
+            (self.minute(10), 3), (self.minute(11), 3),
+        ])
+
+    def test_buckets_longer_than_the_heartbeat_still_fill_one(self):
+        hour = timedelta(hours=1)
+        rows = [(self.start, 1), (self.start + 3 * hour, 2)]
+        filled = forward_fill(rows, '1h', 900, end=self.start + 3 * hour)
+        self.assertEqual(filled, [(self.start, 1), (self.start + hour, 1), (self.start + 3 * hour, 2)])
+
+    def test_empty(self):
+        self.assertEqual(forward_fill([], '1m', 900, end=self.start), [])
+
+
+class LTTBTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.times = pd.date_range('2026-10-01', periods=1000, freq='min', tz='UTC')
+        self.values = np.cumsum(rng.normal(size=1000))
+        self.values[400] = 1000.0  # a spike any chart must show
+
+    def test_keeps_endpoints_in_order(self):
+        x = np.arange(len(self.values))
+        for threshold in (3, 10, 100, 999):
+            with self.subTest(threshold=threshold):
+                idx = lttb_indices(x, self.values, threshold)
+                self.assertEqual(len(idx), threshold)
+                self.assertEqual((idx[0], idx[-1]), (0, len(x) - 1))
+                self.assertTrue((np.diff(idx) > 0).all())
+
+    def test_keeps_extremes(self):
+        idx = lttb_indices(np.arange(len(self.values)), self.values, 50)
+        self.assertIn(400, idx)
+
+    def test_short_series_are_returned_unchanged(self):
+        for threshold in (None, 0, 1000, 5000):
+            with self.subTest(threshold=threshold):
+                times, values = downsample_series(self.times, self.values, threshold)
+                self.assertIs(times, self.times)
+                self.assertIs(values, self.values)
+        np.testing.assert_array_equal(lttb_indices([1, 2, 3], [1, 2, 3], 2), [0, 1, 2])
+
+    def test_downsample_series(self):
+        times, values = downsample_series(self.times, self.values, 100)
+        self.assertEqual(len(times), 100)
+        self.assertEqual((times[0], times[-1]), (self.times[0], self.times[-1]))
+        self.assertTrue(times.is_monotonic_increasing)
+        np.testing.assert_array_equal(values, self.values[self.times.get_indexer(times)])
+
+
+class ApplyTicksTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asset = Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+        cls.other = Asset.objects.create(symbol='ETH', name='Ethereum', asset_type='CRYPTO')
+
+    def ohlc(self, resolution):
+        return list(
+            Candle.objects.filter(asset=self.asset, resolution=resolution)
+            .values_list('bucket_start', 'open', 'high', 'low', 'close')
+        )
+
+    def test_builds_every_resolution(self):
+        at = utc(2026, 10, 19, 12, 0, 10)
+        ticks = [
+            (self.asset.pk, Decimal('101'), at + timedelta(seconds=20)),
+            # Out of order: the earliest tick is the open
+            (self.asset.pk, Decimal('100'), at),
+            (self.asset.pk, Decimal('99'), at + timedelta(seconds=40)),
+            (self.asset.pk, Decimal('102'), at + timedelta(minutes=1)),
+            (self.other.pk, Decimal('5'), at),
+        ]
+        # Candles written: 1m (BTC twice, ETH once), 1h and 1d (once per asset)
+        self.assertEqual(apply_ticks(ticks), 3 + 2 + 2)
+
+        minute = utc(2026, 10, 19, 12, 0)
+        self.assertEqual(self.ohlc('1m'), [
+            (minute, Decimal('100'), Decimal('101'), Decimal('99'), Decimal('99')),
+            (minute + timedelta(minutes=1), Decimal('102'), Decimal('102'), Decimal('102'), Decimal('102')),
+        ])
+        self.assertEqual(self.ohlc('1h'), [(minute, Decimal('100'), Decimal('102'), Decimal('99'), Decimal('102'))])
+        self.assertEqual(self.ohlc('1d'), [
+            (utc(2026, 10, 19), Decimal('100'), Decimal('102'), Decimal('99'), Decimal('102')),
+        ])
+
+    def test_merges_into_open_candles(self):
+        at = utc(2026, 10, 19, 12, 0, 10)
+        apply_ticks([(self.asset.pk, Decimal('100'), at)])
+        apply_ticks([(self.asset.pk, Decimal('95'), at + timedelta(seconds=5))])
+        apply_ticks([(self.asset.pk, Decimal('97'), at + timedelta(seconds=10))])
+        for resolution in ('1m', '1h', '1d'):
+            with self.subTest(resolution=resolution):
+                (_, *ohlc), = self.ohlc(resolution)
+                self.assertEqual(ohlc, [Decimal('100'), Decimal('100'), Decimal('95'), Decimal('97')])
+
+    def test_out_of_order_batches(self):
+        at = utc(2026, 10, 19, 12, 0)
+        earlier = [
+            (self.asset.pk, Decimal('100'), at + timedelta(seconds=10)),
+            (self.asset.pk, Decimal('101'), at + timedelta(seconds=30)),
+        ]
+        later = [
+            (self.asset.pk, Decimal('99'), at + timedelta(seconds=40)),
+            (self.asset.pk, Decimal('102'), at + timedelta(minutes=1)),
+        ]
+        # The slower rollup task lands last
+        apply_ticks(later)
+        apply_ticks(earlier)
+
+        self.assertEqual(self.ohlc('1m'), [
+            (at, Decimal('100'), Decimal('101'), Decimal('99'), Decimal('99')),
+            (at + timedelta(minutes=1), Decimal('102'), Decimal('102'), Decimal('102'), Decimal('102')),
+        ])
+        for resolution in ('1h', '1d'):
+            with self.subTest(resolution=resolution):
+                (_, *ohlc), = self.ohlc(resolution)
+                self.assertEqual(ohlc, [Decimal('100'), Decimal('102'), Decimal('99'), Decimal('102')])
+
+    def test_candles_without_tick_times_keep_their_open(self):
+        minute = utc(2026, 10, 19, 12, 0)
+        Candle.objects.create(
+            asset=self.asset, resolution='1m', bucket_start=minute,
+            open=Decimal('50'), high=Decimal('60'), low=Decimal('40'), close=Decimal('55'),
+        )
+        apply_ticks([(self.asset.pk, Decimal('70'), minute + timedelta(seconds=5))])
+        self.assertEqual(self.ohlc('1m'), [(minute, Decimal('50'), Decimal('70'), Decimal('40'), Decimal('70'))])
+
+    def test_no_ticks(self):
+        self.assertEqual(apply_ticks([]), 0)
+        self.assertFalse(Candle.objects.exists())
+
+
+class SharedCacheTests(SimpleTestCase):
+    key = 'history:1:1mo'
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def loader(self, value='fresh', delay=0.0, error=None):
+        async def load():
+            self.calls += 1
+            await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            return value
+        return load
+
+    async def expire(self):
+        envelope = await cache.aget(self.key)
+        envelope['fresh_until'] = 0
+        await cache.aset(self.key, envelope)
+
+    async def revalidated(self):
+        await asyncio.gather(*history_cache._revalidate_tasks)
+
+    async def test_miss_then_hit(self):
+        self.assertEqual(await history_cache.aget_or_fetch(self.key, self.loader(), 60), ('fresh', False))
+        self.assertEqual(await history_cache.aget_or_fetch(self.key, self.loader('other'), 60), ('fresh', False))
+        self.assertEqual(self.calls, 1)
+
+    async def test_concurrent_misses_fetch_once(self):
+        results = await asyncio.gather(*(
+            history_cache.aget_or_fetch(self.key, self.loader(delay=0.1), 60) for _ in range(5)
+        ))
+        self.assertEqual(results, [('fresh', False)] * 5)
+        self.assertEqual(self.calls, 1)
+
+    async def test_stale_is_served_while_revalidating(self):
+        await history_cache.aget_or_fetch(self.key, self.loader('old'), 60)
+        await self.expire()
+        self.assertEqual(await history_cache.aget_or_fetch(self.key, self.loader('new'), 60), ('old', False))
+        await self.revalidated()
+        self.assertEqual(await history_cache.aget_or_fetch(self.key, self.loader(), 60), ('new', False))
+        self.assertEqual(self.calls, 2)
+
+    async def test_stale_is_flagged_while_the_provider_fails(self):
+        await history_cache.aget_or_fetch(self.key, self.loader('old'), 60)
+        await self.expire()
+        failing = self.loader(error=ConnectionError('down'))
+        await history_cache.aget_or_fetch(self.key, failing, 60)
+        await self.revalidated()
+        self.assertEqual(await history_cache.aget_or_fetch(self.key, failing, 60), ('old', True))
+        await self.revalidated()
+        # Or straight away when the breaker says it cannot succeed
+        await cache.adelete(history_cache._failed_key(self.key))
+        self.assertEqual(
+            await history_cache.aget_or_fetch(self.key, self.loader(), 60, unavailable=lambda: True), ('old', True),
+        )
+
+    async def test_waiters_time_out_instead_of_fetching(self):
+        # Another worker holds the fetch lock and never fills the key
+        await cache.aadd(f'{self.key}:lock', 1)
+        with self.assertRaises(history_cache.CacheWaitTimeout):
+            await history_cache.aget_or_fetch(self.key, self.loader(), 60, wait=0.1)
+        self.assertEqual(self.calls, 0)
+
+    def test_packed_series_keep_their_zone(self):
+        times = pd.date_range('2026-10-19 09:30', periods=3, freq='h', tz='America/New_York')
+        packed = history_cache.pack_series(times, [1, 2, 3])
+        unpacked_times, values = history_cache.unpack_series(packed)
+        self.assertTrue(unpacked_times.equals(times))
+        self.assertEqual(str(unpacked_times.tz), 'America/New_York')
+        np.testing.assert_array_equal(values, [1.0, 2.0, 3.0])
+
+
+@override_settings(
+    PRICE_RETENTION_DAYS={'CRYPTO': 2, 'STOCK_GLOBAL': 10},
+    CANDLE_RETENTION_DAYS={'1m': 3, '1h': 30, '1d': None},
+)
+class RetentionTests(TestCase):
+    now = utc(2024, 6, 15, 12)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.crypto = Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+        cls.stock = Asset.objects.create(symbol='AAPL', name='Apple', asset_type='STOCK_GLOBAL')
+        # Every 12 hours over the last 20 days, on both sides of each type's cutoff
+        times = [cls.now - timedelta(hours=12 * i) for i in range(40)]
+        PricePoint.objects.bulk_create(
+            PricePoint(asset=asset, price=Decimal('1'), timestamp=ts) for asset in (cls.crypto, cls.stock) for ts in times
+        )
+        Candle.objects.bulk_create(
+            Candle(asset=cls.crypto, resolution=resolution, bucket_start=cls.now - timedelta(days=days),
+                   open=1, high=1, low=1, close=1)
+            for resolution in ('1m', '1h', '1d') for days in (1, 3, 10, 365)
+        )
+
+    def timestamps(self, asset):
+        return set(asset.price_points.values_list('timestamp', flat=True))
+
+    def deletes(self, queries, model):
+        return [q for q in queries if q['sql'].startswith(f'DELETE FROM "{model._meta.db_table}"')]
+
+    def test_only_expired_points_are_pruned_in_batches(self):
+        expired = PricePoint.objects.filter(asset=self.crypto, timestamp__lt=self.now - timedelta(days=2)).count()
+        with CaptureQueriesContext(connection) as queries:
+            deleted = retention.prune_price_points(self.now, batch_size=10)
+
+        # The point exactly at the cutoff stays
+        self.assertEqual(min(self.timestamps(self.crypto)), self.now - timedelta(days=2))
+        self.assertEqual(min(self.timestamps(self.stock)), self.now - timedelta(days=10))
+        self.assertEqual(len(self.timestamps(self.crypto)), 5)
+        self.assertEqual(len(self.timestamps(self.stock)), 21)
+        self.assertEqual((expired, deleted), (35, 35 + 19))
+        # Ten rows at a time: four CRYPTO deletes and two STOCK_GLOBAL ones
+        self.assertEqual(len(self.deletes(queries, PricePoint)), 6)
+
+    def test_candles_are_pruned_per_resolution(self):
+        with CaptureQueriesContext(connection) as queries:
+            deleted = retention.prune_candles(self.now, batch_size=1)
+        kept = set(Candle.objects.values_list('resolution', 'bucket_start'))
+        self.assertEqual(kept, {
+            ('1m', self.now - timedelta(days=1)), ('1m', self.now - timedelta(days=3)),
+            ('1h', self.now - timedelta(days=1)), ('1h', self.now - timedelta(days=3)),
+            ('1h', self.now - timedelta(days=10)),
+            # Kept forever
+            *(('1d', self.now - timedelta(days=days)) for days in (1, 3, 10, 365)),
+        })
+        self.assertEqual(deleted, 3)
+        self.assertEqual(len(self.deletes(queries, Candle)), 3)
+
+    def test_enforce_retention_without_partitions(self):
+        result = retention.enforce_retention(self.now)
+        self.assertEqual(result, {'partitions_dropped': [], 'price_points': 54, 'candles': 3})
+
+    def test_enforce_retention_drops_whole_partitions_first(self):
+        with mock.patch.object(partitions, 'enabled', return_value=True), \
+                mock.patch.object(partitions, 'ensure_partitions') as ensure, \
+                mock.patch.object(partitions, 'drop_partitions_before', return_value=['p']) as drop:
+            result = retention.enforce_retention(self.now)
+        ensure.assert_called_once_with(connection, self.now)
+        # Only months older than the longest raw retention
+        drop.assert_called_once_with(connection, self.now - timedelta(days=10))
+        self.assertEqual(result['partitions_dropped'], ['p'])
+
+
+class PartitionTests(SimpleTestCase):
+
+    def connection(self):
+        conn = mock.MagicMock()
+        self.cursor = conn.cursor.return_value.__enter__.return_value
+        return conn
+
+    def statements(self):
+        return [c.args[0] for c in self.cursor.execute.call_args_list]
+
+    def test_months(self):
+        self.assertEqual(partitions.month_start(utc(2024, 2, 29, 23)), utc(2024, 2, 1))
+        self.assertEqual(partitions.add_months(utc(2024, 11, 1), 3), utc(2025, 2, 1))
+        self.assertEqual(partitions.add_months(utc(2024, 1, 1), -1), utc(2023, 12, 1))
+        self.assertEqual(partitions.partition_name(utc(2024, 3, 1)), f'{partitions.TABLE}_p202403')
+
+    def test_ensure_partitions(self):
+        conn = self.connection()
+        partitions.ensure_partitions(conn, utc(2024, 12, 15), months_ahead=2)
+        self.assertEqual(
+            [c.args[1] for c in self.cursor.execute.call_args_list],
+            [[utc(2024, 12, 1), utc(2025, 1, 1)], [utc(2025, 1, 1), utc(2025, 2, 1)], [utc(2025, 2, 1), utc(2025, 3, 1)]],
+        )
+
+    def test_only_wholly_expired_partitions_are_dropped(self):
+        conn = self.connection()
+        months = [(utc(2024, month, 1), partitions.partition_name(utc(2024, month, 1))) for month in (3, 4, 5, 6)]
+        with mock.patch.object(partitions, 'list_partitions', return_value=months):
+            # April ends exactly at the cutoff; May still holds live rows
+            dropped = partitions.drop_partitions_before(conn, utc(2024, 5, 1))
+        self.assertEqual(dropped, [months[0][1], months[1][1]])
+        self.assertEqual(self.statements(), [
+            f'ALTER TABLE "{partitions.TABLE}" DETACH PARTITION "{months[0][1]}"', f'DROP TABLE "{months[0][1]}"',
+            f'ALTER TABLE "{partitions.TABLE}" DETACH PARTITION "{months[1][1]}"', f'DROP TABLE "{months[1][1]}"',
+        ])
+
+    def test_disabled_off_postgresql(self):
+        conn = self.connection()
+        conn.vendor = 'sqlite'
+        with self.settings(PRICEPOINT_PARTITIONING=True):
+            self.assertFalse(partitions.enabled(conn))
+        conn.cursor.assert_not_called()
+
+
+def hourly_price(ts) -> float:
+    hour = int(ts.timestamp() // 3600)
+    return 100 + hour % 50 + (hour % 7) * 0.5
+
+
+class HourlyHistoryAdapter:
+    """get_history_range over a deterministic hourly series; fails on the calls listed in fail_on."""
+
+    def __init__(self, fail_on=()):
+        self.calls = 0
+        self.fail_on = set(fail_on)
+
+    def get_history_range(self, symbol, start, end, identifier=None):
+        self.calls += 1
+        if self.calls in self.fail_on:
+            raise ConnectionError('upstream went away')
+        times = pd.date_range(start, end, freq='h', inclusive='left')
+        return times, np.array([hourly_price(ts) for ts in times])
+
+
+class BackfillTests(TestCase):
+
+    def setUp(self):
+        # Live data starts at the current hour; the backfill covers the 40 days before it
+        self.live = bucket_start(timezone.now(), '1h')
+        self.start = self.live - timedelta(days=40)
+        self.asset = Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+        PricePoint.objects.create(asset=self.asset, price=Decimal('1'), timestamp=self.live)
+        limit = mock.patch('assets.backfill.get_shared_limit')
+        limit.start()
+        self.addCleanup(limit.stop)
+
+    def expected_hours(self, since):
+        return list(pd.date_range(since, self.live, freq='h', inclusive='left').to_pydatetime())
+
+    def assertBackfilled(self):
+        # 1h candles: one per hour of the backfilled range, nothing missing or repeated
+        candles = list(
+            Candle.objects.filter(asset=self.asset, resolution='1h', bucket_start__lt=self.live)
+            .order_by('bucket_start').values_list('bucket_start', 'close')
+        )
+        hours = self.expected_hours(self.start)
+        self.assertEqual([start for start, _ in candles], hours)
+        self.assertEqual([float(close) for _, close in candles], [round(hourly_price(h), 4) for h in hours])
+
+        # Daily candles span chunk boundaries; each is the OHLC of its own hours
+        for day in Candle.objects.filter(asset=self.asset, resolution='1d', bucket_start__gt=self.start):
+            values = [hourly_price(h) for h in hours if bucket_start(h, '1d') == day.bucket_start]
+            self.assertEqual(
+                [float(day.open), float(day.high), float(day.low), float(day.close)],
+                [values[0], max(values), min(values), values[-1]],
+            )
+
+        # Raw points only inside raw retention, once each, and never past the live data
+        cutoff = self.live - timedelta(days=7)
+        raw = list(
+            PricePoint.objects.filter(asset=self.asset, timestamp__lt=self.live)
+            .order_by('timestamp').values_list('timestamp', flat=True)
+        )
+        self.assertTrue(cutoff - timedelta(hours=1) <= raw[0] <= cutoff + timedelta(hours=1))
+        self.assertEqual(raw, [h for h in hours if h >= raw[0]])
+
+    def backfill(self, adapter):
+        with mock.patch('assets.backfill.get_adapter', return_value=adapter):
+            return backfill.backfill_upstream(self.asset, self.start, chunk_days=10, batch_size=100)
+
+    def test_interrupted_upstream_backfill_resumes(self):
+        with self.assertRaises(ConnectionError):
+            self.backfill(HourlyHistoryAdapter(fail_on={3}))
+        checkpoint = BackfillCheckpoint.objects.get(asset=self.asset, source=backfill.UPSTREAM)
+        self.assertEqual((checkpoint.end, checkpoint.completed), (self.live, False))
+        self.assertEqual(checkpoint.backfilled_until, self.start + timedelta(days=20))
+
+        adapter = HourlyHistoryAdapter()
+        self.assertEqual(self.backfill(adapter), 20 * 24)
+        # Resumed at the third chunk
+        self.assertEqual(adapter.calls, 2)
+        self.assertTrue(BackfillCheckpoint.objects.get(pk=checkpoint.pk).completed)
+        self.assertBackfilled()
+        # A completed backfill does nothing
+        self.assertEqual(self.backfill(HourlyHistoryAdapter()), 0)
+
+    def test_interrupted_file_backfill_resumes(self):
+        hours = self.expected_hours(self.start) + [self.live, self.live + timedelta(hours=1)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'history.csv')
+            pd.DataFrame({
+                'symbol': [symbol for _ in hours for symbol in ('BTC', 'UNKNOWN')],
+                'timestamp': [h.isoformat() for h in hours for _ in range(2)],
+                'price': [hourly_price(h) for h in hours for _ in range(2)],
+            }).to_csv(path, index=False)
+
+            real_commit = backfill.commit_chunk
+            calls = []
+
+            def commit_then_fail(*args, **kwargs):
+                calls.append(1)
+                if len(calls) == 4:
+                    raise ConnectionError('database went away')
+                return real_commit(*args, **kwargs)
+
+            with mock.patch('assets.backfill.commit_chunk', side_effect=commit_then_fail):
+                with self.assertRaises(ConnectionError):
+                    backfill.backfill_file(path, [self.asset], batch_size=200)
+            first_run = Candle.objects.filter(asset=self.asset, resolution='1h').count()
+            self.assertEqual(first_run, 3 * 100)
+
+            written = backfill.backfill_file(path, [self.asset], batch_size=200)
+        # Rows at and after the live data are skipped
+        self.assertEqual(written, {'BTC': 40 * 24 - first_run})
+        self.assertBackfilled()
+
+
+class SimulatedAdapterTests(SimpleTestCase):
+    times = pd.date_range('2024-03-01', periods=2000, freq='min', tz='UTC')
+
+    def adapter(self, **policy):
+        with self.settings(MARKET_SIMULATION={'CRYPTO': policy}):
+            return SimulatedAdapter('CRYPTO')
+
+    def test_fixed_seed_is_deterministic(self):
+        btc = self.adapter(seed=7).prices_at(['BTC'], self.times)
+        np.testing.assert_array_equal(self.adapter(seed=7).prices_at(['BTC'], self.times), btc)
+        # Any point is computed on its own: the same price whatever else is evaluated with it
+        self.assertEqual(self.adapter(seed=7).prices_at(['BTC'], [self.times[1234]])[0], btc[1234])
+        at = [self.times[5]] * 3
+        self.assertEqual(self.adapter(seed=7).prices_at(['ETH', 'BTC', 'SOL'], at)[1], btc[5])
+        # Other seeds and symbols get other paths
+        self.assertFalse(np.allclose(self.adapter(seed=7).prices_at(['ETH'], self.times), btc))
+        self.assertFalse(np.allclose(self.adapter(seed=8).prices_at(['BTC'], self.times), btc))
+
+    def test_gbm_increments(self):
+        adapter = self.adapter(seed=3, mu=0.0, sigma=0.8, min_price=0.001, max_price=1e9)
+        returns = np.diff(np.log(adapter.prices_at(['BTC'], pd.date_range('2024-01-01', periods=50_000, freq='min', tz='UTC'))))
+        expected = 0.8 * math.sqrt(60 / (365.25 * 86400))
+        self.assertAlmostEqual(returns.std() / expected, 1, delta=0.05)
+        self.assertLess(abs(returns.mean()), 3 * expected / math.sqrt(len(returns)))
+
+    def test_prices_stay_within_bounds(self):
+        adapter = self.adapter(sigma=3.0, min_price=10, max_price=20)
+        days = pd.date_range('2020-01-01', periods=5000, freq='D', tz='UTC')
+        prices = np.concatenate([adapter.prices_at([symbol], days) for symbol in ('BTC', 'ETH')])
+        self.assertGreaterEqual(prices.min(), 10 * (1 - 1e-9))
+        self.assertLessEqual(prices.max(), 20 * (1 + 1e-9))
+
+    def test_history_range_respects_its_bounds(self):
+        adapter = self.adapter()
+        start = utc(2024, 3, 1, 10, 7)
+        for span, step in ((timedelta(hours=6), timedelta(minutes=5)), (timedelta(days=30), timedelta(hours=1)),
+                           (timedelta(days=200), timedelta(days=1))):
+            times, values = adapter.get_history_range('BTC', start, start + span)
+            self.assertGreaterEqual(times[0], start)
+            self.assertLess(times[-1], start + span)
+            self.assertLessEqual(times[0] - start, step)
+            self.assertGreater(times[-1] + step, start + span - step)
+            self.assertEqual(set(times[1:] - times[:-1]), {pd.Timedelta(step)})
+            np.testing.assert_array_equal(values, adapter.prices_at(['BTC'], times))
+        times, values = adapter.get_history_range('BTC', start, start)
+        self.assertEqual((len(times), len(values)), (0, 0))
+
+    def test_error_rate(self):
+        with self.assertRaisesMessage(ValueError, 'Simulated CRYPTO upstream error'):
+            self.adapter(error_rate=1.0).get_prices([Asset(symbol='BTC', asset_type='CRYPTO')])
+
+
+def epoch_seconds(times) -> list:
+    return times.as_unit('s').asi8.tolist()
+
+
+class ReplayAdapterTests(TestCase):
+    # Three CRYPTO ticks a minute apart, a recorded day of history and details
+    records = [
+        {'t': 1000.0, 'asset_type': 'CRYPTO', 'method': 'get_prices', 'result': {'BTC': '10', 'ETH': '1'}},
+        {'t': 1060.0, 'asset_type': 'CRYPTO', 'method': 'get_prices', 'result': {'BTC': '11', 'ETH': '2'}},
+        {'t': 1120.0, 'asset_type': 'CRYPTO', 'method': 'get_prices', 'result': {'BTC': '12', 'ETH': '3'}},
+        {'t': 5000.0, 'asset_type': 'CRYPTO', 'method': 'get_history_series', 'symbol': 'BTC', 'period': '1y',
+         'result': {'t': [1000, 2000, 3000, 4000], 'v': [1.0, 2.0, 3.0, 4.0]}},
+        {'t': 5000.0, 'asset_type': 'CRYPTO', 'method': 'get_details', 'symbol': 'BTC',
+         'result': {'market_cap': '$1.00T', 'volume': '$20.00B'}},
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'capture.ndjson')
+        load_capture.cache_clear()
+        self.addCleanup(load_capture.cache_clear)
+
+    def write(self, records):
+        with open(self.path, 'w') as f:
+            f.write('\n'.join(json.dumps(record) for record in records) + '\n\n')
+
+    def adapter(self, now, asset_type='CRYPTO'):
+        patcher = mock.patch('assets.simulated.time.time', return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.settings(MARKET_REPLAY_FILE=self.path):
+            return ReplayAdapter(asset_type)
+
+    def prices(self, adapter, *symbols):
+        return adapter.get_prices([Asset(symbol=symbol, asset_type=adapter.asset_type) for symbol in symbols])
+
+    def test_prices_replay_the_capture_in_a_loop(self):
+        self.write(self.records)
+        # The 120 second capture replays from wall-clock time modulo its span
+        for now, expected in ((0, '10'), (59, '10'), (60, '11'), (119, '11'), (120, '10'), (1200 + 90, '11')):
+            self.assertEqual(self.prices(self.adapter(now), 'BTC'), {'BTC': Decimal(expected)})
+
+    def test_uncaptured_symbols_replay_a_scaled_captured_one(self):
+        self.write(self.records)
+        adapter = self.adapter(60)
+        prices = self.prices(adapter, 'DOGE', 'SOL')
+        again = self.prices(self.adapter(60), 'DOGE', 'SOL')
+        self.assertEqual(prices, again)
+        source, factor = adapter.capture.source('CRYPTO', 'DOGE')
+        self.assertIn(source, ('BTC', 'ETH'))
+        self.assertTrue(0.5 <= factor < 2)
+        self.assertEqual(prices['DOGE'], Decimal(f"{(11 if source == 'BTC' else 2) * factor:.4f}"))
+
+    def test_history_ends_now(self):
+        self.write(self.records)
+        adapter = self.adapter(10_000)
+        times, values = adapter.get_history_series('BTC', '1y')
+        # Recorded at 5000, replayed 5000 seconds later
+        self.assertEqual(epoch_seconds(times), [6000, 7000, 8000, 9000])
+        self.assertEqual(values.tolist(), [1.0, 2.0, 3.0, 4.0])
+        times, values = adapter.get_history_range('BTC', utc(1970, 1, 1, 1, 56, 40), utc(1970, 1, 1, 2, 30))
+        self.assertEqual((epoch_seconds(times), values.tolist()), ([7000, 8000], [2.0, 3.0]))
+        self.assertEqual(len(adapter.get_history_series('BTC', '5d')[0]), 0)
+        self.assertEqual(adapter.get_details('BTC'), {'market_cap': '$1.00T', 'volume': '$20.00B'})
+
+    def test_missing_file_setting(self):
+        with self.settings(MARKET_REPLAY_FILE=''), self.assertRaisesMessage(ValueError, 'MARKET_REPLAY_FILE'):
+            ReplayAdapter('CRYPTO')
+
+    def test_capture_round_trip(self):
+        Asset.objects.create(symbol='BTC', name='Bitcoin', asset_type='CRYPTO')
+        Asset.objects.create(symbol='ETH', name='Ethereum', asset_type='CRYPTO')
+        live = SimulatedAdapter('CRYPTO')
+        with mock.patch.dict('assets.management.commands.capture_market_data.ADAPTER_CLASSES',
+                             {'CRYPTO': lambda: live}), \
+                mock.patch('assets.management.commands.capture_market_data.get_bucket'):
+            call_command('capture_market_data', self.path, '--ticks', '2', '--interval', '0', '--periods', '5d',
+                         '--details', stdout=io.StringIO())
+
+        with open(self.path) as f:
+            recorded = [json.loads(line) for line in f]
+        replay = self.adapter(recorded[-1]['t'])
+        self.assertEqual(sorted(replay.capture.symbols['CRYPTO']), ['BTC', 'ETH'])
+        ticks = [r['result'] for r in recorded if r['method'] == 'get_prices']
+        self.assertEqual(len(ticks), 2)
+        self.assertIn({s: str(p) for s, p in self.prices(replay, 'BTC', 'ETH').items()}, ticks)
+
+        history = next(r for r in recorded if r['method'] == 'get_history_series' and r['symbol'] == 'ETH')
+        times, values = replay.get_history_series('ETH', '5d')
+        self.assertEqual(values.tolist(), history['result']['v'])
+        np.testing.assert_array_equal(np.diff(epoch_seconds(times)), np.diff(history['result']['t']))
+        self.assertEqual(replay.get_details('BTC'), live.get_details('BTC'))
@@ -0,0 +1,67 @@
+"""
+Change detection for PricePoint writes.
+
+A fetched price is only stored when it moved by more than the asset type's
+relative epsilon since the last stored point, or when heartbeat_seconds have
+passed since that point. The last stored (price, time) per asset lives in
+the shared cache; on a cold cache every price is written once.
+
+Skipped ticks leave gaps of at most one heartbeat in the raw PricePoints
+while a market is being polled. Candles are still built from every fetched
+tick (tasks.update_asset_prices), and history reads forward-fill what
+remains (rollups.candle_history).
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+# Override per asset type with settings.PRICE_WRITE_FILTER
+DEFAULT_WRITE_POLICY = {
+    'epsilon': 0.0,              # relative change needed to write (0 = any change)
+    'heartbeat_seconds': 15 * 60,
+}
+
+
+def get_write_policy(asset_type: str) -> dict:
+    overrides = getattr(settings, 'PRICE_WRITE_FILTER', {}).get(asset_type, {})
+    return {**DEFAULT_WRITE_POLICY, **overrides}
+
+
+def _key(asset_id) -> str:
+    return f'pricewrite:{asset_id}'
+
+
+def should_write(last, price: Decimal, now, policy: dict) -> bool:
+    """last is the (price, epoch seconds) of the last stored point, or None."""
+    if last is None:
+        return True
+    last_price, last_written = last
+    if now.timestamp() - last_written >= policy['heartbeat_seconds']:
+        return True
+    if not last_price:
+        return price != last_price
+    return abs(price - last_price) / abs(last_price) > Decimal(str(policy['epsilon']))
+
+
+def changed_points(points, now=None) -> list:
+    """The unsaved PricePoints (with .asset loaded) that should be written."""
+    now = now or timezone.now()
+    last = cache.get_many([_key(p.asset_id) for p in points])
+    return [
+        p for p in points
+        if should_write(last.get(_key(p.asset_id)), p.price, now, get_write_policy(p.asset.asset_type))
+    ]
+
+
+def record_written(points, now=None):
+    """Remember points as the last stored price of their assets."""
+    now = now or timezone.now()
+    for asset_type in {p.asset.asset_type for p in points}:
+        # Entries only need to outlive a few heartbeats; a miss just forces a write
+        timeout = get_write_policy(asset_type)['heartbeat_seconds'] * 4
+        cache.set_many(
+            {_key(p.asset_id): (p.price, now.timestamp()) for p in points if p.asset.asset_type == asset_type},
+            timeout,
+        )
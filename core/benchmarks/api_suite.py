@@ -0,0 +1,288 @@
+"""
+Offline benchmark suite for the API endpoints and the ingestion tick.
+
+For each scale (number of assets) a fresh test database is seeded with
+--points PricePoints, candles for one sampled asset per type, quotes and a
+watchlist. Each scenario is then timed with every provider served from
+recorded fixtures (benchmarks.providers), so no network access is needed.
+Reported per scenario: latency percentiles, SQL query count and Python
+allocations (tracemalloc peak and retained), from separate instrumented runs
+so the instrumentation does not skew the timings.
+
+Endpoints run "cold" (cache cleared before every request) and "warm".
+update_asset_prices runs with the ingestion rate limits lifted, so it
+measures our own cost per tick rather than the token-bucket pacing.
+
+Run from the core/ directory:
+    python -m benchmarks.api_suite [--scales 10 1000 10000] [--points 2000000]
+        [--iterations 20] [--output results.json] [--baseline old.json]
+
+Results are written as JSON (default benchmarks/results/<commit>.json);
+--baseline compares against an earlier run and exits non-zero when p50
+latency regressed by more than --threshold or a scenario issues more queries.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import django
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import DEFAULT_DB_ALIAS, connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from assets.ingestion import get_provider_policy  # noqa: E402
+from assets.models import Watchlist  # noqa: E402
+from assets.tasks import update_asset_prices  # noqa: E402
+from core.celery import app as celery_app  # noqa: E402
+
+from .providers import RecordedUpstreams, offline  # noqa: E402
+from .seed import ASSET_TYPES, analyze, seed_assets, seed_candles, seed_price_points, seed_quotes  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+DEFAULT_SCALES = [10, 1_000, 10_000]
+DEFAULT_POINTS = 2_000_000
+WATCHLIST_SIZE = 50
+TICK_ITERATIONS = 5
+
+
+def offline_settings() -> dict:
+    return {
+        'CACHES': {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'benchmarks',
+                'OPTIONS': {'MAX_ENTRIES': 1_000_000},
+            }
+        },
+        'INGESTION_PROVIDERS': {
+            asset_type: {**get_provider_policy(asset_type), 'rate': 1e9, 'burst': 10 ** 9}
+            for asset_type in ASSET_TYPES
+        },
+    }
+
+
+def summarize(timings: list) -> dict:
+    arr = np.asarray(timings, dtype=np.float64)
+    return {
+        'min': round(float(arr.min()), 3),
+        'p50': round(float(np.percentile(arr, 50)), 3),
+        'p95': round(float(np.percentile(arr, 95)), 3),
+        'mean': round(float(arr.mean()), 3),
+    }
+
+
+class QueryCounter:
+    """execute_wrapper counting statements (the test client's request_started resets connection.queries)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(run, iterations: int, reset=None) -> dict:
+    """Time iterations of run(), then count its queries and allocations in separate passes."""
+    timings = []
+    for _ in range(iterations):
+        if reset:
+            reset()
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    if reset:
+        reset()
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        run()
+
+    if reset:
+        reset()
+    tracemalloc.start()
+    try:
+        run()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'latency_ms': summarize(timings),
+        'queries': queries.count,
+        'alloc_peak_kb': round(peak / 1024, 1),
+        'alloc_retained_kb': round(retained / 1024, 1),
+    }
+
+
+def get(client, url: str, **headers):
+    def run():
+        response = client.get(url, **headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+    return run
+
+
+def endpoint_scenarios(samples: dict, token: str) -> list:
+    """[(name, run), ...] for every benchmarked endpoint."""
+    client = Client()
+    scenarios = [('GET /api/assets/', get(client, '/api/assets/'))]
+    for asset_type, asset in samples.items():
+        scenarios += [
+            (f'GET /api/assets/<pk>/history/ [{asset_type}]', get(client, f'/api/assets/{asset.pk}/history/?period=1mo')),
+            (f'GET /api/assets/<pk>/details/ [{asset_type}]', get(client, f'/api/assets/{asset.pk}/details/')),
+            (f'GET /api/prices/<symbol>/history/ [{asset_type}]',
+             get(client, f'/api/prices/{asset.symbol}/history/?period=1d')),
+        ]
+    scenarios.append(('GET /api/watchlist/', get(client, '/api/watchlist/', HTTP_AUTHORIZATION=f'Bearer {token}')))
+    return scenarios
+
+
+def seed(scale: int, points: int) -> tuple:
+    """Seed the benchmark database; returns (assets, samples, user)."""
+    now = timezone.now()
+    assets = seed_assets(scale)
+    seed_price_points(points, now)
+    samples = {}
+    for asset in assets:
+        samples.setdefault(asset.asset_type, asset)
+    seed_candles(samples.values(), now)
+    seed_quotes(now)
+    user = User.objects.create_user('benchmark')
+    Watchlist.objects.bulk_create(Watchlist(user=user, asset=asset) for asset in assets[:WATCHLIST_SIZE])
+    analyze()
+    return assets, samples, user
+
+
+def run_scale(scale: int, args) -> list:
+    old_config = setup_databases(verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS})
+    try:
+        started = time.perf_counter()
+        assets, samples, user = seed(scale, args.points)
+        print(f"\nscale={scale}: seeded {len(assets)} assets, ~{args.points} price points "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        upstreams = RecordedUpstreams(dse_symbols=[a.symbol for a in assets if a.asset_type == 'STOCK_DSE'])
+        results = []
+        with offline(upstreams):
+            for name, run in endpoint_scenarios(samples, str(AccessToken.for_user(user))):
+                run()  # warm up imports, adapters and connection state
+                results.append({'scale': scale, 'name': name, 'mode': 'cold',
+                                **measure(run, args.iterations, reset=cache.clear)})
+                run()
+                results.append({'scale': scale, 'name': name, 'mode': 'warm', **measure(run, args.iterations)})
+
+            results.append({
+                'scale': scale, 'name': 'update_asset_prices', 'mode': 'tick',
+                **measure(lambda: update_asset_prices(all_markets=True),
+                          min(args.iterations, TICK_ITERATIONS), reset=upstreams.advance),
+            })
+
+        for result in results:
+            print_result(result)
+        return results
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+def print_result(result: dict):
+    latency = result['latency_ms']
+    print(f"  {result['name']:<50} {result['mode']:<5} "
+          f"p50 {latency['p50']:9.2f} ms  p95 {latency['p95']:9.2f} ms  "
+          f"queries {result['queries']:4d}  peak {result['alloc_peak_kb']:9.1f} KB")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Print p50 and query-count deltas against baseline; returns the regressed scenarios."""
+    previous = {(r['scale'], r['name'], r['mode']): r for r in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {baseline['meta']['commit']}:")
+    for result in current['results']:
+        key = (result['scale'], result['name'], result['mode'])
+        old = previous.get(key)
+        if old is None:
+            continue
+        change = result['latency_ms']['p50'] / old['latency_ms']['p50'] - 1 if old['latency_ms']['p50'] else 0.0
+        queries = result['queries'] - old['queries']
+        regressed = change > threshold or queries > 0
+        if regressed:
+            regressions.append(key)
+        print(f"  {'!' if regressed else ' '} {result['scale']:>6} {result['name']:<50} {result['mode']:<5} "
+              f"p50 {change:+7.1%}  queries {queries:+d}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help='Asset counts to seed')
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help='PricePoints per scale')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--output', help='Results file (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed p50 slowdown (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    setup_test_environment()
+    celery_app.conf.task_always_eager = True  # candle rollups run inside the tick
+    commit = git_commit()
+    try:
+        with override_settings(**offline_settings()):
+            results = [result for scale in args.scales for result in run_scale(scale, args)]
+    finally:
+        teardown_test_environment()
+
+    report = {
+        'meta': {
+            'commit': commit,
+            'created': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'points': args.points,
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f'{commit}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f"\nWrote {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
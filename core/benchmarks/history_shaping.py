@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: per-row history shaping vs the vectorized shape_history.
+
+Run from the core/ directory:
+    python -m benchmarks.history_shaping [--points 10000] [--repeat 20]
+"""
+import argparse
+import os
+import timeit
+from datetime import datetime
+
+import django
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from assets.adapters import shape_history  # noqa: E402
+
+FORMATS = {'1d': '%H:%M', '5d': '%a %H:%M', 'max': '%Y-%m-%d'}
+
+
+def legacy_crypto(prices, period):
+    # Previous CryptoAdapter.get_history loop
+    history = []
+    for ts, price in prices:
+        dt = datetime.fromtimestamp(ts / 1000)
+        history.append({'time': dt.strftime(FORMATS[period]), 'value': price})
+    return history
+
+
+def vectorized_crypto(prices, period):
+    arr = np.asarray(prices, dtype=np.float64)
+    times = pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms', utc=True).tz_convert('UTC')
+    return shape_history(times, arr[:, 1], period)
+
+
+def legacy_stock(hist, period):
+    # Previous GlobalStockAdapter.get_history loop
+    results = []
+    for date, row in hist.iterrows():
+        results.append({'time': date.strftime(FORMATS[period]), 'value': float(row['Close'])})
+    return results
+
+
+def vectorized_stock(hist, period):
+    return shape_history(hist.index, hist['Close'].to_numpy(dtype=np.float64), period)
+
+
+def bench(label, fn, repeat):
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    print(f"  {label:<12} {best * 1000:8.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    start_ms = 1_600_000_000_000
+    prices = [[start_ms + i * 300_000, 100.0 + i * 0.01] for i in range(args.points)]
+    index = pd.date_range('2020-01-02 09:30', periods=args.points, freq='5min', tz='America/New_York')
+    hist = pd.DataFrame({'Close': np.linspace(100, 200, args.points)}, index=index)
+
+    for period in FORMATS:
+        assert legacy_crypto(prices, period) == vectorized_crypto(prices, period)
+        assert legacy_stock(hist, period) == vectorized_stock(hist, period)
+
+        print(f"period={period} points={args.points}")
+        old = bench('crypto loop', lambda: legacy_crypto(prices, period), args.repeat)
+        new = bench('crypto vec', lambda: vectorized_crypto(prices, period), args.repeat)
+        print(f"  speedup      {old / new:8.1f}x")
+        old = bench('stock loop', lambda: legacy_stock(hist, period), args.repeat)
+        new = bench('stock vec', lambda: vectorized_stock(hist, period), args.repeat)
+        print(f"  speedup      {old / new:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""
+Offline stand-ins for the upstream providers, served from recorded fixtures.
+
+offline() patches pycoingecko, the CoinGecko async client, yfinance and
+bdshare at the library boundary, so the adapters, circuit breakers and
+caches above them run unchanged, and refuses any non-loopback connection.
+Fixtures hold a few real symbols per provider; any other symbol is served
+the payload of a recorded one (picked by a stable hash), and quotes drift a
+little on every advance() so the write filter sees moving prices.
+
+Refresh the fixtures from the live providers (needs network access):
+    python -m benchmarks.providers --record
+"""
+import argparse
+import json
+import socket
+import zlib
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from unittest import mock
+
+import httpx
+import pandas as pd
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+RECORD_COINS = ['bitcoin', 'ethereum', 'solana']
+RECORD_STOCKS = ['AAPL', 'MSFT', 'VOD.L']
+RECORD_BOARD_ROWS = 8
+CHART_DAYS = ['1', '7', '30', '365']
+STOCK_PERIODS = ['1d', '5d', '1mo', '1y']
+
+
+def load_fixture(name: str) -> dict:
+    with open(FIXTURES_DIR / f'{name}.json') as f:
+        return json.load(f)
+
+
+def _pick(options: list, key: str):
+    return options[zlib.crc32(key.encode()) % len(options)]
+
+
+class RecordedUpstreams:
+    """Provider responses for any symbol, built from the recorded fixtures."""
+
+    def __init__(self, dse_symbols=()):
+        self.coingecko = load_fixture('coingecko')
+        self.yahoo = load_fixture('yfinance')
+        self.board = load_fixture('bdshare')['board']
+        self.dse_symbols = list(dse_symbols)
+        self.tick = 0
+        self._frames = {}
+
+    def advance(self):
+        """Move every quote on to its next value."""
+        self.tick += 1
+
+    def drift(self, key: str) -> float:
+        """Deterministic +-0.3% price factor per symbol and tick."""
+        return 1 + (zlib.crc32(f'{key}:{self.tick}'.encode()) % 7 - 3) / 1000
+
+    # CoinGecko
+    def simple_price(self, ids: str, include_market_cap='false', include_24hr_vol='false') -> dict:
+        result = {}
+        for identifier in filter(None, ids.split(',')):
+            recorded = self.coingecko['simple_price'][_pick(sorted(self.coingecko['simple_price']), identifier)]
+            item = {'usd': round(recorded['usd'] * self.drift(identifier), 6)}
+            if str(include_market_cap).lower() == 'true':
+                item['usd_market_cap'] = recorded['usd_market_cap']
+            if str(include_24hr_vol).lower() == 'true':
+                item['usd_24h_vol'] = recorded['usd_24h_vol']
+            result[identifier] = item
+        return result
+
+    def market_chart(self, identifier: str, days) -> dict:
+        charts = self.coingecko['market_chart'][_pick(sorted(self.coingecko['market_chart']), identifier)]
+        days = str(days)
+        if days not in charts:
+            days = '365' if days == 'max' else '1'
+        return charts[days]
+
+    def coingecko_transport(self) -> httpx.MockTransport:
+        """Transport for the async CoinGecko client (simple/price, coins/{id}/market_chart)."""
+        def handle(request):
+            params = dict(request.url.params)
+            path = request.url.path.rstrip('/')
+            if path.endswith('/simple/price'):
+                return httpx.Response(200, json=self.simple_price(
+                    params.get('ids', ''), params.get('include_market_cap', 'false'), params.get('include_24hr_vol', 'false')
+                ))
+            if path.endswith('/market_chart'):
+                return httpx.Response(200, json=self.market_chart(path.split('/')[-2], params.get('days', '1')))
+            return httpx.Response(404, json={'error': f'No fixture for {path}'})
+        return httpx.MockTransport(handle)
+
+    # yfinance
+    def _recorded_stock(self, symbol: str) -> str:
+        return _pick(sorted(self.yahoo['history']), symbol)
+
+    def _stock_frame(self, recorded: str, period: str) -> pd.DataFrame:
+        key = (recorded, period)
+        if key not in self._frames:
+            periods = self.yahoo['history'][recorded]
+            data = periods.get(period, periods['1y'])
+            # Shown at the exchange's (latest) UTC offset, like yfinance's local index
+            index = pd.to_datetime(data['index'], utc=True).tz_convert(pd.Timestamp(data['index'][-1]).tz)
+            self._frames[key] = pd.DataFrame({'Close': data['close']}, index=index)
+        return self._frames[key]
+
+    def stock_history(self, symbol: str, period: str = '1mo') -> pd.DataFrame:
+        frame = self._stock_frame(self._recorded_stock(symbol), period)
+        return frame.assign(Close=frame['Close'] * self.drift(symbol))
+
+    def stock_info(self, symbol: str) -> dict:
+        return self.yahoo['info'][_pick(sorted(self.yahoo['info']), symbol)]
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        frames = {s: self._stock_frame(self._recorded_stock(s), '1d') for s in symbols}
+        closes = [frames[s]['Close'].iloc[-1] * self.drift(s) for s in symbols]
+        index = next(iter(frames.values())).index[-1:] if frames else pd.DatetimeIndex([])
+        columns = pd.MultiIndex.from_tuples([('Close', s) for s in symbols])
+        return pd.DataFrame([closes], index=index, columns=columns)
+
+    # bdshare
+    def trade_data(self, symbol: str = None) -> pd.DataFrame:
+        symbols = [symbol] if symbol else sorted({row['symbol'] for row in self.board} | set(self.dse_symbols))
+        rows = []
+        for name in symbols:
+            row = dict(next((r for r in self.board if r['symbol'] == name), None) or _pick(self.board, name))
+            ltp = float(row['ltp'].replace(',', ''))
+            rows.append({**row, 'symbol': name, 'ltp': f'{ltp * self.drift(name):,.1f}'})
+        return pd.DataFrame(rows)
+
+
+class FakeTicker:
+    def __init__(self, upstreams: RecordedUpstreams, symbol: str):
+        self.upstreams = upstreams
+        self.ticker = symbol
+
+    def history(self, period: str = '1mo', **kwargs) -> pd.DataFrame:
+        return self.upstreams.stock_history(self.ticker, period)
+
+    @property
+    def info(self) -> dict:
+        return self.upstreams.stock_info(self.ticker)
+
+
+class FakeRedis:
+    def publish(self, channel, message) -> int:
+        return 0
+
+
+def _guarded_connect(connect):
+    def guarded(sock, address):
+        host = address[0] if isinstance(address, tuple) else address
+        if sock.family == socket.AF_UNIX or host in ('127.0.0.1', '::1', 'localhost'):
+            return connect(sock, address)
+        raise ConnectionRefusedError(f'Network access disabled while offline (tried {address})')
+    return guarded
+
+
+@contextmanager
+def offline(upstreams: RecordedUpstreams):
+    """Serve every provider call from upstreams; yields upstreams."""
+    from pycoingecko import CoinGeckoAPI
+
+    client = httpx.AsyncClient(transport=upstreams.coingecko_transport())
+    patches = [
+        mock.patch.object(CoinGeckoAPI, 'get_price',
+                          lambda self, ids, vs_currencies, **kw: upstreams.simple_price(
+                              ids, kw.get('include_market_cap', 'false'), kw.get('include_24hr_vol', 'false'))),
+        mock.patch.object(CoinGeckoAPI, 'get_coin_market_chart_by_id',
+                          lambda self, id, vs_currency, days, **kw: upstreams.market_chart(id, days)),
+        mock.patch('assets.adapters.get_async_client', lambda provider: client),
+        mock.patch('yfinance.Ticker', lambda symbol, *a, **kw: FakeTicker(upstreams, symbol)),
+        mock.patch('yfinance.download', upstreams.download),
+        mock.patch('assets.adapters.get_current_trade_data', upstreams.trade_data),
+        mock.patch('assets.realtime.get_redis', FakeRedis),
+        mock.patch.object(socket.socket, 'connect', _guarded_connect(socket.socket.connect)),
+    ]
+    with ExitStack() as stack:
+        for patch in patches:
+            stack.enter_context(patch)
+        yield upstreams
+
+
+def record_fixtures():
+    """Capture fresh fixtures from the live providers (trimmed to the fields the adapters read)."""
+    import yfinance as yf
+    from bdshare import get_current_trade_data
+    from pycoingecko import CoinGeckoAPI
+
+    cg = CoinGeckoAPI()
+    coingecko = {
+        'simple_price': cg.get_price(ids=','.join(RECORD_COINS), vs_currencies='usd',
+                                     include_market_cap='true', include_24hr_vol='true'),
+        'market_chart': {
+            coin: {
+                days: {'prices': cg.get_coin_market_chart_by_id(id=coin, vs_currency='usd', days=days)['prices']}
+                for days in CHART_DAYS
+            }
+            for coin in RECORD_COINS
+        },
+    }
+
+    yahoo = {'history': {}, 'info': {}}
+    for symbol in RECORD_STOCKS:
+        ticker = yf.Ticker(symbol)
+        info = ticker.info
+        yahoo['info'][symbol] = {key: info.get(key) for key in ('symbol', 'marketCap', 'volume', 'currency')}
+        yahoo['history'][symbol] = {}
+        for period in STOCK_PERIODS:
+            hist = ticker.history(period=period)
+            yahoo['history'][symbol][period] = {
+                'index': [ts.isoformat() for ts in hist.index],
+                'close': [round(float(c), 4) for c in hist['Close']],
+            }
+
+    board = get_current_trade_data().head(RECORD_BOARD_ROWS).astype(str)
+    bdshare = {'board': board.to_dict('records')}
+
+    for name, data in (('coingecko', coingecko), ('yfinance', yahoo), ('bdshare', bdshare)):
+        with open(FIXTURES_DIR / f'{name}.json', 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.write('\n')
+        print(f"Recorded {FIXTURES_DIR / f'{name}.json'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--record', action='store_true', help='Re-record the fixtures from the live providers')
+    args = parser.parse_args()
+    if args.record:
+        record_fixtures()
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Bulk seeding of assets, price history, candles and quotes at production scale.
+
+Price points and candles are generated inside the database (a recursive CTE
+on SQLite, generate_series on PostgreSQL), so millions of rows take seconds
+instead of a bulk_create per row. Shared by the benchmark suite and the
+query-plan tests in api/tests.py.
+"""
+from datetime import timedelta
+
+from django.db import connection
+
+from assets.models import Asset, AssetQuote, Candle, PricePoint
+from assets.rollups import RESOLUTIONS, bucket_start
+
+ASSET_TYPES = ['CRYPTO', 'STOCK_GLOBAL', 'STOCK_DSE']
+SYMBOL_PREFIXES = {'CRYPTO': 'C', 'STOCK_GLOBAL': 'G', 'STOCK_DSE': 'D'}
+
+# Candle depth per resolution: enough for every history period
+CANDLE_BUCKETS = {'1m': 24 * 60, '1h': 31 * 24, '1d': 366}
+
+SQLITE_SERIES = '''
+    WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n < %s - 1)
+    INSERT INTO "{table}" ({columns})
+    SELECT {values}
+    FROM seq CROSS JOIN "{assets}" a {where}
+'''
+
+POSTGRES_SERIES = '''
+    INSERT INTO "{table}" ({columns})
+    SELECT {values}
+    FROM generate_series(0, %s - 1) AS seq(n) CROSS JOIN "{assets}" a {where}
+'''
+
+
+def _time_sql(step_seconds: int) -> str:
+    """SQL for the timestamp seq.n steps of step_seconds before the %s parameter."""
+    if connection.vendor == 'postgresql':
+        return f"%s::timestamptz - seq.n * interval '{step_seconds} seconds'"
+    return f"datetime(%s, '-' || (seq.n * {step_seconds}) || ' seconds')"
+
+
+def _time_param(ts):
+    return ts if connection.vendor == 'postgresql' else ts.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _insert_series(table: str, columns: str, values: str, count: int, params: list, asset_ids=None):
+    """Insert count generated rows per asset (all assets, or asset_ids)."""
+    template = POSTGRES_SERIES if connection.vendor == 'postgresql' else SQLITE_SERIES
+    where = f"WHERE a.id IN ({', '.join(str(int(pk)) for pk in asset_ids)})" if asset_ids else ''
+    sql = template.format(table=table, columns=columns, values=values, assets=Asset._meta.db_table, where=where)
+    # The series length comes first on SQLite (in the CTE) and last on PostgreSQL
+    params = [count, *params] if connection.vendor != 'postgresql' else [*params, count]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def seed_assets(count: int) -> list:
+    """count assets spread round-robin over the asset types."""
+    assets = []
+    for i in range(count):
+        asset_type = ASSET_TYPES[i % len(ASSET_TYPES)]
+        symbol = f'{SYMBOL_PREFIXES[asset_type]}{i}'
+        assets.append(Asset(
+            symbol=symbol, name=f'Benchmark {symbol}', asset_type=asset_type,
+            api_identifier=f'coin-{i}' if asset_type == 'CRYPTO' else None,
+        ))
+    Asset.objects.bulk_create(assets, batch_size=1000)
+    return list(Asset.objects.order_by('pk'))
+
+
+def seed_price_points(rows: int, now):
+    """About rows points in total, one per minute per asset going back from now."""
+    per_asset = max(1, rows // max(1, Asset.objects.count()))
+    _insert_series(
+        PricePoint._meta.db_table, '"asset_id", "price", "timestamp"',
+        f'a.id, 100 + (seq.n %% 1000) / 10.0, {_time_sql(60)}',
+        per_asset, [_time_param(now)],
+    )
+
+
+def seed_candles(assets, now):
+    """Full-depth candles at every resolution for assets."""
+    for resolution, buckets in CANDLE_BUCKETS.items():
+        step = int(RESOLUTIONS[resolution].total_seconds())
+        _insert_series(
+            Candle._meta.db_table, '"asset_id", "resolution", "bucket_start", "open", "high", "low", "close"',
+            f"a.id, '{resolution}', {_time_sql(step)}, "
+            '100 + (seq.n %% 1000) / 10.0, 101 + (seq.n %% 1000) / 10.0, '
+            '99 + (seq.n %% 1000) / 10.0, 100 + ((seq.n + 1) %% 1000) / 10.0',
+            buckets, [_time_param(bucket_start(now, resolution))], asset_ids=[a.pk for a in assets],
+        )
+
+
+def seed_quotes(now):
+    """An AssetQuote for every asset, as left by the ingestion task."""
+    AssetQuote.objects.bulk_create(
+        [
+            AssetQuote(asset_id=pk, latest_price=100 + pk % 1000, price_24h_ago=99 + pk % 1000,
+                       change_24h=round(100 / (99 + pk % 1000), 2), updated_at=now - timedelta(seconds=30))
+            for pk in Asset.objects.values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+    )
@@ -3,6 +3,11 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The realtime quote stream (/api/stream/prices/, api.streaming) and the
+upstream-bound endpoints in api.async_views are async views, so production
+serves this application (gunicorn with uvicorn workers, see start.sh) rather
+than core.wsgi.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -1,8 +1,16 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 app = Celery('core')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+
+@worker_process_shutdown.connect
+def mark_metrics_dead(pid=None, **kwargs):
+    # Drop the exiting pool process's live gauges from the shared metrics directory
+    from assets.metrics import mark_process_dead
+    mark_process_dead(pid)
@@ -1,5 +1,6 @@
+import sys
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 from datetime import timedelta
 
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Must be top
+    'api.metrics.MetricsMiddleware',  # Request latency and SQL counts for /metrics
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -47,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware', # Required for allauth
+    'api.profiling.ProfilingMiddleware',  # Staff-only X-Profile / ?_profile=1 request profiles
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -75,6 +78,22 @@ DATABASES = {
     )
 }
 
+# Redis: Celery broker, shared cache and realtime quote pub/sub
+REDIS_URL = config('REDIS_URL')
+
+# Cache (shared across gunicorn and Celery workers)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache'),
+        'LOCATION': config('CACHE_URL', default=REDIS_URL),
+    }
+}
+
+# manage.py test runs on its own: a per-process cache instead of Redis
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+if TESTING:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ledgersync-tests'}}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -117,6 +136,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ]
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_EXPOSE_HEADERS = ['X-Data-Stale']
 CSRF_TRUSTED_ORIGINS = [
     "https://ledger-sync-a-smart-crypto-finance.vercel.app",
     "https://ledgersync-a-smart-crypto-finance.onrender.com",
@@ -148,15 +168,109 @@ ACCOUNT_AUTHENTICATION_METHOD = 'email'
 ACCOUNT_EMAIL_VERIFICATION = 'optional'
 
 # Celery
-CELERY_BROKER_URL = config('REDIS_URL')
-CELERY_RESULT_BACKEND = config('REDIS_URL')
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_SERIALIZER = 'json'
 
+# Ingestion: per-provider concurrency cap, token-bucket rate (calls/sec),
+# burst size and assets per batch call. See assets/ingestion.py
+INGESTION_PROVIDERS = {
+    'CRYPTO': {'max_concurrency': 1, 'rate': 0.5, 'burst': 2, 'batch_size': 250},
+    'STOCK_GLOBAL': {'max_concurrency': 4, 'rate': 2.0, 'burst': 4, 'batch_size': 50},
+    'STOCK_DSE': {'max_concurrency': 1, 'rate': 0.2, 'burst': 1, 'batch_size': 1000},
+}
+INGESTION_ACQUIRE_TIMEOUT = 30.0
+
+# Circuit breakers per provider (see assets.breaker for the defaults);
+# yfinance batch downloads are legitimately slower than single calls
+CIRCUIT_BREAKERS = {
+    'STOCK_GLOBAL': {'slow_call_seconds': 8.0},
+}
+
+# PricePoint write filter: a fetched price is stored only when it moved by more
+# than epsilon (relative) or heartbeat_seconds passed since the last stored one
+PRICE_WRITE_FILTER = {
+    'CRYPTO': {'epsilon': 0.0001, 'heartbeat_seconds': 15 * 60},
+    'STOCK_GLOBAL': {'epsilon': 0.0, 'heartbeat_seconds': 15 * 60},
+    'STOCK_DSE': {'epsilon': 0.0, 'heartbeat_seconds': 15 * 60},
+}
+
+# Market data source: 'live' upstreams, 'simulated' GBM price paths or
+# 'replay' of a capture_market_data NDJSON file (local load testing only)
+MARKET_DATA_SOURCE = config('MARKET_DATA_SOURCE', default='live')
+MARKET_REPLAY_FILE = config('MARKET_REPLAY_FILE', default='')
+# Per asset type simulation / replay options, see assets.simulated
+MARKET_SIMULATION = {
+    'CRYPTO': {'sigma': 0.8, 'min_price': 0.01, 'max_price': 70000.0},
+    'STOCK_GLOBAL': {'sigma': 0.3, 'min_price': 5.0, 'max_price': 1000.0},
+    'STOCK_DSE': {'sigma': 0.25, 'min_price': 10.0, 'max_price': 800.0},
+}
+
+# Prometheus scrape endpoint (/metrics); when set, scrapers must send
+# "Authorization: Bearer <METRICS_TOKEN>". Without a token only
+# METRICS_ALLOWED_IPS (REMOTE_ADDR) may scrape.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())
+
+# Per-request profiling for staff (api.profiling). Off by default: when False
+# the middleware is removed and adapter methods are not instrumented
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+
+# Pooled HTTP sessions per upstream (keep-alive pool size, timeouts in seconds)
+HTTP_PROVIDERS = {
+    'coingecko': {'pool_size': 10, 'connect_timeout': 3.05, 'read_timeout': 10},
+    'yahoo': {'read_timeout': 10},
+    'finnhub': {'pool_size': 4, 'connect_timeout': 3.05, 'read_timeout': 5},
+    'news': {'pool_size': 8, 'connect_timeout': 3.05, 'read_timeout': 10},
+}
+
+# Retention: raw PricePoints are kept this many days per asset type; older
+# history is served from the candle rollups (None keeps a resolution forever).
+PRICE_RETENTION_DAYS = {
+    'CRYPTO': 7,
+    'STOCK_GLOBAL': 7,
+    'STOCK_DSE': 7,
+}
+CANDLE_RETENTION_DAYS = {
+    '1m': 14,
+    '1h': 400,
+    '1d': None,
+}
+PRICE_RETENTION_BATCH_SIZE = 5000
+
+# PostgreSQL only: drop expired months by partition after running
+# `manage.py partition_pricepoints` once.
+PRICEPOINT_PARTITIONING = config('PRICEPOINT_PARTITIONING', default=False, cast=bool)
+PRICEPOINT_PARTITIONS_AHEAD = 2
+
+# Exchange holidays per venue (ISO dates, venue-local) for the market-hours
+# aware ingestion schedule; see assets.market_hours for the venue codes.
+MARKET_HOLIDAYS = {
+    'US': [],
+    'DSE': [],
+}
+# Seconds after a close before the one settlement fetch of closing prices
+MARKET_SETTLEMENT_DELAY = 300
+
 CELERY_BEAT_SCHEDULE = {
+    # Every minute, but only markets in session (plus one settlement fetch
+    # after each close) are actually fetched
     'update-asset-prices-every-60-seconds': {
         'task': 'assets.tasks.update_asset_prices',
         'schedule': 60.0,
     },
+    'update-market-summary-every-60-seconds': {
+        'task': 'api.tasks.update_market_summary',
+        'schedule': 60.0,
+    },
+    'update-news-every-5-minutes': {
+        'task': 'api.tasks.update_news',
+        'schedule': 300.0,
+    },
+    'enforce-price-retention-hourly': {
+        'task': 'assets.tasks.enforce_price_retention',
+        'schedule': 3600.0,
+    },
 }
@@ -0,0 +1,7 @@
+# Loaded by gunicorn from the working directory (start.sh runs it from core/)
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared metrics directory
+    from assets.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
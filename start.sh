@@ -22,7 +22,15 @@ cd core
 # 2. FORCE DATA FETCH (Run this immediately so the site isn't empty)
 # This forces the code to fetch prices once before the server even starts listening.
 echo "Fetching initial data..."
-python manage.py shell -c "from assets.tasks import update_asset_prices; update_asset_prices()"
+python manage.py shell -c "from assets.tasks import update_asset_prices; update_asset_prices(all_markets=True)"
+python manage.py shell -c "from api.tasks import update_news; update_news()"
+
+# Web and Celery processes share one prometheus_client multiprocess
+# directory so /metrics sees them all; stale files from a previous run
+# must go before any of them start
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/ledgersync-metrics}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
 
 # 3. Start Celery Worker & Beat
 # REMOVED: '--scheduler django' (This was the cause of the crash)
@@ -31,5 +39,7 @@ echo "Starting Worker and Scheduler..."
 celery -A core worker --beat --loglevel=info --concurrency=2 &
 
 # 4. Start the Web Server
+# ASGI (uvicorn workers) so the SSE quote stream and the async upstream views
+# do not pin a sync worker per client
 echo "Starting Gunicorn..."
-gunicorn core.wsgi:application
\ No newline at end of file
+gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker
\ No newline at end of file